@@ -2,10 +2,11 @@
 # Code to generate an app interface in streamlit intaking a csv data file and showing various graphs
 
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
 import os
 
+from eng220 import categories, density, figures
+from eng220.data import load_csv
+
 # Title of the app
 #st.title("Group-001")
 
@@ -24,36 +25,44 @@ if debug == 1:
         # Load the data using path relative to the script location
         current_dir = os.path.dirname(__file__)
         csv_path = os.path.join(current_dir, 'nm_water_weather_data.csv')
-        data = pd.read_csv(csv_path)
+        data = load_csv(csv_path)
 
         st.subheader("Data Preview")
         st.dataframe(data)
 
-        # Dropdowns for selecting columns
-        columns = data.columns.tolist()
-        x_column = st.selectbox("Select X-axis column", columns)
-        y_column = st.selectbox("Select Y-axis column", columns)
+        # Chart controls rerun only this section, not the data preview above
+        @st.fragment
+        def chart_section(data):
+            # Dropdowns for selecting columns
+            columns = data.columns.tolist()
+            x_column = st.selectbox("Select X-axis column", columns)
+            y_column = st.selectbox("Select Y-axis column", columns)
+
+            # Dropdown for graph type
+            graph_type = st.selectbox("Select Graph Type", ["Line", "Scatter", "Bar"])
+            # Bars combine the rows that share an X value
+            how = st.selectbox("Combine Y values by", categories.METHODS) if graph_type == "Bar" else None
 
-        # Dropdown for graph type
-        graph_type = st.selectbox("Select Graph Type", ["Line", "Scatter", "Bar"])
+            # Plot
+            if st.button("Plot Graph"):
+                fig, ax = figures.subplots()
 
-        # Plot
-        if st.button("Plot Graph"):
-            fig, ax = plt.subplots()
+                if graph_type == "Line":
+                    ax.plot(data[x_column], data[y_column], marker='o')
+                    ax.set_title(f"{y_column} vs {x_column} (Line Plot)")
 
-            if graph_type == "Line":
-                ax.plot(data[x_column], data[y_column], marker='o')
-                ax.set_title(f"{y_column} vs {x_column} (Line Plot)")
+                elif graph_type == "Scatter":
+                    density.scatter(ax, data[x_column], data[y_column])
+                    ax.set_title(f"{y_column} vs {x_column} (Scatter Plot)")
 
-            elif graph_type == "Scatter":
-                ax.scatter(data[x_column], data[y_column])
-                ax.set_title(f"{y_column} vs {x_column} (Scatter Plot)")
+                elif graph_type == "Bar":
+                    totals = categories.aggregate(data[x_column], data[y_column], how)
+                    ax.bar(totals.index, totals.values)
+                    ax.set_title(f"{y_column} vs {x_column} (Bar Chart)")
 
-            elif graph_type == "Bar":
-                ax.bar(data[x_column], data[y_column])
-                ax.set_title(f"{y_column} vs {x_column} (Bar Chart)")
+                figures.show(fig)
 
-            st.pyplot(plt)
+        chart_section(data)
 
         st.markdown('<p style="color:red; font-size:20px;">Tip: Ensure the selected columns are numeric for meaningful plots.</p>', unsafe_allow_html=True)
 
@@ -2,10 +2,12 @@
 # Group 002 Streamlit Visualization App
 
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
 import os
 
+from eng220 import categories, density, figures, tables
+from eng220.data import load_csv
+from eng220.excel import load_water_quality
+
 # Title of the app
 #st.title("Group-002")
 
@@ -21,59 +23,69 @@ try:
     # Read CSV relative to this script's directory
     current_dir = os.path.dirname(__file__)
     csv_path = os.path.join(current_dir, 'Water_Data_Clean1.csv')
-    data = pd.read_csv(csv_path)
+    source = st.radio("Data Source", ["Cleaned CSV", "Raw Workbook"], horizontal=True)
+    if source == "Raw Workbook":
+        # Rebuilt from 'Water Data Raw.xlsx' (converted once, then cached)
+        data_path = os.path.join(current_dir, 'Water Data Raw.xlsx')
+        data = load_water_quality(data_path)
+    else:
+        data_path = csv_path
+        data = load_csv(csv_path)
 
     st.subheader("Data Preview")
-    st.dataframe(data)
-
-    # Dropdown for selecting columns
-    columns = data.columns.tolist()
-    x_column = st.selectbox("Select X-axis column", columns)
-    y_column = st.selectbox("Select Y-axis column", columns)
-
-    # Dropdown for graph type
-    graph_type = st.selectbox("Select Graph Type", ["Line", "Scatter", "Bar", "Pie"])
-
-    # Plot button
-    if st.button("Plot Graph"):
-        fig, ax = plt.subplots()
-
-        if graph_type == "Line":
-            ax.plot(data[x_column], data[y_column], marker='o')
-            ax.set_title(f"{y_column} vs {x_column} (Line Plot)")
-            ax.set_xlabel(x_column)
-            ax.set_ylabel(y_column)
-            st.pyplot(fig)
-
-        elif graph_type == "Scatter":
-            ax.scatter(data[x_column], data[y_column])
-            ax.set_title(f"{y_column} vs {x_column} (Scatter Plot)")
-            ax.set_xlabel(x_column)
-            ax.set_ylabel(y_column)
-            st.pyplot(fig)
-
-        elif graph_type == "Bar":
-            ax.bar(data[x_column], data[y_column])
-            ax.set_title(f"{y_column} vs {x_column} (Bar Chart)")
-            ax.set_xlabel(x_column)
-            ax.set_ylabel(y_column)
-            st.pyplot(fig)
-
-        elif graph_type == "Pie":
-            if len(data[x_column].unique()) <= 10:
-                pie_labels = data[x_column].astype(str)
-                pie_values = data[y_column]
-                fig, ax = plt.subplots()
-                ax.pie(
-                    pie_values,
-                    labels=pie_labels,
-                    autopct='%1.1f%%',
-                    startangle=90
-                )
-                ax.set_title(f"{y_column} Distribution (Pie Chart)")
-                st.pyplot(fig)
-            else:
-                st.error("Pie chart requires fewer than 10 unique categories in the X-axis.")
+    tables.show(data, data_path)
+
+    # Chart controls rerun only this section, not the data preview above
+    @st.fragment
+    def chart_section(data):
+        # Dropdown for selecting columns
+        columns = data.columns.tolist()
+        x_column = st.selectbox("Select X-axis column", columns)
+        y_column = st.selectbox("Select Y-axis column", columns)
+
+        # Dropdown for graph type
+        graph_type = st.selectbox("Select Graph Type", ["Line", "Scatter", "Bar", "Pie"])
+        # Bars and pie slices combine the rows that share an X value
+        how = st.selectbox("Combine Y values by", categories.METHODS) if graph_type in ("Bar", "Pie") else None
+
+        # Plot button
+        if st.button("Plot Graph"):
+            fig, ax = figures.subplots()
+
+            if graph_type == "Line":
+                ax.plot(data[x_column], data[y_column], marker='o')
+                ax.set_title(f"{y_column} vs {x_column} (Line Plot)")
+                ax.set_xlabel(x_column)
+                ax.set_ylabel(y_column)
+                figures.show(fig)
+
+            elif graph_type == "Scatter":
+                density.scatter(ax, data[x_column], data[y_column])
+                ax.set_title(f"{y_column} vs {x_column} (Scatter Plot)")
+                ax.set_xlabel(x_column)
+                ax.set_ylabel(y_column)
+                figures.show(fig)
+
+            elif graph_type == "Bar":
+                totals = categories.aggregate(data[x_column], data[y_column], how)
+                ax.bar(totals.index, totals.values)
+                ax.set_title(f"{y_column} vs {x_column} (Bar Chart)")
+                ax.set_xlabel(x_column)
+                ax.set_ylabel(y_column)
+                figures.show(fig)
+
+            elif graph_type == "Pie":
+                # The largest slices plus one "Other" slice, so any X column fits
+                totals = categories.aggregate(data[x_column], data[y_column], how, top=categories.PIE_TOP_K)
+                if (totals >= 0).all():
+                    ax.pie(totals, labels=totals.index, autopct='%1.1f%%', startangle=90)
+                    ax.set_title(f"{y_column} Distribution (Pie Chart)")
+                    figures.show(fig)
+                else:
+                    st.error("Pie chart requires non-negative Y values.")
+                    figures.release(fig)
+
+    chart_section(data)
 
     st.info("Tip: Ensure selected columns are numeric for meaningful plots.")
 
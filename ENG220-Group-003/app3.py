@@ -2,9 +2,10 @@
 # Group 003 - McClure Reservoir Water Level Dashboard
 
 import streamlit as st
-import pandas as pd
 import os
 
+from eng220.data import load_csv
+
 # Title
 #st.title("Group-003")
 
@@ -19,7 +20,7 @@ try:
     # Load CSV file relative to this script
     current_dir = os.path.dirname(__file__)
     csv_path = os.path.join(current_dir, "extracted_data.csv")
-    df = pd.read_csv(csv_path)
+    df = load_csv(csv_path)
 
     st.subheader("Reservoir Level Data")
     st.dataframe(df)
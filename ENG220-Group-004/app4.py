@@ -2,10 +2,10 @@
 # Group 004 - Water Data in New Mexico Districts
 
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
 import os
 
+from eng220 import figures, manifest, offload
+
 # Title of the app
 #st.title("Group-004")
 
@@ -24,10 +24,10 @@ image_path = os.path.join(os.path.dirname(__file__), "WaterDistricts.png")
 if os.path.exists(image_path):
     st.image(image_path, caption="Water Districts in New Mexico")
 
-# Locate script directory and district folders
+# Locate script directory and the district folders holding data (from the dataset manifest)
 base_path = os.path.dirname(__file__)
 district_folders = [f"District {i}" for i in range(1, 8)]
-available_folders = [folder for folder in district_folders if os.path.exists(os.path.join(base_path, folder))]
+available_folders = [folder for folder in district_folders if manifest.listdir(os.path.join(base_path, folder))]
 
 if not available_folders:
     st.error("No district folders found in the current directory.")
@@ -36,7 +36,7 @@ else:
     folder_path = os.path.join(base_path, selected_district)
 
     # List CSV files
-    csv_files = [file for file in os.listdir(folder_path) if file.endswith('.csv')]
+    csv_files = manifest.listdir(folder_path, '.csv')
 
     if not csv_files:
         st.warning(f"No CSV files found in {selected_district}.")
@@ -45,23 +45,11 @@ else:
         file_path = os.path.join(folder_path, selected_file)
 
         try:
-            # Load and preprocess CSV data
-            raw_data = pd.read_csv(file_path, header=1)
-            raw_data.rename(columns={raw_data.columns[0]: "Timestamp"}, inplace=True)
-            raw_data['Timestamp'] = pd.to_datetime(raw_data['Timestamp'], errors='coerce')
-            raw_data.dropna(subset=['Timestamp'], inplace=True)
-            raw_data.replace("NR", "none", inplace=True)
-
-            numeric_columns = raw_data.columns[1:]
-            for col in numeric_columns:
-                raw_data[col] = pd.to_numeric(raw_data[col], errors='coerce')
-
-            # Aggregate by day
-            daily_data = raw_data.set_index('Timestamp').resample('D').mean().reset_index()
-            non_numeric = raw_data.set_index('Timestamp').resample('D').first().reset_index()
-            for col in non_numeric.columns:
-                if col not in daily_data.columns:
-                    daily_data[col] = non_numeric[col]
+            # Load, clean and aggregate by day in a worker process
+            job = offload.submit("group004_daily", file_path)
+            daily_data = offload.result(job, "Aggregating readings by day...")
+            if daily_data is None:
+                st.stop()
 
             # Show data
             st.subheader(f"Data Preview: {selected_district} - {selected_file}")
@@ -76,7 +64,7 @@ else:
 
             # Plot graph
             if st.button("Plot Graph"):
-                fig, ax = plt.subplots()
+                fig, ax = figures.subplots()
 
                 if graph_type == "Line":
                     ax.plot(daily_data[x_column], daily_data[y_column], marker='o')
@@ -92,7 +80,7 @@ else:
 
                 ax.set_xlabel(x_column)
                 ax.set_ylabel(y_column)
-                st.pyplot(fig)
+                figures.show(fig)
 
             st.info("Tip: Data has been aggregated to one point per day for better performance.")
 
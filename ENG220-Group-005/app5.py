@@ -2,9 +2,11 @@
 
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
 import os
 
+from eng220 import figures, manifest
+from eng220.data import load_csv
+
 # Description (title is set from dashboard)
 st.markdown("""
 ### California Air Pollution Visualization Dashboard
@@ -15,21 +17,15 @@ Data includes daily readings of various pollutants like **CO, NO₂, Ozone, PM2.
 You can compare pollutants by year, visualize monthly averages, and explore proportions via bar and pie charts.
 """)
 
-# Define file paths using current directory
+# One file per year, newest first (from the dataset manifest)
 base_path = os.path.dirname(__file__)
-file_names = {
-    "2024": os.path.join(base_path, "California2024.csv"),
-    "2023": os.path.join(base_path, "California2023.csv"),
-    "2022": os.path.join(base_path, "California2022.csv"),
-    "2021": os.path.join(base_path, "California2021.csv"),
-    "2020": os.path.join(base_path, "California2020.csv"),
-    "2019": os.path.join(base_path, "California2019.csv"),
-}
+yearly_files = manifest.partitions(base_path, "California{year}.csv")
+file_names = {str(year): yearly_files[year] for year in sorted(yearly_files, reverse=True)}
 
 # Function to load data using column index
 def load_data(file_path, year):
     try:
-        df = pd.read_csv(file_path)
+        df = load_csv(file_path)
 
         if df.shape[1] < 3:
             st.warning(f"Expected at least 3 columns in {os.path.basename(file_path)}")
@@ -75,39 +71,54 @@ if dataframes:
         st.error(f"The selected measurement column '{measurement_column_name}' is not available.")
     else:
         grouped_data = all_data.groupby(['Year', 'Month'])[measurement_column_name].mean().reset_index()
+        bar_data = all_data.groupby('Year')[measurement_column_name].sum().reset_index()
+
+        # Chart builders; the charts are independent and drawn in parallel
+        def draw_line():
+            fig, ax = figures.subplots(figsize=(10, 6))
+            for year in grouped_data['Year'].unique():
+                year_data = grouped_data[grouped_data['Year'] == year]
+                ax.plot(year_data['Month'], year_data[measurement_column_name], label=str(year))
+            ax.set_title(f"Monthly Average {measurement_column_name}")
+            ax.set_xlabel("Month")
+            ax.set_ylabel(measurement_column_name)
+            ax.legend()
+            ax.set_xticks(range(1, 13))
+            ax.set_xticklabels(['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+                                'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'])
+            return fig
+
+        def draw_bar():
+            fig, ax = figures.subplots()
+            ax.bar(bar_data['Year'], bar_data[measurement_column_name])
+            ax.set_xlabel("Year")
+            ax.set_ylabel(f"Total {measurement_column_name}")
+            ax.set_title(f"Total {measurement_column_name} by Year")
+            return fig
+
+        def draw_pie():
+            fig, ax = figures.subplots()
+            ax.pie(bar_data[measurement_column_name], labels=bar_data['Year'], autopct='%1.1f%%', startangle=90)
+            ax.set_title(f"Proportion of {measurement_column_name} by Year")
+            return fig
+
+        # Bar and pie charts are only shown for raw measurements
+        if selected_measurement == "Measurement":
+            line_png, bar_png, pie_png = figures.render_parallel(draw_line, draw_bar, draw_pie)
+        else:
+            line_png, = figures.render_parallel(draw_line)
 
         # Line Chart
         st.subheader(f"Monthly Averages of {measurement_column_name} (Line Plot)")
-        fig, ax = plt.subplots(figsize=(10, 6))
-        for year in grouped_data['Year'].unique():
-            year_data = grouped_data[grouped_data['Year'] == year]
-            ax.plot(year_data['Month'], year_data[measurement_column_name], label=str(year))
-        ax.set_title(f"Monthly Average {measurement_column_name}")
-        ax.set_xlabel("Month")
-        ax.set_ylabel(measurement_column_name)
-        ax.legend()
-        ax.set_xticks(range(1, 13))
-        ax.set_xticklabels(['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
-                            'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'])
-        st.pyplot(fig)
+        figures.show_png(line_png)
 
         # Bar and Pie Charts
         if selected_measurement == "Measurement":
-            bar_data = all_data.groupby('Year')[measurement_column_name].sum().reset_index()
-
             st.subheader("Total Pollutant Values by Year (Bar Chart)")
-            bar_fig, ax = plt.subplots()
-            ax.bar(bar_data['Year'], bar_data[measurement_column_name])
-            ax.set_xlabel("Year")
-            ax.set_ylabel(f"Total {measurement_column_name}")
-            ax.set_title(f"Total {measurement_column_name} by Year")
-            st.pyplot(bar_fig)
+            figures.show_png(bar_png)
 
             st.subheader("Proportion of Pollutant by Year (Pie Chart)")
-            pie_fig, ax = plt.subplots()
-            ax.pie(bar_data[measurement_column_name], labels=bar_data['Year'], autopct='%1.1f%%', startangle=90)
-            ax.set_title(f"Proportion of {measurement_column_name} by Year")
-            st.pyplot(pie_fig)
+            figures.show_png(pie_png)
 
         # Table view
         st.subheader("Grouped Monthly Average Data")
@@ -3,7 +3,8 @@
 
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
+
+from eng220 import figures, persist
 
 # Title
 #st.title("Group-006")
@@ -24,8 +25,8 @@ The project uses **Streamlit** to provide an interactive and easy-to-use interfa
 # GitHub source link
 st.markdown("[View Source on GitHub](https://github.com/CJLawson175/ENG220_Group-6.git)")
 
-# Cached data loader
-@st.cache_data
+# Data loader, cached on disk across restarts (refreshed daily)
+@persist.cached(max_age=persist.REMOTE_MAX_AGE)
 def load_data():
     file_url = 'https://raw.githubusercontent.com/CJLawson175/ENG220-Group-6/main/ENG220_Data_Filtered.csv'
     return pd.read_csv(file_url)
@@ -62,7 +63,7 @@ if 'Year' in data.columns and 'Month' in data.columns:
 
     # Plot the graph
     if not filtered_data.empty:
-        fig, ax = plt.subplots(figsize=(10, 6))
+        fig, ax = figures.subplots(figsize=(10, 6))
 
         if graph_type == "Line":
             ax.plot(filtered_data['Date'], filtered_data[y_column], marker='o')
@@ -78,8 +79,8 @@ if 'Year' in data.columns and 'Month' in data.columns:
 
         ax.set_xlabel("Date")
         ax.set_ylabel(y_column)
-        plt.xticks(rotation=45)
-        st.pyplot(fig)
+        ax.tick_params(axis="x", labelrotation=45)
+        figures.show(fig)
     else:
         st.warning(f"No data available for {selected_county}, {selected_state}.")
 
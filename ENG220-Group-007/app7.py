@@ -2,11 +2,12 @@
 # Group 007 - Maine Air Quality Dashboard
 
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
 import os
 
+from eng220 import categories, density, figures, tables
+from eng220.data import load_csv
+from eng220.profile import profile_csv
+
 # Title
 st.title("Group-007")
 
@@ -32,10 +33,12 @@ The dashboard uses **Python and Streamlit** to enable statistical analysis and g
 try:
     current_dir = os.path.dirname(__file__)
     csv_path = os.path.join(current_dir, "MaineDatav6.csv")
-    data = pd.read_csv(csv_path)
+    data = load_csv(csv_path)
+    # Per-column statistics with running totals, computed once per file version
+    profile = profile_csv(csv_path)
 
     st.subheader("Data Preview")
-    st.dataframe(data)
+    tables.show(data, csv_path)
 
     # Row filter
     total_rows, total_columns = data.shape
@@ -44,35 +47,33 @@ try:
     filtered_data = data.iloc[start_row:end_row + 1]
 
     st.subheader("Filtered Data (Rows)")
-    st.dataframe(filtered_data)
+    tables.show(data, csv_path, rows=(start_row, end_row + 1))
 
     # Column filter
     selected_columns = st.multiselect("Select Columns", options=data.columns.tolist(), default=data.columns.tolist())
     filtered_data = filtered_data[selected_columns]
 
     st.subheader("Filtered Data (Rows & Columns)")
-    st.dataframe(filtered_data)
+    tables.show(data, csv_path, rows=(start_row, end_row + 1), columns=selected_columns)
 
     # Standard deviation
     st.subheader("Standard Deviation Calculator")
     std_column = st.selectbox("Select Column for Standard Deviation", selected_columns)
     if st.button("Calculate Standard Deviation"):
-        try:
-            std_values = filtered_data[std_column].astype(float)
-            std_result = np.std(std_values, ddof=1)
+        if profile[std_column].numeric:
+            std_result = profile[std_column].range_stats(start_row, end_row + 1)["std"]
             st.success(f"The standard deviation of '{std_column}' is: {std_result}")
-        except ValueError:
+        else:
             st.error(f"Selected column '{std_column}' contains non-numeric data.")
 
     # Average
     st.subheader("Average Calculator")
     avg_column = st.selectbox("Select Column for Average", selected_columns)
     if st.button("Calculate Average"):
-        try:
-            avg_values = filtered_data[avg_column].astype(float)
-            avg_result = np.mean(avg_values)
+        if profile[avg_column].numeric:
+            avg_result = profile[avg_column].range_stats(start_row, end_row + 1)["mean"]
             st.success(f"The average of '{avg_column}' is: {avg_result}")
-        except ValueError:
+        else:
             st.error(f"Selected column '{avg_column}' contains non-numeric data.")
 
     # Graph plotting
@@ -80,40 +81,45 @@ try:
     x_column = st.selectbox("Select X-axis column", selected_columns)
     y_column = st.selectbox("Select Y-axis column", selected_columns)
     graph_type = st.selectbox("Select Graph Type", ["Line", "Scatter", "Bar", "Pie"])
+    # Bars and pie slices combine the rows that share an X value
+    how = st.selectbox("Combine Y values by", categories.METHODS) if graph_type in ("Bar", "Pie") else None
 
     if st.button("Plot Graph"):
-        fig, ax = plt.subplots()
+        fig, ax = figures.subplots()
+        # Blank cells (the label column is mostly empty) cannot be placed on a categorical axis
+        present = filtered_data[x_column].notna() & filtered_data[y_column].notna()
 
         if graph_type == "Line":
-            ax.plot(filtered_data[x_column], filtered_data[y_column], marker='o')
+            ax.plot(filtered_data[x_column][present], filtered_data[y_column][present], marker='o')
             ax.set_title(f"{y_column} vs {x_column} (Line Plot)")
 
         elif graph_type == "Scatter":
-            ax.scatter(filtered_data[x_column], filtered_data[y_column])
+            density.scatter(ax, filtered_data[x_column][present], filtered_data[y_column][present])
             ax.set_title(f"{y_column} vs {x_column} (Scatter Plot)")
 
         elif graph_type == "Bar":
-            ax.bar(filtered_data[x_column], filtered_data[y_column])
+            totals = categories.aggregate(filtered_data[x_column], filtered_data[y_column], how)
+            ax.bar(totals.index, totals.values)
             ax.set_title(f"{y_column} vs {x_column} (Bar Chart)")
 
         elif graph_type == "Pie":
-            if len(filtered_data[x_column].unique()) <= 10:
-                plt.pie(
-                    filtered_data[y_column],
-                    labels=filtered_data[x_column],
-                    autopct='%1.1f%%',
-                    startangle=90,
-                )
-                plt.title(f"{y_column} (Pie Chart)")
+            # The largest slices plus one "Other" slice, so any X column fits
+            totals = categories.aggregate(filtered_data[x_column], filtered_data[y_column], how, top=categories.PIE_TOP_K)
+            if (totals >= 0).all():
+                ax.pie(totals, labels=totals.index, autopct='%1.1f%%', startangle=90)
+                ax.set_title(f"{y_column} (Pie Chart)")
             else:
-                st.error("Pie chart requires fewer than 10 unique categories.")
+                st.error("Pie chart requires non-negative Y values.")
+                # Nothing drawn; no empty chart under the error
+                figures.release(fig)
+                fig = None
 
         if graph_type != "Pie":
             ax.set_xlabel(x_column)
             ax.set_ylabel(y_column)
-            st.pyplot(fig)
-        else:
-            st.pyplot(plt)
+            figures.show(fig)
+        elif fig is not None:
+            figures.show(fig)
 
     st.info("Tip: Select numeric fields for meaningful statistics and plots.")
 
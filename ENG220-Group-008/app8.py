@@ -3,9 +3,11 @@
 
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
 import os
 
+from eng220 import figures
+from eng220.data import load_csv
+
 # Title
 st.title("Group-008")
 
@@ -23,12 +25,11 @@ Users can:
 ---
 """)
 
-# Load CSV file relative to app location
-@st.cache_data
+# Load CSV file relative to app location (shared with Group 020's copy)
 def load_data():
     current_dir = os.path.dirname(__file__)
     csv_path = os.path.join(current_dir, "filtered_data_updated.csv")
-    return pd.read_csv(csv_path)
+    return load_csv(csv_path)
 
 # Load the dataset
 filtered_data_df = load_data()
@@ -62,26 +63,26 @@ else:
         monthly_data = filtered_data.pivot(index='Year', columns='Month', values='Monthly Measurements')
         yearly_avg = filtered_data['Yearly Measurement Average'].mean()
 
-        fig, ax = plt.subplots(figsize=(12, 6))
+        fig, ax = figures.subplots(figsize=(12, 6))
         monthly_data.plot(kind='bar', ax=ax)
         ax.axhline(y=yearly_avg, color='red', linestyle='--', label='Yearly Average')
         ax.set_xlabel('Year')
         ax.set_ylabel(f"Monthly {material} ({unit})")
         ax.set_title(f"{material} Levels in {county}, {state} by Month")
         ax.legend()
-        st.pyplot(fig)
+        figures.show(fig)
 
     else:
         st.subheader(f"Line Graph on {material} in {county}, {state}")
         line_data = filtered_data.groupby(['Year', 'Month'])['Monthly Measurements'].mean().reset_index()
         line_data['Date'] = pd.to_datetime(line_data[['Year', 'Month']].assign(DAY=1))
 
-        fig, ax = plt.subplots(figsize=(12, 6))
+        fig, ax = figures.subplots(figsize=(12, 6))
         ax.plot(line_data['Date'], line_data['Monthly Measurements'], label=f"{material} Measurements", marker='o')
         ax.set_xlabel('Date')
         ax.set_ylabel(f"Monthly {material} ({unit})")
         ax.set_title(f"{material} Trends in {county}, {state} Over Time")
         ax.legend()
-        st.pyplot(fig)
+        figures.show(fig)
 
     st.info("Tip: Use the graph type selector to compare yearly trends or monthly distributions.")
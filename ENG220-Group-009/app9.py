@@ -4,6 +4,9 @@ import plotly.express as px
 import plotly.graph_objects as go
 import os
 
+from eng220 import data, plotly_spec, static_charts
+from eng220.data import load_csv
+
 # Title of the app
 st.title("Group-009")
 
@@ -25,9 +28,9 @@ try:
     summary_csv = os.path.join(current_dir, 'weapon_arrests_summary.csv')
     averages_csv = os.path.join(current_dir, 'weapon_arrests_monthly_averages.csv')
 
-    monthly_data = pd.read_csv(monthly_csv)
-    summary_data = pd.read_csv(summary_csv)
-    monthly_averages = pd.read_csv(averages_csv)
+    monthly_data = load_csv(monthly_csv)
+    summary_data = load_csv(summary_csv)
+    monthly_averages = load_csv(averages_csv)
 
     # Year range selection
     st.markdown("### 📆 Select Year Range")
@@ -39,6 +42,9 @@ try:
         (monthly_data['Year'] <= year_range[1])
     ]
 
+    # Charts are built and compacted once per file version and range
+    chart_key = (data.fingerprint(monthly_csv), year_range)
+
     col1, col2, col3, col4 = st.columns(4)
     with col1:
         st.metric("Total Arrests", f"{filtered_data['Arrests'].sum():,.0f}")
@@ -60,41 +66,49 @@ try:
 
     with tab1:
         st.subheader("Monthly Arrest Trends")
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=filtered_data['Year_Month'], y=filtered_data['Arrests'],
-                                 name='Monthly Arrests', mode='lines+markers', line=dict(color='#1f77b4')))
-        fig.add_trace(go.Scatter(x=filtered_data['Year_Month'], y=filtered_data['3_Month_Avg'],
-                                 name='3-Month Avg', line=dict(color='#ff7f0e', dash='dash')))
-        fig.add_trace(go.Scatter(x=filtered_data['Year_Month'], y=filtered_data['12_Month_Avg'],
-                                 name='12-Month Avg', line=dict(color='#2ca02c', dash='dash')))
-        fig.update_layout(title='Monthly Arrests with Moving Averages', xaxis_title='Date',
-                          yaxis_title='Number of Arrests', hovermode='x unified')
-        st.plotly_chart(fig, use_container_width=True)
+
+        def monthly_trends():
+            fig = go.Figure()
+            fig.add_trace(go.Scatter(x=filtered_data['Year_Month'], y=filtered_data['Arrests'],
+                                     name='Monthly Arrests', mode='lines+markers', line=dict(color='#1f77b4')))
+            fig.add_trace(go.Scatter(x=filtered_data['Year_Month'], y=filtered_data['3_Month_Avg'],
+                                     name='3-Month Avg', line=dict(color='#ff7f0e', dash='dash')))
+            fig.add_trace(go.Scatter(x=filtered_data['Year_Month'], y=filtered_data['12_Month_Avg'],
+                                     name='12-Month Avg', line=dict(color='#2ca02c', dash='dash')))
+            fig.update_layout(title='Monthly Arrests with Moving Averages', xaxis_title='Date',
+                              yaxis_title='Number of Arrests', hovermode='x unified')
+            return fig
+        st.plotly_chart(plotly_spec.cached(("group009_monthly_trends", *chart_key), monthly_trends),
+                        use_container_width=True)
 
     with tab2:
         st.subheader("Year-over-Year Comparison")
-        yearly_comparison = filtered_data.pivot(index='Month', columns='Year', values='Arrests')
-        fig = px.line(yearly_comparison, title='Year-over-Year Comparison by Month',
-                      labels={'value': 'Number of Arrests', 'Month': 'Month'})
-        fig.update_layout(hovermode='x unified')
-        st.plotly_chart(fig, use_container_width=True)
 
-        yoy_pivot = filtered_data.pivot(index='Year', columns='Month', values='YoY_Change')
-        fig_heatmap = px.imshow(yoy_pivot, title='Year-over-Year Change Heatmap (%)',
-                                color_continuous_scale='RdYlBu', aspect='auto')
-        st.plotly_chart(fig_heatmap, use_container_width=True)
+        def yearly_comparison():
+            yearly_comparison = filtered_data.pivot(index='Month', columns='Year', values='Arrests')
+            fig = px.line(yearly_comparison, title='Year-over-Year Comparison by Month',
+                          labels={'value': 'Number of Arrests', 'Month': 'Month'})
+            fig.update_layout(hovermode='x unified')
+            return fig
+        st.plotly_chart(plotly_spec.cached(("group009_yearly_comparison", *chart_key), yearly_comparison),
+                        use_container_width=True)
+
+        def yoy_heatmap():
+            yoy_pivot = filtered_data.pivot(index='Year', columns='Month', values='YoY_Change')
+            return px.imshow(yoy_pivot, title='Year-over-Year Change Heatmap (%)',
+                             color_continuous_scale='RdYlBu', aspect='auto')
+        st.plotly_chart(plotly_spec.cached(("group009_yoy_heatmap", *chart_key), yoy_heatmap),
+                        use_container_width=True)
 
     with tab3:
         st.subheader("Seasonal Patterns")
-        fig = px.bar(monthly_averages, x='Month', y='Average_Arrests', error_y='Std_Dev',
-                     title='Average Monthly Arrests (All Years)',
-                     labels={'Average_Arrests': 'Average Number of Arrests'})
-        fig.update_layout(xaxis_title='Month', yaxis_title='Average Arrests')
-        st.plotly_chart(fig, use_container_width=True)
+        # All years, independent of the range selection: pre-rendered
+        static_charts.show("group009_seasonal_averages")
 
-        fig = px.box(filtered_data, x='Month', y='Arrests',
-                     title='Monthly Distribution of Arrests',
-                     labels={'Arrests': 'Number of Arrests'})
+        fig = plotly_spec.cached(("group009_monthly_distribution", *chart_key), lambda: px.box(
+            filtered_data, x='Month', y='Arrests',
+            title='Monthly Distribution of Arrests',
+            labels={'Arrests': 'Number of Arrests'}))
         st.plotly_chart(fig, use_container_width=True)
 
     with tab4:
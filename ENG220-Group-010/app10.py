@@ -2,9 +2,10 @@
 # Group 010 - Gun Violence Data Dashboard
 
 import streamlit as st
-import pandas as pd
 import os
 
+from eng220 import offload
+
 # Title
 st.title("Group-010")
 
@@ -25,28 +26,18 @@ The app presents insights into trends across **time, gender, geography, and comm
 ---
 """)
 
-# Load large CSV from GitHub
-@st.cache_data
-def read_large_csv():
-    file_url = "https://raw.githubusercontent.com/BlassMolina03/ENG-220-MATLAB-PROJECTS/main/Data%20Sheet%201.csv"
-    try:
-        chunk_size = 1000
-        chunks = pd.read_csv(file_url, encoding="ISO-8859-1", sep=",", on_bad_lines="skip", chunksize=chunk_size)
-        df = pd.concat([chunk for chunk in chunks], ignore_index=True)
-        return df.dropna()
-    except Exception as e:
-        st.error(f"Error loading data: {e}")
-        return None
-
-# Read and prepare data
-df = read_large_csv()
-
-if df is not None:
-    # Clean and preprocess
-    df['Incident Date'] = pd.to_datetime(df['Incident Date'], errors='coerce')
-    df.dropna(subset=['Incident Date'], inplace=True)
-    df['day_of_week'] = df['Incident Date'].dt.day_name()
+# Large CSV from GitHub, downloaded, cleaned and counted in a worker process
+DATA_URL = "https://raw.githubusercontent.com/BlassMolina03/ENG-220-MATLAB-PROJECTS/main/Data%20Sheet%201.csv"
+
+try:
+    results = offload.result(offload.submit("group010_incidents", DATA_URL), "Loading incident data...")
+except Exception as e:
+    st.error(f"Error loading data: {e}")
+    results = None
+    st.error("Data could not be loaded from the source.")
 
+if results is not None:
+    df = results["incidents"]
     st.subheader("Cleaned Data Preview")
     st.dataframe(df)
 
@@ -55,12 +46,11 @@ if df is not None:
         "Monthly Increase", "Gender Analysis", "Incidents by City or County", "Incidents by Date"
     ])
 
-    # Prepare analysis columns
-    df['month_year'] = df['Incident Date'].dt.to_period('M')
-    monthly_counts = df['month_year'].value_counts().sort_index()
-    gender_counts = df['Participant Gender'].value_counts()
-    city_or_county_counts = df['City Or County'].value_counts()
-    date_counts = df['Incident Date'].dt.date.value_counts().sort_index()
+    # Analysis counts
+    monthly_counts = results["monthly"]
+    gender_counts = results["gender"]
+    city_or_county_counts = results["city_or_county"]
+    date_counts = results["date"]
 
     # Render chart
     if graph_choice == "Monthly Increase":
@@ -82,6 +72,3 @@ if df is not None:
         st.subheader("Incidents by Date")
         st.line_chart(date_counts)
         st.caption("This chart shows the daily incident distribution over time.")
-
-else:
-    st.error("Data could not be loaded from the source.")
@@ -1,8 +1,9 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
 import os
 
+from eng220 import categories, figures
+from eng220.data import load_csv
+
 # Title
 st.title("Group-011")
 
@@ -33,13 +34,17 @@ graph_type = st.selectbox(
 # Set current directory for file access
 current_dir = os.path.dirname(__file__)
 
+# Bars combine the rows of each category: rates are averaged, counts added up
+def combine_by(column):
+    return "mean" if "per 100,000" in column else "sum"
+
 # Graph 1
 if graph_type == "Graph 1: Firearm Injury Death by Year (New Mexico and U.S.)":
     st.subheader("Firearm Injury Death by Year")
     file_path = os.path.join(current_dir, 'Firearm Injury Death by Year, New Mexico and U.S.csv')
 
     try:
-        data = pd.read_csv(file_path)
+        data = load_csv(file_path)
         st.dataframe(data)
 
         y_column = st.selectbox("Select Y-axis column", [
@@ -49,13 +54,15 @@ if graph_type == "Graph 1: Firearm Injury Death by Year (New Mexico and U.S.)":
         ])
 
         if st.button("Plot Graph"):
-            fig, ax = plt.subplots()
-            ax.bar(data["Year"], data[y_column])
+            fig, ax = figures.subplots()
+            # One bar per year, in order
+            totals = categories.aggregate(data["Year"], data[y_column], combine_by(y_column), top=None)
+            ax.bar(totals.index, totals.values)
             ax.set_title(f"{y_column} by Year")
             ax.set_xlabel("Year")
             ax.set_ylabel(y_column)
-            plt.xticks(rotation=45)
-            st.pyplot(fig)
+            ax.tick_params(axis="x", labelrotation=45)
+            figures.show(fig)
 
     except FileNotFoundError:
         st.error("CSV file not found. Please check the filename and location.")
@@ -66,7 +73,7 @@ elif graph_type == "Graph 2: Gun Violence for Counties in New Mexico":
     file_path = os.path.join(current_dir, 'Gun Violence for Counties.csv')
 
     try:
-        data = pd.read_csv(file_path)
+        data = load_csv(file_path)
         st.dataframe(data)
 
         y_column = st.selectbox("Select Y-axis column", [
@@ -76,13 +83,14 @@ elif graph_type == "Graph 2: Gun Violence for Counties in New Mexico":
         ])
 
         if st.button("Plot Graph"):
-            fig, ax = plt.subplots(figsize=(12, 6))
-            ax.bar(data["County"], data[y_column])
+            fig, ax = figures.subplots(figsize=(12, 6))
+            totals = categories.aggregate(data["County"], data[y_column], combine_by(y_column))
+            ax.bar(totals.index, totals.values)
             ax.set_title(f"{y_column} by County")
             ax.set_xlabel("County")
             ax.set_ylabel(y_column)
-            plt.xticks(rotation=90)
-            st.pyplot(fig)
+            ax.tick_params(axis="x", labelrotation=90)
+            figures.show(fig)
 
     except FileNotFoundError:
         st.error("CSV file not found. Please check the filename and location.")
@@ -93,7 +101,7 @@ elif graph_type == "Graph 3: Gun Violence Rates Per Year":
     file_path = os.path.join(current_dir, 'Gun Violence Rates Per Year.csv')
 
     try:
-        data = pd.read_csv(file_path)
+        data = load_csv(file_path)
         st.dataframe(data)
 
         y_column = st.selectbox("Select Y-axis column", [
@@ -103,13 +111,13 @@ elif graph_type == "Graph 3: Gun Violence Rates Per Year":
         ])
 
         if st.button("Plot Graph"):
-            fig, ax = plt.subplots(figsize=(10, 6))
+            fig, ax = figures.subplots(figsize=(10, 6))
             ax.plot(data["Year"], data[y_column], marker='o')
             ax.set_title(f"{y_column} by Year")
             ax.set_xlabel("Year")
             ax.set_ylabel(y_column)
-            plt.xticks(rotation=45)
-            st.pyplot(fig)
+            ax.tick_params(axis="x", labelrotation=45)
+            figures.show(fig)
 
     except FileNotFoundError:
         st.error("CSV file not found. Please check the filename and location.")
@@ -120,7 +128,7 @@ elif graph_type == "Graph 4: Gun Violence for Race and Gender":
     file_path = os.path.join(current_dir, 'Gun Violence For Race and Gender.csv')
 
     try:
-        data = pd.read_csv(file_path)
+        data = load_csv(file_path)
         st.dataframe(data)
 
         sex = st.selectbox("Select Sex", ["Male", "Female", "Both"])
@@ -133,13 +141,14 @@ elif graph_type == "Graph 4: Gun Violence for Race and Gender":
         ])
 
         if st.button("Plot Graph"):
-            fig, ax = plt.subplots(figsize=(10, 6))
-            ax.bar(filtered_data["Race/Ethnicity"], filtered_data[metric])
+            fig, ax = figures.subplots(figsize=(10, 6))
+            totals = categories.aggregate(filtered_data["Race/Ethnicity"], filtered_data[metric], combine_by(metric))
+            ax.bar(totals.index, totals.values)
             ax.set_title(f"{metric} by Race/Ethnicity ({sex})")
             ax.set_xlabel("Race/Ethnicity")
             ax.set_ylabel(metric)
-            plt.xticks(rotation=45)
-            st.pyplot(fig)
+            ax.tick_params(axis="x", labelrotation=45)
+            figures.show(fig)
 
     except FileNotFoundError:
         st.error("CSV file not found. Please check the filename and location.")
@@ -150,7 +159,7 @@ elif graph_type == "Graph 5: Gun Violence for Age and Gender":
     file_path = os.path.join(current_dir, 'Gun Violence For Age And Gender.csv')
 
     try:
-        data = pd.read_csv(file_path)
+        data = load_csv(file_path)
         st.dataframe(data)
 
         sex = st.selectbox("Select Sex", ["Male", "Female", "Both"])
@@ -163,13 +172,14 @@ elif graph_type == "Graph 5: Gun Violence for Age and Gender":
         ])
 
         if st.button("Plot Graph"):
-            fig, ax = plt.subplots(figsize=(10, 6))
-            ax.bar(filtered_data["Age Group"], filtered_data[metric])
+            fig, ax = figures.subplots(figsize=(10, 6))
+            totals = categories.aggregate(filtered_data["Age Group"], filtered_data[metric], combine_by(metric))
+            ax.bar(totals.index, totals.values)
             ax.set_title(f"{metric} by Age Group ({sex})")
             ax.set_xlabel("Age Group")
             ax.set_ylabel(metric)
-            plt.xticks(rotation=45)
-            st.pyplot(fig)
+            ax.tick_params(axis="x", labelrotation=45)
+            figures.show(fig)
 
     except FileNotFoundError:
         st.error("CSV file not found. Please check the filename and location.")
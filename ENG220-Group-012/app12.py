@@ -1,8 +1,9 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
 import os
 
+from eng220 import categories, density, figures, tables
+from eng220.data import load_csv
+
 # Set current directory
 current_dir = os.path.dirname(__file__)
 file_path = os.path.join(current_dir, 'gunarchieve_cleaned_team12.csv')
@@ -21,58 +22,65 @@ Users can explore variables such as **incident dates**, **locations**, **victim
 
 # Load the CSV data
 try:
-    data = pd.read_csv(file_path)
+    data = load_csv(file_path)
 except FileNotFoundError:
     st.error("CSV file not found. Please ensure the file is placed correctly.")
     data = None
 
 if data is not None:
     st.write("### Data Preview")
-    st.dataframe(data)
-
-    # Dropdowns for X and Y axis selection
-    columns = data.columns.tolist()
-    x_column = st.selectbox("Select X-axis column", columns)
-    y_column = st.selectbox("Select Y-axis column", columns)
-
-    # Dropdown for graph type
-    graph_type = st.selectbox("Select Graph Type", ["Line", "Scatter", "Bar", "Pie"])
-
-    # Plot the graph
-    if st.button("Plot Graph"):
-        fig, ax = plt.subplots()
-
-        if graph_type == "Line":
-            ax.plot(data[x_column], data[y_column], marker='o')
-            ax.set_title(f"{y_column} vs {x_column} (Line Plot)")
-
-        elif graph_type == "Scatter":
-            ax.scatter(data[x_column], data[y_column])
-            ax.set_title(f"{y_column} vs {x_column} (Scatter Plot)")
-
-        elif graph_type == "Bar":
-            ax.bar(data[x_column], data[y_column])
-            ax.set_title(f"{y_column} vs {x_column} (Bar Chart)")
-
-        elif graph_type == "Pie":
-            # Limit to 10 unique categories for readability
-            if len(data[x_column].unique()) <= 10:
-                plt.pie(
-                    data[y_column],
-                    labels=data[x_column],
-                    autopct='%1.1f%%',
-                    startangle=90,
-                )
-                plt.title(f"{y_column} (Pie Chart)")
-            else:
-                st.error("Pie chart requires 10 or fewer unique X values.")
-
-        if graph_type != "Pie":
-            ax.set_xlabel(x_column)
-            ax.set_ylabel(y_column)
-            st.pyplot(fig)
-        else:
-            st.pyplot(plt)
+    tables.show(data, file_path)
+
+    # Chart controls rerun only this section, not the data preview above
+    @st.fragment
+    def chart_section(data):
+        # Dropdowns for X and Y axis selection
+        columns = data.columns.tolist()
+        x_column = st.selectbox("Select X-axis column", columns)
+        y_column = st.selectbox("Select Y-axis column", columns)
+
+        # Dropdown for graph type
+        graph_type = st.selectbox("Select Graph Type", ["Line", "Scatter", "Bar", "Pie"])
+        # Bars and pie slices combine the rows that share an X value
+        how = st.selectbox("Combine Y values by", categories.METHODS) if graph_type in ("Bar", "Pie") else None
+
+        # Plot the graph
+        if st.button("Plot Graph"):
+            fig, ax = figures.subplots()
+
+            if graph_type == "Line":
+                ax.plot(data[x_column], data[y_column], marker='o')
+                ax.set_title(f"{y_column} vs {x_column} (Line Plot)")
+
+            elif graph_type == "Scatter":
+                density.scatter(ax, data[x_column], data[y_column])
+                ax.set_title(f"{y_column} vs {x_column} (Scatter Plot)")
+
+            elif graph_type == "Bar":
+                totals = categories.aggregate(data[x_column], data[y_column], how)
+                ax.bar(totals.index, totals.values)
+                ax.set_title(f"{y_column} vs {x_column} (Bar Chart)")
+
+            elif graph_type == "Pie":
+                # The largest slices plus one "Other" slice, so any X column fits
+                totals = categories.aggregate(data[x_column], data[y_column], how, top=categories.PIE_TOP_K)
+                if (totals >= 0).all():
+                    ax.pie(totals, labels=totals.index, autopct='%1.1f%%', startangle=90)
+                    ax.set_title(f"{y_column} (Pie Chart)")
+                else:
+                    st.error("Pie chart requires non-negative Y values.")
+                    # Nothing drawn; no empty chart under the error
+                    figures.release(fig)
+                    fig = None
+
+            if graph_type != "Pie":
+                ax.set_xlabel(x_column)
+                ax.set_ylabel(y_column)
+                figures.show(fig)
+            elif fig is not None:
+                figures.show(fig)
+
+    chart_section(data)
 
     st.write("Tip: Ensure selected columns contain numeric data for better visualization.")
 else:
@@ -1,8 +1,10 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
 import os
 
+from eng220 import figures, tables
+from eng220.data import load_csv
+
 # Set current directory and file path
 current_dir = os.path.dirname(__file__)
 file_path = os.path.join(current_dir, 'CleanedMHData(Sheet1) (1).csv')
@@ -21,7 +23,7 @@ Users can explore the trends using **Line Graphs**, **Scatter Plots**, **Bar Cha
 
 # Load and clean data
 try:
-    data = pd.read_csv(file_path)
+    data = load_csv(file_path)
     data.columns = data.columns.str.strip().str.lower()  # Clean column names
 except FileNotFoundError:
     st.error("CSV file not found. Please ensure the file is correctly placed.")
@@ -29,7 +31,7 @@ except FileNotFoundError:
 
 if data is not None:
     st.write("### Data Preview")
-    st.dataframe(data)
+    tables.show(data, file_path)
 
     # Select State
     if 'state' in data.columns:
@@ -55,7 +57,7 @@ if data is not None:
 
                 # Plot graph
                 if st.button("Plot Graph"):
-                    fig, ax = plt.subplots()
+                    fig, ax = figures.subplots()
 
                     if graph_type == "Line":
                         for year in sorted(state_data['year'].unique()):
@@ -95,9 +97,9 @@ if data is not None:
                         ax.set_xlabel("Total Number of Survey Respondents")
                         ax.set_ylabel("Percentage With Mental Distress")
                         ax.legend(title="Year")
-                        st.pyplot(fig)
+                        figures.show(fig)
                     else:
-                        st.pyplot(fig)
+                        figures.show(fig)
 
 else:
     st.warning("Failed to load the dataset.")
@@ -1,9 +1,10 @@
 
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
 import os
 
+from eng220 import categories, density, figures, tables
+from eng220.data import load_csv
+
 # Set up file path using os
 current_dir = os.path.dirname(__file__)
 file_path = os.path.join(current_dir, 'Suicide Deaths by County, New Mexico, 2016-2020.csv')
@@ -25,54 +26,59 @@ This analysis aims to support targeted **suicide prevention** strategies and mor
 
 # Load CSV
 try:
-    data = pd.read_csv(file_path)
+    data = load_csv(file_path)
 except FileNotFoundError:
     st.error("The file was not found. Please ensure it is in the correct folder.")
     data = None
 
 if data is not None:
     st.write("### Data Preview")
-    st.dataframe(data)
-
-    columns = data.columns.tolist()
-    x_column = st.selectbox("Select X-axis column", columns)
-    y_column = st.selectbox("Select Y-axis column", columns)
-
-    graph_type = st.selectbox("Select Graph Type", ["Line", "Scatter", "Bar", "Pie"])
-
-    if st.button("Plot Graph"):
-        fig, ax = plt.subplots()
-
-        if graph_type == "Line":
-            ax.plot(data[x_column], data[y_column], marker='o')
-            ax.set_title(f"{y_column} vs {x_column} (Line Plot)")
-
-        elif graph_type == "Scatter":
-            ax.scatter(data[x_column], data[y_column])
-            ax.set_title(f"{y_column} vs {x_column} (Scatter Plot)")
-
-        elif graph_type == "Bar":
-            ax.bar(data[x_column], data[y_column])
-            ax.set_title(f"{y_column} vs {x_column} (Bar Chart)")
-
-        elif graph_type == "Pie":
-            if len(data[x_column].unique()) <= 10:
-                plt.pie(
-                    data[y_column],
-                    labels=data[x_column],
-                    autopct='%1.1f%%',
-                    startangle=90
-                )
-                plt.title(f"{y_column} (Pie Chart)")
+    tables.show(data, file_path)
+
+    # Chart controls rerun only this section, not the data preview above
+    @st.fragment
+    def chart_section(data):
+        columns = data.columns.tolist()
+        x_column = st.selectbox("Select X-axis column", columns)
+        y_column = st.selectbox("Select Y-axis column", columns)
+
+        graph_type = st.selectbox("Select Graph Type", ["Line", "Scatter", "Bar", "Pie"])
+        # Bars and pie slices combine the rows that share an X value
+        how = st.selectbox("Combine Y values by", categories.METHODS) if graph_type in ("Bar", "Pie") else None
+
+        if st.button("Plot Graph"):
+            fig, ax = figures.subplots()
+
+            if graph_type == "Line":
+                ax.plot(data[x_column], data[y_column], marker='o')
+                ax.set_title(f"{y_column} vs {x_column} (Line Plot)")
+
+            elif graph_type == "Scatter":
+                density.scatter(ax, data[x_column], data[y_column])
+                ax.set_title(f"{y_column} vs {x_column} (Scatter Plot)")
+
+            elif graph_type == "Bar":
+                totals = categories.aggregate(data[x_column], data[y_column], how)
+                ax.bar(totals.index, totals.values)
+                ax.set_title(f"{y_column} vs {x_column} (Bar Chart)")
+
+            elif graph_type == "Pie":
+                # The largest slices plus one "Other" slice, so any X column fits
+                totals = categories.aggregate(data[x_column], data[y_column], how, top=categories.PIE_TOP_K)
+                if (totals >= 0).all():
+                    ax.pie(totals, labels=totals.index, autopct='%1.1f%%', startangle=90)
+                    ax.set_title(f"{y_column} (Pie Chart)")
+                else:
+                    st.error("Pie chart requires non-negative Y values.")
+
+            if graph_type != "Pie":
+                ax.set_xlabel(x_column)
+                ax.set_ylabel(y_column)
+                figures.show(fig)
             else:
-                st.error("Too many categories for a pie chart. Try a different graph type.")
-
-        if graph_type != "Pie":
-            ax.set_xlabel(x_column)
-            ax.set_ylabel(y_column)
-            st.pyplot(fig)
-        else:
-            st.pyplot(plt)
+                figures.show(fig)
+
+    chart_section(data)
 
     st.write("Tip: Ensure the selected columns are numeric for meaningful plots.")
 else:
@@ -3,8 +3,11 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 import seaborn as sns
-import matplotlib.pyplot as plt
 import os
+import tempfile
+
+from eng220 import data, figures, manifest, offload, plotly_spec, reduction
+from eng220.data import load_csv as load_shared_csv
 
 
 #st.title("Group-017")
@@ -20,7 +23,7 @@ def load_csv(filename):
     try:
         data_dir = os.path.dirname(__file__)
         filepath = os.path.join(data_dir, "datasets", filename)
-        return pd.read_csv(filepath)
+        return load_shared_csv(filepath)
     except Exception as e:
         st.warning(f"⚠️ Could not load {filename}: {e}")
         return pd.DataFrame()
@@ -33,13 +36,15 @@ with tab1:
     st.subheader("Explore AQI Data")
 
     dataset_dir = os.path.join(os.path.dirname(__file__), "datasets")
-    aqi_files = [f for f in os.listdir(dataset_dir) if f.startswith("annual_aqi_by_county_")]
-    aqi_df = pd.concat([load_csv(f) for f in aqi_files], ignore_index=True) if aqi_files else pd.DataFrame()
-
-    if not aqi_df.empty:
-        aqi_df["Year"] = pd.to_numeric(aqi_df["Year"], errors="coerce")
-        aqi_df.dropna(subset=["Year", "State", "County"], inplace=True)
+    aqi_paths = list(manifest.partitions(dataset_dir, "annual_aqi_by_county_{year}.csv").values())
+    aqi_df = pd.DataFrame()
+    if aqi_paths:
+        try:
+            aqi_df = offload.result(offload.submit("group017_aqi", aqi_paths), "Combining the AQI files...")
+        except Exception as e:
+            st.warning(f"⚠️ Could not load the AQI files: {e}")
 
+    if aqi_df is not None and not aqi_df.empty:
         st.markdown("#### Filter Options")
         col1, col2, col3 = st.columns(3)
         with col1:
@@ -63,13 +68,15 @@ with tab1:
         st.markdown("#### AQI Visualization")
         if "Median AQI" in filtered.columns and filtered["Median AQI"].dropna().shape[0] > 0:
             try:
-                fig = px.line(
+                # One trace per county: built and compacted once per file version and filter
+                key = ("group017_median_aqi", tuple(data.fingerprint(p) for p in aqi_paths), state, county, tuple(years))
+                fig = plotly_spec.cached(key, lambda: px.line(
                     filtered.dropna(subset=["Median AQI"]),
                     x="Year",
                     y="Median AQI",
                     color="County",
                     title="Median AQI Over Years"
-                )
+                ))
                 st.plotly_chart(fig, use_container_width=True)
             except Exception as e:
                 st.error(f"Error plotting AQI line chart: {e}")
@@ -79,16 +86,20 @@ with tab1:
 # ========== Tab 2: Weather Data ==========
 with tab2:
     st.subheader("Explore Weather Data")
-    weather_df = load_csv("weather_data.csv")
-
-    if not weather_df.empty:
+    weather_path = os.path.join(dataset_dir, "weather_data.csv")
+    if manifest.entry(weather_path):
         try:
-            weather_df["Date_Time"] = pd.to_datetime(weather_df["Date_Time"], errors="coerce")
-            weather_df["Year"] = weather_df["Date_Time"].dt.year
-            for col in ["Temperature_C", "Humidity_pct", "Precipitation_mm", "Wind_Speed_kmh"]:
-                if col in weather_df.columns:
-                    weather_df[col] = pd.to_numeric(weather_df[col], errors="coerce")
+            weather_df = offload.result(offload.submit("group017_weather", weather_path), "Parsing weather timestamps...")
+        except Exception as e:
+            st.warning(f"⚠️ Could not load weather_data.csv: {e}")
+            weather_df = pd.DataFrame()
+    else:
+        weather_df = load_csv("weather_data.csv")
 
+    if weather_df is None:
+        pass
+    elif not weather_df.empty:
+        try:
             st.markdown("#### Filter Options")
             col1, col2 = st.columns(2)
             with col1:
@@ -108,12 +119,13 @@ with tab2:
             if not filtered.empty and "Temperature_C" in filtered.columns:
                 st.markdown("#### Temperature Over Time")
                 try:
-                    fig = px.line(
+                    key = ("group017_temperature", data.fingerprint(weather_path), location, tuple(w_years))
+                    fig = plotly_spec.cached(key, lambda: px.line(
                         filtered.sort_values("Date_Time"),
                         x="Date_Time",
                         y="Temperature_C",
                         title="Temperature Over Time"
-                    )
+                    ))
                     st.plotly_chart(fig, use_container_width=True)
                 except Exception as e:
                     st.error(f"Error generating temperature plot: {e}")
@@ -126,18 +138,19 @@ with tab2:
 with tab3:
     st.subheader("Correlation Analysis Between AQI and Weather")
 
-    if 'aqi_df' in locals() and not aqi_df.empty and 'weather_df' in locals() and not weather_df.empty:
+    if aqi_df is None or weather_df is None:
+        st.info("Waiting for the AQI and weather data...")
+    elif not aqi_df.empty and not weather_df.empty:
         try:
-            aqi_avg = aqi_df.groupby("Year").mean(numeric_only=True).reset_index()
-            weather_avg = weather_df.groupby("Year").mean(numeric_only=True).reset_index()
-            combined = pd.merge(aqi_avg, weather_avg, on="Year", suffixes=("_aqi", "_weather"))
-
-            if not combined.empty:
+            corr = offload.result(offload.submit("group017_correlation", aqi_paths, weather_path),
+                                  "Correlating yearly averages...")
+            if corr is None:
+                pass
+            elif not corr.empty:
                 st.markdown("#### Correlation Heatmap")
-                corr = combined.corr()
-                fig, ax = plt.subplots(figsize=(10, 6))
+                fig, ax = figures.subplots(figsize=(10, 6))
                 sns.heatmap(corr, annot=True, cmap="coolwarm", fmt=".2f", ax=ax)
-                st.pyplot(fig)
+                figures.show(fig)
             else:
                 st.warning("No matching years between AQI and Weather data for correlation.")
         except Exception as e:
@@ -152,18 +165,41 @@ with tab4:
     uploaded = st.file_uploader("Upload large weather_data.csv file", type=["csv"])
     if uploaded is not None:
         try:
-            df_large = pd.read_csv(uploaded)
-            st.write(f"Original size: {df_large.shape}")
-
-            columns_to_drop = st.multiselect("Drop Columns", options=df_large.columns.tolist())
-            frac = st.slider("Fraction to keep", 0.01, 1.0, 0.3, step=0.01)
+            # Only the header is parsed here; rows are streamed when reducing
+            header = reduction.read_header(uploaded)
+            st.write(f"Columns: {len(header)}")
+
+            columns_to_drop = st.multiselect("Drop Columns", options=header)
+            method = st.radio("Sampling Method", reduction.METHODS, horizontal=True)
+
+            frac, size, strata = 0.3, 10_000, []
+            if method == reduction.BERNOULLI:
+                frac = st.slider("Fraction to keep", 0.01, 1.0, 0.3, step=0.01)
+            elif method == reduction.RESERVOIR:
+                size = st.number_input("Rows to keep", min_value=1, value=10_000, step=1_000)
+            else:
+                strata_choices = reduction.strata_options(header)
+                strata = st.multiselect("Stratify by", strata_choices, default=strata_choices)
+                size = st.number_input("Rows to keep per stratum", min_value=1, value=1_000, step=100)
 
             if st.button("Reduce and Download"):
-                if columns_to_drop:
-                    df_large.drop(columns=columns_to_drop, inplace=True)
-                df_reduced = df_large.sample(frac=frac, random_state=42)
-                st.write(f"Reduced size: {df_reduced.shape}")
-                csv = df_reduced.to_csv(index=False)
-                st.download_button("Download Reduced CSV", data=csv, file_name="weather_reduced.csv", mime="text/csv")
+                if method == reduction.STRATIFIED and not strata:
+                    st.error("Select at least one column to stratify by.")
+                    st.stop()
+                out = tempfile.NamedTemporaryFile("w", suffix=".csv", newline="", delete=False)
+                try:
+                    with out:
+                        stats = reduction.reduce_csv(
+                            uploaded, out, method,
+                            drop_columns=columns_to_drop, frac=frac, size=size, by=strata,
+                        )
+                    kept_columns = len(header) - len(columns_to_drop)
+                    st.write(f"Original size: ({stats['rows_in']}, {len(header)})")
+                    st.write(f"Reduced size: ({stats['rows_out']}, {kept_columns})")
+                    with open(out.name, "rb") as reduced:
+                        st.download_button("Download Reduced CSV", data=reduced, file_name="weather_reduced.csv", mime="text/csv")
+                finally:
+                    # Also when the reduction fails or the run is stopped
+                    os.remove(out.name)
         except Exception as e:
             st.error(f"Error during data reduction: {e}")
@@ -1,8 +1,10 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
 import os
 
+from eng220 import figures, manifest, offload, static_charts, tables
+from eng220.data import load_csv as load_shared_csv
+
 
 #st.title("Group-018")
 
@@ -13,30 +15,31 @@ Datasets were collected from EPA, CDC, and other government sources.
 """)
 
 # === Utility functions ===
+def dataset_path(folder, filename):
+    return os.path.join(os.path.dirname(__file__), "datasets", folder, filename)
+
 def load_csv(folder, filename):
-    base_dir = os.path.dirname(__file__)
-    path = os.path.join(base_dir, "datasets", folder, filename)
-    return pd.read_csv(path)
+    return load_shared_csv(dataset_path(folder, filename))
 
 def load_city_data():
     base_dir = os.path.dirname(__file__)
     path = os.path.join(base_dir, "datasets", "airqualitybycity2000-2023.csv")
-    df = pd.read_csv(path)
-    df['CBSA'].fillna(method='ffill', inplace=True)
-    df['Core Based Statistical Area'].fillna(method='ffill', inplace=True)
+    df = load_shared_csv(path)
+    df['CBSA'] = df['CBSA'].ffill()
+    df['Core Based Statistical Area'] = df['Core Based Statistical Area'].ffill()
     return df.dropna(subset=['Pollutant', 'Trend Statistic'])
 
 def load_multiple_csvs(prefix, start, end):
     base_dir = os.path.dirname(__file__)
-    dfs = []
-    for year in range(start, end + 1):
-        path = os.path.join(base_dir, "datasets", "county_datasets", f"{prefix}{year}.csv")
-        if os.path.exists(path):
-            df = pd.read_csv(path)
-            df['Year'] = year
-            df.replace('.', pd.NA, inplace=True)
-            dfs.append(df)
-    return pd.concat(dfs, ignore_index=True) if dfs else pd.DataFrame()
+    # The yearly reports present, from the dataset manifest
+    reports = manifest.partitions(os.path.join(base_dir, "datasets", "county_datasets"), f"{prefix}{{year}}.csv")
+    years = [year for year in reports if start <= year <= end]
+    paths = [reports[year] for year in years]
+    if not paths:
+        return pd.DataFrame()
+    # Stacking the 24 yearly reports runs in a worker process; None until it is done
+    job = offload.submit("group018_county_reports", paths, years)
+    return offload.result(job, "Combining the yearly county reports...")
 
 def load_national_pollutant(pollutant_name):
     filenames = {
@@ -55,7 +58,6 @@ def load_national_pollutant(pollutant_name):
 
 # === Load datasets ===
 city_data = load_city_data()
-county_data = load_multiple_csvs("conreport", 2000, 2023)
 
 # === Tabs ===
 tabs = st.tabs(["City Trends", "County Trends", "National Trends", "Applications", "Awards", "EPA Budget"])
@@ -70,7 +72,7 @@ with tabs[0]:
 
     st.write(f"Pollutant trends for {selected_city}:")
     years = [str(y) for y in range(2000, 2024)]
-    fig, ax = plt.subplots(figsize=(12, 6))
+    fig, ax = figures.subplots(figsize=(12, 6))
     for _, row in city_filtered.iterrows():
         yvals = pd.to_numeric(row[4:], errors='coerce').fillna(0)
         ax.plot(years, yvals, label=f"{row['Pollutant']} ({row['Trend Statistic']})")
@@ -79,25 +81,26 @@ with tabs[0]:
     ax.set_title(f"Pollutant Trends in {selected_city}")
     ax.legend()
     ax.grid(True)
-    st.pyplot(fig)
+    figures.show(fig)
 
 # --- Tab 2: County Trends ---
 with tabs[1]:
     st.subheader("County Air Quality Trends (2000–2023)")
-    if not county_data.empty:
+    county_data = load_multiple_csvs("conreport", 2000, 2023)
+    if county_data is not None and not county_data.empty:
         county = st.selectbox("Select a County", sorted(county_data['County'].dropna().unique()))
         pollutant = st.selectbox("Select a Pollutant", [col for col in county_data.columns if col not in ['County', 'County Code', 'Year']])
         df = county_data[county_data['County'] == county][['Year', pollutant]].dropna()
         if df.empty:
             st.warning("Not enough data for this selection.")
         else:
-            fig, ax = plt.subplots(figsize=(10, 5))
+            fig, ax = figures.subplots(figsize=(10, 5))
             ax.plot(df['Year'], df[pollutant], marker='o')
             ax.set_title(f"{pollutant} in {county}")
             ax.set_xlabel("Year")
             ax.set_ylabel(pollutant)
             ax.grid(True)
-            st.pyplot(fig)
+            figures.show(fig)
             st.dataframe(df.set_index("Year"))
 
 # --- Tab 3: National Trends ---
@@ -106,7 +109,7 @@ with tabs[2]:
     selected_pollutant = st.selectbox("Choose Pollutant", ["CO", "NO2", "O3", "PM10", "PM25", "SO2"])
     national_df = load_national_pollutant(selected_pollutant)
     if not national_df.empty:
-        fig, ax = plt.subplots(figsize=(10, 6))
+        fig, ax = figures.subplots(figsize=(10, 6))
         ax.plot(national_df['Year'], national_df['Mean'], label="Mean", marker='o')
         ax.plot(national_df['Year'], national_df['10th Percentile'], label="10th Percentile", marker='x')
         ax.plot(national_df['Year'], national_df['90th Percentile'], label="90th Percentile", marker='s')
@@ -115,7 +118,7 @@ with tabs[2]:
         ax.set_title(f"National Trend of {selected_pollutant}")
         ax.legend()
         ax.grid(True)
-        st.pyplot(fig)
+        figures.show(fig)
         st.dataframe(national_df)
 
 # --- Tab 4: Applications ---
@@ -123,7 +126,7 @@ with tabs[3]:
     st.subheader("Air Quality Applications (2024)")
     df = load_csv("finance", "airqualityapplications2024.csv")
     df['Proposed EPA Funding'] = df['Proposed EPA Funding'].replace('[\$,]', '', regex=True).astype(float)
-    st.dataframe(df)
+    tables.show(df, dataset_path("finance", "airqualityapplications2024.csv"))
     st.bar_chart(df.groupby("Primary Applicant")['Proposed EPA Funding'].sum())
 
 # --- Tab 5: Awards ---
@@ -131,7 +134,7 @@ with tabs[4]:
     st.subheader("Direct Awards (2022)")
     df = load_csv("finance", "AirQualityDirectAwards2022.csv")
     df['Amount Awarded'] = df['Amount Awarded'].replace('[\$,]', '', regex=True).astype(float)
-    st.dataframe(df)
+    tables.show(df, dataset_path("finance", "AirQualityDirectAwards2022.csv"))
     st.bar_chart(df.groupby("Grant Recipient")['Amount Awarded'].sum())
 
 # --- Tab 6: EPA Budget ---
@@ -139,5 +142,5 @@ with tabs[5]:
     st.subheader("EPA Budget (2000–2023)")
     df = load_csv("finance", "EPAbudget.csv")
     df['Enacted Budget'] = df['Enacted Budget'].replace('[\$,]', '', regex=True).astype(float)
-    st.line_chart(df.set_index("Fiscal Year")[["Enacted Budget", "Workforce"]])
-    st.dataframe(df)
+    static_charts.show("group018_epa_budget")
+    tables.show(df, dataset_path("finance", "EPAbudget.csv"))
@@ -1,9 +1,12 @@
 
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
+import matplotlib
 import os
 
+from eng220 import debounce, figures, static_charts, tables
+from eng220.data import load_csv
+
 # File path for the dataset (for unified dashboard)
 current_dir = os.path.dirname(__file__)
 file_path = os.path.join(current_dir, "..", "data", "aqi_combined_1980_2024.csv")
@@ -11,7 +14,7 @@ file_path = os.path.abspath(file_path)
 
 # Load the dataset
 try:
-    data = pd.read_csv(file_path)
+    data = load_csv(file_path)
 except FileNotFoundError:
     st.error("Dataset not found. Please ensure the file is in the correct path: 'data/aqi_combined_1980_2024.csv'")
     st.stop()
@@ -50,22 +53,21 @@ if selected_cbsa:
 # Display header
 st.title("Air Quality Viewer Dashboard")
 
+# While the year range is being dragged, preview the median AQI instead of every section
+if not debounce.settled("group021_aqi_years", selected_years):
+    median_aqi = debounce.overview(file_path, "AQI_Median", by=["CBSA", "Year"])
+    if selected_cbsa in median_aqi.index.get_level_values(0):
+        debounce.preview(median_aqi.loc[selected_cbsa].loc[selected_years[0]:selected_years[1]])
+    else:
+        debounce.preview(median_aqi.iloc[:0])
+    st.stop()
+
 # Section 1: Overall AQI Trends
 st.subheader("Overall Air Quality Trends (1980–2024)")
 if "AQI_Median" in available_columns:
-    overall_aqi = data.groupby("Year")["AQI_Median"].mean()
-    if not overall_aqi.empty:
-        plt.figure(figsize=(10, 6))
-        overall_aqi.plot(marker='o', color='blue')
-        plt.title("Overall AQI Trends")
-        plt.xlabel("Year")
-        plt.ylabel("Average AQI Median")
-        plt.grid(True)
-        st.pyplot(plt)
-        plt.clf()
-        st.markdown("**Interpretation:** This trend shows changes in air quality over time. A downward slope suggests improvements in air quality.")
-    else:
-        st.warning("No data available for AQI trends.")
+    # Covers every year regardless of the filters, so it is pre-rendered
+    static_charts.show("group021_overall_aqi")
+    st.markdown("**Interpretation:** This trend shows changes in air quality over time. A downward slope suggests improvements in air quality.")
 else:
     st.warning("'AQI_Median' column not found.")
 
@@ -76,16 +78,15 @@ if all(col in available_columns for col in categories):
     category_sums = filtered_data[categories].sum()
     category_sums = pd.to_numeric(category_sums, errors="coerce").fillna(0)
     if not category_sums.empty:
-        plt.figure(figsize=(8, 6))
-        plt.bar(category_sums.index, category_sums.values, color='skyblue')
-        plt.title("AQI Days by Category")
-        plt.xlabel("Category")
-        plt.ylabel("Number of Days")
-        plt.grid(axis="y")
+        fig, ax = figures.subplots(figsize=(8, 6))
+        ax.bar(category_sums.index, category_sums.values, color='skyblue')
+        ax.set_title("AQI Days by Category")
+        ax.set_xlabel("Category")
+        ax.set_ylabel("Number of Days")
+        ax.grid(axis="y")
         for i, val in enumerate(category_sums.values):
-            plt.text(i, val + 1, str(int(val)), ha='center')
-        st.pyplot(plt)
-        plt.clf()
+            ax.text(i, val + 1, str(int(val)), ha='center')
+        figures.show(fig)
         st.markdown("**Interpretation:** Categorization of AQI helps understand the frequency of clean vs unhealthy air days.")
     else:
         st.warning("No category data found.")
@@ -100,13 +101,13 @@ if all(col in available_columns for col in pollutant_columns):
         filtered_data[col] = pd.to_numeric(filtered_data[col], errors="coerce").fillna(0)
     yearly_pollutants = filtered_data.groupby("Year")[pollutant_columns].sum()
     if not yearly_pollutants.empty and yearly_pollutants.sum().sum() > 0:
-        yearly_pollutants.plot(kind="bar", stacked=True, figsize=(10, 6), color=plt.cm.tab10.colors)
-        plt.title("Pollutant Days by Year")
-        plt.xlabel("Year")
-        plt.ylabel("Number of Days")
-        plt.grid(axis="y")
-        st.pyplot(plt)
-        plt.clf()
+        fig, ax = figures.subplots(figsize=(10, 6))
+        yearly_pollutants.plot(kind="bar", stacked=True, ax=ax, color=matplotlib.colormaps["tab10"].colors)
+        ax.set_title("Pollutant Days by Year")
+        ax.set_xlabel("Year")
+        ax.set_ylabel("Number of Days")
+        ax.grid(axis="y")
+        figures.show(fig)
         st.markdown("**Interpretation:** Tracks how often each pollutant exceeded safe levels over the years.")
     else:
         st.warning("No pollutant trend data available.")
@@ -117,19 +118,19 @@ else:
 if all(col in available_columns for col in ["AQI_Maximum", "AQI_90th_Percentile", "AQI_Median"]):
     st.subheader("AQI Statistics Over Time")
     aqi_stats = filtered_data.groupby("Year")[["AQI_Maximum", "AQI_90th_Percentile", "AQI_Median"]].mean()
-    aqi_stats.plot(figsize=(10, 6), marker='o')
-    plt.title("AQI Statistics")
-    plt.xlabel("Year")
-    plt.ylabel("AQI Value")
-    plt.legend(title="Statistic")
-    plt.grid(True)
-    st.pyplot(plt)
-    plt.clf()
+    fig, ax = figures.subplots(figsize=(10, 6))
+    aqi_stats.plot(ax=ax, marker='o')
+    ax.set_title("AQI Statistics")
+    ax.set_xlabel("Year")
+    ax.set_ylabel("AQI Value")
+    ax.legend(title="Statistic")
+    ax.grid(True)
+    figures.show(fig)
     st.markdown("**Interpretation:** Maximum and percentile AQI values reveal peaks and consistent exposure levels.")
 else:
     st.warning("Missing AQI statistics columns.")
 
 # Section 5: Summary Table
 st.subheader("Filtered Dataset Summary")
-st.dataframe(filtered_data)
+tables.show(filtered_data, file_path, selected_years, selected_cbsa)
 st.markdown("**Interpretation:** The table displays detailed metrics for the selected CBSA and year range.")
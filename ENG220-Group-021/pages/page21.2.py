@@ -1,9 +1,11 @@
 
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
 import os
+from functools import partial
+
+from eng220 import debounce, figures, static_charts
+from eng220.data import load_csv
 
 # Set current directory for compatibility with unified dashboard
 current_dir = os.path.dirname(__file__)
@@ -12,8 +14,8 @@ ground_water_path = os.path.abspath(os.path.join(current_dir, "..", "data", "fix
 
 # Load the datasets
 try:
-    snow_depth_data = pd.read_csv(snow_depth_path)
-    ground_water_data = pd.read_csv(ground_water_path)
+    snow_depth_data = load_csv(snow_depth_path)
+    ground_water_data = load_csv(ground_water_path)
 except FileNotFoundError:
     st.error("Dataset not found. Please ensure the files exist in the 'data/' directory.")
     st.stop()
@@ -53,115 +55,99 @@ if selected_site:
 # Display header
 st.title("\U0001F30A Water Resource Dashboard")
 
-# 1. Yearly Snow Depth Trends
-st.subheader("Yearly Snow Depth Trends")
+# While the year range is being dragged, preview the site's snow depth instead of the charts
+if not debounce.settled("group021_water_years", selected_years):
+    snow_depth = debounce.overview(snow_depth_path, "Snow Depth (in)", by=["Site", "Water Year"])
+    if selected_site in snow_depth.index.get_level_values(0):
+        debounce.preview(snow_depth.loc[selected_site].loc[selected_years[0]:selected_years[1]])
+    else:
+        debounce.preview(snow_depth.iloc[:0])
+    st.stop()
+
+# Chart builders for sections 1-3, which are drawn in parallel
+def draw_trend(series, color, title, y_label):
+    fig, ax = figures.subplots(figsize=(10, 6))
+    ax.scatter(series.index, series, color=color, alpha=0.7, edgecolor='k')
+    m, b = np.polyfit(series.index, series, 1)
+    ax.plot(series.index, m * series.index + b, color='red')
+    ax.set_title(title)
+    ax.set_xlabel("Year")
+    ax.set_ylabel(y_label)
+    ax.grid(True)
+    return fig
+
+def draw_correlation(combined_data):
+    fig, ax = figures.subplots(figsize=(10, 6))
+    ax.scatter(
+        combined_data["Snow Depth (in)"],
+        combined_data["Static Water Level (ft)"],
+        alpha=0.7, edgecolor='k'
+    )
+    m, b = np.polyfit(combined_data["Snow Depth (in)"], combined_data["Static Water Level (ft)"], 1)
+    ax.plot(combined_data["Snow Depth (in)"], m * combined_data["Snow Depth (in)"] + b, color='red')
+    ax.set_title("Correlation Between Snow Depth and Static Water Level")
+    ax.set_xlabel("Average Snow Depth (in)")
+    ax.set_ylabel("Average Static Water Level (ft)")
+    ax.grid(True)
+    return fig
+
+charts = {}
 if not filtered_snow_data.empty:
     yearly_trends = filtered_snow_data.groupby("Water Year")["Snow Depth (in)"].mean()
-    plt.figure(figsize=(10, 6))
-    plt.scatter(yearly_trends.index, yearly_trends, color='blue', alpha=0.7, edgecolor='k')
-    m, b = np.polyfit(yearly_trends.index, yearly_trends, 1)
-    plt.plot(yearly_trends.index, m * yearly_trends.index + b, color='red')
-    plt.title(f"Yearly Snow Depth Trends for {selected_site}")
-    plt.xlabel("Year")
-    plt.ylabel("Average Snow Depth (in)")
-    plt.grid(True)
-    st.pyplot(plt)
-    plt.clf()
+    charts["snow"] = partial(draw_trend, yearly_trends, 'blue',
+                             f"Yearly Snow Depth Trends for {selected_site}", "Average Snow Depth (in)")
+if "Water Year" in ground_columns:
+    filtered_ground_data = ground_water_data[(ground_water_data["Water Year"] >= selected_years[0]) & (ground_water_data["Water Year"] <= selected_years[1])]
+    avg_water_level = filtered_ground_data.groupby("Water Year")["Static Water Level (ft)"].mean()
+    if not avg_water_level.empty:
+        charts["water"] = partial(draw_trend, avg_water_level, 'green',
+                                  "Static Water Level Trends", "Average Static Water Level (ft)")
+    combined_data = filtered_snow_data.groupby("Water Year")["Snow Depth (in)"].mean().reset_index()
+    combined_data = combined_data.merge(
+        avg_water_level.reset_index(),
+        on="Water Year",
+        how="inner"
+    )
+    if not combined_data.empty:
+        charts["combined"] = partial(draw_correlation, combined_data)
+charts = dict(zip(charts, figures.render_parallel(*charts.values())))
+
+# 1. Yearly Snow Depth Trends
+st.subheader("Yearly Snow Depth Trends")
+if "snow" in charts:
+    figures.show_png(charts["snow"])
     st.markdown("**Interpretation:** This graph shows the average snow depth over the years for the selected site, along with a trend line.")
 else:
     st.warning("No data available for the selected site and year range.")
 
 # 2. Static Water Level Trends
 st.subheader("Static Water Level Trends")
-if "Water Year" in ground_columns:
-    filtered_ground_data = ground_water_data[(ground_water_data["Water Year"] >= selected_years[0]) & (ground_water_data["Water Year"] <= selected_years[1])]
-    avg_water_level = filtered_ground_data.groupby("Water Year")["Static Water Level (ft)"].mean()
-    if not avg_water_level.empty:
-        plt.figure(figsize=(10, 6))
-        plt.scatter(avg_water_level.index, avg_water_level, color='green', alpha=0.7, edgecolor='k')
-        m, b = np.polyfit(avg_water_level.index, avg_water_level, 1)
-        plt.plot(avg_water_level.index, m * avg_water_level.index + b, color='red')
-        plt.title("Static Water Level Trends")
-        plt.xlabel("Year")
-        plt.ylabel("Average Static Water Level (ft)")
-        plt.grid(True)
-        st.pyplot(plt)
-        plt.clf()
-        st.markdown("**Interpretation:** This graph shows the average static water level over the years with a trend line.")
-    else:
-        st.warning("No valid data available for Static Water Level Trends.")
-else:
+if "Water Year" not in ground_columns:
     st.error("The 'Water Year' column is missing in the ground water dataset.")
     st.stop()
+if "water" in charts:
+    figures.show_png(charts["water"])
+    st.markdown("**Interpretation:** This graph shows the average static water level over the years with a trend line.")
+else:
+    st.warning("No valid data available for Static Water Level Trends.")
 
 # 3. Snow Depth vs Static Water Level Correlation
 st.subheader("Snow Depth vs Static Water Level Correlation")
-combined_data = filtered_snow_data.groupby("Water Year")["Snow Depth (in)"].mean().reset_index()
-if "Water Year" in ground_columns:
-    combined_data = combined_data.merge(
-        filtered_ground_data.groupby("Water Year")["Static Water Level (ft)"].mean().reset_index(),
-        on="Water Year",
-        how="inner"
-    )
-    if not combined_data.empty:
-        plt.figure(figsize=(10, 6))
-        plt.scatter(
-            combined_data["Snow Depth (in)"],
-            combined_data["Static Water Level (ft)"],
-            alpha=0.7, edgecolor='k'
-        )
-        m, b = np.polyfit(combined_data["Snow Depth (in)"], combined_data["Static Water Level (ft)"], 1)
-        plt.plot(combined_data["Snow Depth (in)"], m * combined_data["Snow Depth (in)"] + b, color='red')
-        plt.title("Correlation Between Snow Depth and Static Water Level")
-        plt.xlabel("Average Snow Depth (in)")
-        plt.ylabel("Average Static Water Level (ft)")
-        plt.grid(True)
-        st.pyplot(plt)
-        plt.clf()
-        st.markdown("**Interpretation:** This scatter plot shows the correlation between snow depth and static water level.")
-    else:
-        st.warning("No valid data available for correlation analysis.")
+if "combined" in charts:
+    figures.show_png(charts["combined"])
+    st.markdown("**Interpretation:** This scatter plot shows the correlation between snow depth and static water level.")
 else:
-    st.warning("Data for correlation is not available.")
+    st.warning("No valid data available for correlation analysis.")
 
 # 4. Top Sites with Greatest Resource Decline
+# Sections 4 and 5 use all sites and years, so they are pre-rendered
 st.subheader("Top Sites with Greatest Resource Decline")
-snow_decline = snow_depth_data.groupby("Site")["Snow Depth (in)"].agg(["first", "last"])
-snow_decline["Decline"] = snow_decline["first"] - snow_decline["last"]
-top_decline_sites = snow_decline.nlargest(10, "Decline")["Decline"].reset_index()
-plt.figure(figsize=(10, 6))
-plt.barh(top_decline_sites["Site"], top_decline_sites["Decline"], color="skyblue")
-plt.title("Top Sites with Greatest Snow Depth Decline")
-plt.xlabel("Decline in Snow Depth (in)")
-plt.ylabel("Site")
-plt.grid(True, axis="x")
-st.pyplot(plt)
-plt.clf()
+static_charts.show("group021_snow_decline")
 st.markdown("**Interpretation:** This chart highlights sites with the greatest snow depth decline over time.")
 
 # 5. Overall Trends Across All Sites and Years
 st.subheader("Overall Trends Across All Sites and Years")
-overall_snow_depth = snow_depth_data.groupby("Water Year")["Snow Depth (in)"].mean().reset_index()
-overall_water_level = ground_water_data.groupby("Water Year")["Static Water Level (ft)"].mean().reset_index()
-combined_overall = overall_snow_depth.merge(overall_water_level, on="Water Year", how="inner")
-
-if not combined_overall.empty:
-    plt.figure(figsize=(10, 6))
-    plt.plot(combined_overall["Water Year"], combined_overall["Snow Depth (in)"], marker='o', color='blue', label='Avg Snow Depth')
-    plt.plot(combined_overall["Water Year"], combined_overall["Static Water Level (ft)"], marker='o', color='green', label='Avg Static Water Level')
-    m_snow, b_snow = np.polyfit(combined_overall["Water Year"], combined_overall["Snow Depth (in)"], 1)
-    plt.plot(combined_overall["Water Year"], m_snow * combined_overall["Water Year"] + b_snow, color='blue', linestyle='--')
-    m_water, b_water = np.polyfit(combined_overall["Water Year"], combined_overall["Static Water Level (ft)"], 1)
-    plt.plot(combined_overall["Water Year"], m_water * combined_overall["Water Year"] + b_water, color='green', linestyle='--')
-    plt.title("Overall Trends Across All Sites and Years")
-    plt.xlabel("Year")
-    plt.ylabel("Values")
-    plt.legend()
-    plt.grid(True)
-    st.pyplot(plt)
-    plt.clf()
-    st.markdown("**Interpretation:** This graph provides a combined view of trends in snow and water levels across all years.")
-else:
-    st.warning("No valid data available for overall trends.")
+static_charts.show("group021_overall_water_trends")
+st.markdown("**Interpretation:** This graph provides a combined view of trends in snow and water levels across all years.")
 
 st.markdown("Return to homepage using the navigation menu.")
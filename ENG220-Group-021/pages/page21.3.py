@@ -1,9 +1,11 @@
 
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
 import os
+from functools import partial
+
+from eng220 import figures
+from eng220.data import load_csv
 
 # Resolve paths relative to current file location
 current_dir = os.path.dirname(__file__)
@@ -13,9 +15,9 @@ aqi_path = os.path.abspath(os.path.join(current_dir, "..", "data", "aqi_combined
 
 # Load datasets
 try:
-    snow_depth_data = pd.read_csv(snow_depth_path)
-    ground_water_data = pd.read_csv(ground_water_path)
-    aqi_data = pd.read_csv(aqi_path)
+    snow_depth_data = load_csv(snow_depth_path)
+    ground_water_data = load_csv(ground_water_path)
+    aqi_data = load_csv(aqi_path)
 except FileNotFoundError:
     st.error("One or more datasets not found. Please ensure the files are in the 'data/' directory.")
     st.stop()
@@ -37,60 +39,57 @@ st.subheader("Combined Dataset Overview")
 st.dataframe(correlation_data)
 st.markdown("**Interpretation:** This table integrates snow depth, groundwater level, and air quality index over the years to observe trends and interdependencies.")
 
+# Chart builders; the four charts are independent and drawn in parallel below
+def draw_heatmap():
+    fig, ax = figures.subplots(figsize=(10, 6))
+    corr_matrix = correlation_data.drop(columns="Water Year").corr()
+    image = ax.imshow(corr_matrix, cmap="coolwarm", aspect="auto")
+    fig.colorbar(image, ax=ax, label="Correlation Coefficient")
+    ax.set_xticks(range(len(corr_matrix.columns)), corr_matrix.columns, rotation=45, ha="right")
+    ax.set_yticks(range(len(corr_matrix.columns)), corr_matrix.columns)
+    ax.set_title("Correlation Between Variables")
+    for i in range(len(corr_matrix.columns)):
+        for j in range(len(corr_matrix.columns)):
+            ax.text(j, i, f"{corr_matrix.iloc[i, j]:.2f}", ha="center", va="center", color="black")
+    return fig
+
+def draw_trend(x_column, y_column, title, x_label, y_label):
+    fig, ax = figures.subplots(figsize=(10, 6))
+    ax.scatter(correlation_data[x_column], correlation_data[y_column], alpha=0.7, edgecolor='k')
+    m, b = np.polyfit(correlation_data[x_column], correlation_data[y_column], 1)
+    ax.plot(correlation_data[x_column], m * correlation_data[x_column] + b, color='red')
+    ax.set_title(title)
+    ax.set_xlabel(x_label)
+    ax.set_ylabel(y_label)
+    ax.grid(True)
+    return fig
+
+heatmap_png, snow_water_png, snow_aqi_png, water_aqi_png = figures.render_parallel(
+    draw_heatmap,
+    partial(draw_trend, "Snow Depth (in)", "Static Water Level (ft)", "Snow Depth vs Static Water Level",
+            "Avg Snow Depth (in)", "Avg Static Water Level (ft)"),
+    partial(draw_trend, "Snow Depth (in)", "AQI_Median", "Snow Depth vs AQI Median",
+            "Avg Snow Depth (in)", "Avg AQI Median"),
+    partial(draw_trend, "Static Water Level (ft)", "AQI_Median", "Static Water Level vs AQI Median",
+            "Avg Static Water Level (ft)", "Avg AQI Median"),
+)
+
 # Correlation Heatmap
 st.subheader("Correlation Heatmap")
-plt.figure(figsize=(10, 6))
-corr_matrix = correlation_data.drop(columns="Water Year").corr()
-plt.imshow(corr_matrix, cmap="coolwarm", aspect="auto")
-plt.colorbar(label="Correlation Coefficient")
-plt.xticks(range(len(corr_matrix.columns)), corr_matrix.columns, rotation=45, ha="right")
-plt.yticks(range(len(corr_matrix.columns)), corr_matrix.columns)
-plt.title("Correlation Between Variables")
-for i in range(len(corr_matrix.columns)):
-    for j in range(len(corr_matrix.columns)):
-        plt.text(j, i, f"{corr_matrix.iloc[i, j]:.2f}", ha="center", va="center", color="black")
-st.pyplot(plt)
-plt.clf()
+figures.show_png(heatmap_png)
 st.markdown("**Interpretation:** This heatmap visualizes how snow depth, static water levels, and AQI values relate to one another through correlation coefficients.")
 
 # Snow Depth vs Static Water Level
 st.subheader("Snow Depth vs Static Water Level")
-plt.figure(figsize=(10, 6))
-plt.scatter(correlation_data["Snow Depth (in)"], correlation_data["Static Water Level (ft)"], alpha=0.7, edgecolor='k')
-m, b = np.polyfit(correlation_data["Snow Depth (in)"], correlation_data["Static Water Level (ft)"], 1)
-plt.plot(correlation_data["Snow Depth (in)"], m * correlation_data["Snow Depth (in)"] + b, color='red')
-plt.title("Snow Depth vs Static Water Level")
-plt.xlabel("Avg Snow Depth (in)")
-plt.ylabel("Avg Static Water Level (ft)")
-plt.grid(True)
-st.pyplot(plt)
-plt.clf()
+figures.show_png(snow_water_png)
 
 # Snow Depth vs AQI Median
 st.subheader("Snow Depth vs AQI Median")
-plt.figure(figsize=(10, 6))
-plt.scatter(correlation_data["Snow Depth (in)"], correlation_data["AQI_Median"], alpha=0.7, edgecolor='k')
-m, b = np.polyfit(correlation_data["Snow Depth (in)"], correlation_data["AQI_Median"], 1)
-plt.plot(correlation_data["Snow Depth (in)"], m * correlation_data["Snow Depth (in)"] + b, color='red')
-plt.title("Snow Depth vs AQI Median")
-plt.xlabel("Avg Snow Depth (in)")
-plt.ylabel("Avg AQI Median")
-plt.grid(True)
-st.pyplot(plt)
-plt.clf()
+figures.show_png(snow_aqi_png)
 
 # Static Water Level vs AQI Median
 st.subheader("Static Water Level vs AQI Median")
-plt.figure(figsize=(10, 6))
-plt.scatter(correlation_data["Static Water Level (ft)"], correlation_data["AQI_Median"], alpha=0.7, edgecolor='k')
-m, b = np.polyfit(correlation_data["Static Water Level (ft)"], correlation_data["AQI_Median"], 1)
-plt.plot(correlation_data["Static Water Level (ft)"], m * correlation_data["Static Water Level (ft)"] + b, color='red')
-plt.title("Static Water Level vs AQI Median")
-plt.xlabel("Avg Static Water Level (ft)")
-plt.ylabel("Avg AQI Median")
-plt.grid(True)
-st.pyplot(plt)
-plt.clf()
+figures.show_png(water_aqi_png)
 
 # Summary
 st.subheader("Insights")
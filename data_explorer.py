@@ -0,0 +1,64 @@
+import os
+import re
+import time
+
+import duckdb
+import pandas as pd
+import streamlit as st
+
+from eng220 import data, sql
+
+DEFAULT_QUERY = """SELECT a.County, a."Median AQI", h."Life Expectancy (YRS)"
+FROM g017_annual_aqi_by_county_2023 AS a
+JOIN g015_healthdata AS h ON a.County = h.County
+WHERE a.State = $state
+ORDER BY a."Median AQI" DESC"""
+
+st.markdown("""
+Query every dataset bundled with the group projects using SQL.
+Each file is a table named after its group and file name (workbook sheets add the sheet name),
+for example `g021_aqi_combined_1980_2024` or `g005_california2019_ozone`.
+Put column names with spaces in double quotes and use `$name` placeholders for values.
+""")
+
+with st.spinner("Preparing tables..."):
+    engine = sql.get_engine()
+
+# Table browser
+with st.expander(f"Tables ({len(engine.tables)})"):
+    table = st.selectbox("Table", sorted(engine.tables))
+    st.caption(f"From `{os.path.relpath(engine.tables[table], data.REPO_ROOT)}`")
+    st.dataframe(pd.DataFrame(engine.columns(table), columns=["Column", "Type"]), hide_index=True)
+    for path, error in engine.failed.items():
+        st.warning(f"Not available: {os.path.relpath(path, data.REPO_ROOT)} ({error})")
+
+# Query
+query = st.text_area("SQL", value=DEFAULT_QUERY, height=160)
+col1, col2 = st.columns([3, 1])
+with col1:
+    params = st.data_editor(
+        pd.DataFrame({"Parameter": ["state"], "Value": ["New Mexico"]}),
+        num_rows="dynamic", hide_index=True, width="stretch",
+    )
+with col2:
+    max_rows = st.number_input("Row limit", min_value=1, max_value=100_000, value=sql.MAX_ROWS, step=1_000)
+
+if st.button("Run Query", type="primary"):
+    # Only pass the parameters the query actually uses
+    used = set(re.findall(r"\$(\w+)", query))
+    values = {
+        row.Parameter: sql.parse_value(str(row.Value))
+        for row in params.dropna().itertuples()
+        if row.Parameter in used
+    }
+    try:
+        start = time.perf_counter()
+        result, truncated = engine.query(query, values, int(max_rows))
+        elapsed = (time.perf_counter() - start) * 1000
+    except duckdb.Error as e:
+        st.error(str(e))
+    else:
+        st.caption(f"{result.num_rows:,} rows in {elapsed:.1f} ms")
+        if truncated:
+            st.warning(f"The result was cut off after {int(max_rows):,} rows.")
+        st.dataframe(result, width="stretch")
@@ -0,0 +1,4 @@
+# Shared helpers used by the ENG220 group pages.
+#
+# Each module is imported explicitly by the pages that need it, e.g.
+# ``from eng220 import reduction``, so a page only pays for what it uses.
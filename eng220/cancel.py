@@ -0,0 +1,239 @@
+# Cooperative cancellation of superseded page runs.
+#
+# When a widget changes while a page is still computing, Streamlit asks the
+# running script to rerun, but the script only notices at its next st.* call;
+# pandas and matplotlib work in between runs to the end for nothing.  The
+# loaders, aggregations and renderers in eng220 call ``checkpoint`` between
+# steps (before parsing a file, between profiled columns, before rasterizing
+# a chart), which ends the run right there once a rerun or stop is pending.
+#
+# Work on other threads (e.g. the chart render pool) cannot end the run
+# itself; it takes the run's ``token()`` and skips its own remaining work
+# with ``token.check(stage)``, and the script thread stops at its next
+# checkpoint.  Outside a script run (warm-up threads, workers, CLIs) all of
+# this does nothing.
+#
+# Every cancellation is counted per stage with the units of work it skipped;
+# ``report()`` summarises them (shown on the home page).
+#
+#   python -m eng220.cancel    supersede a run part-way through each stage; report how soon it stops
+
+import argparse
+import collections
+import contextlib
+import os
+import threading
+import time
+
+import pandas as pd
+
+# What one unit of skipped work is, per stage
+UNITS = {"load": "files", "aggregate": "columns", "render": "charts"}
+
+_lock = threading.Lock()
+_checks = collections.Counter()     # stage -> checkpoints passed
+_cancelled = collections.Counter()  # stage -> runs or tasks cancelled there
+_skipped = collections.Counter()    # stage -> units of work not done
+
+
+class Cancelled(Exception):
+    """Raised off the script thread when the run that started the work is stale."""
+
+
+class RunToken:
+    """Handle on one script run, usable from any thread."""
+
+    def __init__(self, ctx):
+        self._requests = ctx.script_requests
+
+    def stale(self):
+        """Whether Streamlit wants this run to stop or start over."""
+        return _pending(self._requests)
+
+    def check(self, stage, remaining=1):
+        """Raise ``Cancelled`` (and count ``remaining`` units skipped) if the run is stale."""
+        _count(stage)
+        if self.stale():
+            _cancel(stage, remaining)
+            raise Cancelled(stage)
+
+
+def token():
+    """Return the current script run's token, or None outside a script run."""
+    ctx = _script_ctx()
+    return RunToken(ctx) if ctx is not None else None
+
+
+def checkpoint(stage, remaining=1):
+    """End the current run here if it has been superseded.
+
+    ``remaining`` is how many units of ``stage`` work (files, columns,
+    charts) the caller would still do; it is counted as skipped.
+    """
+    try:
+        from streamlit.runtime.scriptrunner_utils.script_run_context import get_run_yield_check
+    except ImportError:
+        return
+    # The check Streamlit runs at every st.* call: on the script thread it
+    # raises RerunException or StopException when a request is pending
+    yield_check = get_run_yield_check()
+    if yield_check is None:
+        return
+    _count(stage)
+    try:
+        yield_check()
+    except BaseException:
+        _cancel(stage, remaining)
+        raise
+
+
+def report():
+    """Return one row per stage: checkpoints passed, cancellations and work skipped."""
+    with _lock:
+        stages = sorted(set(_checks) | set(_cancelled))
+        rows = [{
+            "Stage": stage,
+            "Checkpoints": _checks[stage],
+            "Cancelled": _cancelled[stage],
+            "Work Skipped": _skipped[stage],
+            "Unit": UNITS.get(stage, ""),
+        } for stage in stages]
+    return pd.DataFrame(rows, columns=["Stage", "Checkpoints", "Cancelled", "Work Skipped", "Unit"])
+
+
+def _script_ctx():
+    try:
+        from streamlit.runtime.scriptrunner_utils.script_run_context import get_script_run_ctx
+    except ImportError:
+        return None
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx if ctx is not None and ctx.script_requests is not None else None
+
+
+def _pending(requests):
+    # Looks at the pending request without taking it (only the script thread
+    # may take it), with the same rule as ScriptRequests.on_scriptrunner_yield:
+    # fragment reruns that do not preempt the script are left alone.  These are
+    # Streamlit internals (requirements.txt pins its minor version); if they
+    # are not there the run is taken as current
+    try:
+        from streamlit.runtime.scriptrunner_utils.script_requests import (
+            ScriptRequestType,
+            _fragment_run_should_not_preempt_script,
+        )
+    except ImportError:
+        return False
+
+    lock = getattr(requests, "_lock", None)
+    with lock if lock is not None else contextlib.nullcontext():
+        state = getattr(requests, "_state", None)
+        rerun_data = getattr(requests, "_rerun_data", None)
+    if state == ScriptRequestType.STOP:
+        return True
+    if state != ScriptRequestType.RERUN or rerun_data is None:
+        return False
+    try:
+        return not _fragment_run_should_not_preempt_script(
+            rerun_data.fragment_id_queue, rerun_data.is_fragment_scoped_rerun)
+    except AttributeError:
+        return False
+
+
+def _count(stage):
+    with _lock:
+        _checks[stage] += 1
+
+
+def _cancel(stage, remaining):
+    with _lock:
+        _cancelled[stage] += 1
+        _skipped[stage] += remaining
+
+
+# ========== Check ==========
+
+def _superseded(work, after):
+    """Run ``work()`` as a script run that is superseded after ``after`` seconds.
+
+    Returns the seconds until the run ended and whether it was cancelled.
+    """
+    from types import SimpleNamespace
+
+    from streamlit.runtime.scriptrunner_utils.exceptions import RerunException
+    from streamlit.runtime.scriptrunner_utils.script_requests import RerunData, ScriptRequests
+    from streamlit.runtime.scriptrunner_utils.script_run_context import SCRIPT_RUN_CONTEXT_ATTR_NAME
+
+    requests = ScriptRequests()
+
+    def yield_check():
+        request = requests.on_scriptrunner_yield()
+        if request is not None:
+            raise RerunException(request.rerun_data)
+
+    # Just what the checkpoints read from a real ScriptRunContext
+    thread = threading.current_thread()
+    setattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME, SimpleNamespace(script_requests=requests, yield_check=yield_check))
+    timer = threading.Timer(after, requests.request_rerun, [RerunData()])
+    start = time.perf_counter()
+    timer.start()
+    try:
+        work()
+        cancelled = False
+    except RerunException:
+        cancelled = True
+    finally:
+        elapsed = time.perf_counter() - start
+        timer.cancel()
+        delattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME)
+    return elapsed, cancelled
+
+
+def check(fraction=0.25):
+    """Supersede loading, profiling and drawing after ``fraction`` of their run time."""
+    import numpy as np
+
+    from eng220 import data, figures, profile
+
+    county_dir = os.path.join(data.REPO_ROOT, "ENG220-Group-018", "datasets", "county_datasets")
+    counties = sorted(os.path.join(county_dir, f) for f in os.listdir(county_dir) if f.endswith(".csv"))
+    county_reports = data.concat_csvs(counties, na_values=".")
+
+    def load():
+        # Fresh parses every time, as for the first visitor
+        with data._lock:
+            data._datasets.clear()
+        data.concat_csvs(counties, na_values=".")
+
+    def draw(i):
+        fig, ax = figures.subplots(figsize=(8, 5))
+        ax.plot(np.random.default_rng(i).normal(size=5_000).cumsum())
+        return fig
+
+    stages = [
+        ("load", load),
+        ("aggregate", lambda: profile.DatasetProfile(county_reports)),
+        ("render", lambda: figures.render_parallel(*(lambda i=i: draw(i) for i in range(12)))),
+    ]
+    for stage, work in stages:
+        start = time.perf_counter()
+        work()
+        full = time.perf_counter() - start
+        after = full * fraction
+        elapsed, cancelled = _superseded(work, after)
+        state = f"stopped {(elapsed - after) * 1000:.0f} ms after the rerun request" if cancelled else "NOT cancelled"
+        print(f"{stage:10} full run {full:.2f}s, superseded at {after:.2f}s: {state}")
+        assert cancelled, f"{stage} ran to the end"
+    print(report().to_string(index=False))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m eng220.cancel")
+    parser.add_argument("--fraction", type=float, default=0.25, help="how far into each stage to supersede it")
+    args = parser.parse_args(argv)
+    # The loaders count into the imported module, not this __main__ copy
+    from eng220 import cancel
+    cancel.check(args.fraction)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# Combining rows into the bars and slices of categorical charts.
+#
+# The plotters' Bar option drew one bar per row, so repeated X values were
+# stacked on top of each other instead of added up, and the Pie option
+# refused any column with more than ten distinct values.  ``aggregate``
+# combines the Y values of the rows sharing an X value (sum, mean or count)
+# and keeps the ``top`` largest groups plus one "Other" group for the rest,
+# so every chart gets at most ``top + 1`` correctly combined values however
+# many rows and distinct X values the data has.  X values are factorized to
+# integer codes once and each statistic is a single np.bincount over them.
+#
+#   totals = categories.aggregate(data[x_column], data[y_column], "sum")
+#   ax.bar(totals.index, totals.values)
+#
+#   python -m eng220.categories    check against pandas groupby; time both
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+METHODS = ["sum", "mean", "count"]
+# Bars per chart; pies get fewer, as slices under a few percent are unreadable
+TOP_K = 20
+PIE_TOP_K = 9
+OTHER = "Other"
+
+
+def aggregate(x, y=None, how="sum", top=TOP_K):
+    """Return ``y`` combined per distinct ``x`` as a Series indexed by X value.
+
+    Rows with a missing X, or a missing or non-numeric Y, are left out; a Y
+    column that is not numeric at all is counted instead.  With up to
+    ``top + 1`` groups (or with ``top=None``) they are returned in the order
+    their X values first appear, as the rows would have been plotted; with
+    more, the ``top`` largest come first, followed by ``OTHER`` combining
+    the rest (labels are then strings).
+    """
+    if how not in METHODS:
+        raise ValueError(f"how must be one of {METHODS}, not {how!r}")
+    codes, labels = pd.factorize(x)
+    keep = codes >= 0
+    if y is not None and how != "count" and pd.api.types.is_numeric_dtype(y):
+        values = pd.to_numeric(y, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+        keep &= ~np.isnan(values)
+        values = values[keep]
+    else:
+        how, values = "count", None
+    codes = codes[keep]
+
+    counts = np.bincount(codes, minlength=len(labels)).astype("float64")
+    sums = counts if values is None else np.bincount(codes, weights=values, minlength=len(labels))
+    name = getattr(y, "name", None) if how != "count" else "count"
+    if top is None or len(labels) <= top + 1:
+        return pd.Series(_combine(sums, counts, how), index=labels, name=name)
+
+    combined = _combine(sums, counts, how)
+    # Stable, so ties keep their order of appearance
+    order = np.argsort(-np.nan_to_num(combined, nan=-np.inf), kind="stable")
+    kept, rest = order[:top], order[top:]
+    values = np.append(combined[kept], _combine(sums[rest].sum(), counts[rest].sum(), how))
+    index = [str(label) for label in labels[kept]] + [OTHER]
+    return pd.Series(values, index=index, name=name)
+
+
+def _combine(sums, counts, how):
+    if how != "mean":
+        return sums
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return sums / counts
+
+
+# ========== Check ==========
+
+def check(rows=1_000_000, groups=5_000, seed=0):
+    """Compare ``aggregate`` with pandas groupby on random data; print timings."""
+    rng = np.random.default_rng(seed)
+    x = pd.Series(rng.integers(0, groups, rows)).map(lambda code: f"g{code:05d}")
+    y = pd.Series(rng.exponential(size=rows)).mask(rng.random(rows) < 0.01)
+
+    for how in METHODS:
+        start = time.perf_counter()
+        ours = aggregate(x, y, how, top=groups)
+        ours_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        theirs = x.groupby(x).size() if how == "count" else y.groupby(x).agg(how)
+        pandas_ms = (time.perf_counter() - start) * 1000
+        assert np.allclose(ours.to_numpy(), theirs.reindex(ours.index).to_numpy()), how
+        print(f"{how:6} {len(ours):6} groups: bincount {ours_ms:6.0f} ms, groupby {pandas_ms:6.0f} ms")
+
+    totals = aggregate(x, y, "sum")
+    assert len(totals) == TOP_K + 1 and totals.index[-1] == OTHER
+    assert np.isclose(totals.sum(), y.sum()), "top-K and Other lose rows"
+    assert (np.diff(totals.to_numpy()[:-1]) <= 0).all(), "top-K not largest first"
+    print(f"top {TOP_K} + {OTHER}: totals preserved")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m eng220.categories")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--groups", type=int, default=5_000)
+    args = parser.parse_args(argv)
+    check(args.rows, args.groups)
+
+
+if __name__ == "__main__":
+    main()
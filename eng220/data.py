@@ -0,0 +1,292 @@
+# Shared dataset loading for the group pages.
+#
+# Files are fingerprinted by content hash, so the same dataset shipped by more
+# than one group (e.g. Group 008 and Group 020's filtered_data_updated.csv) is
+# parsed once and held in memory once.  Entries live at module level, which
+# makes them shared by every page and every session in the server process.
+
+import contextlib
+import glob
+import hashlib
+import os
+import threading
+
+import pandas as pd
+
+from eng220 import cancel, metrics
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Derived files (converted workbooks, rendered charts, ...) are kept here
+CACHE_DIR = os.environ.get("ENG220_CACHE_DIR", os.path.join(REPO_ROOT, ".cache"))
+HASH_BLOCK = 1 << 20
+
+_lock = threading.RLock()
+_fingerprints = {}  # path -> (mtime_ns, size, digest)
+_watched = set()    # paths whose digest only changes when eng220.reload publishes it
+_datasets = {}      # (digest, read options) -> _Dataset
+_loading = {}       # (digest, read options) -> lock held while parsing
+_local = threading.local()
+
+
+class _Dataset:
+    def __init__(self, digest, frame):
+        self.digest = digest
+        self.frame = frame
+        self.nbytes = int(frame.memory_usage(deep=True).sum())
+        self.paths = set()
+        self.requests = 0
+        self.sources = set()  # digests of the files it was read from
+
+
+def fingerprint(path):
+    """Return the SHA-256 of a file's contents.
+
+    Digests are remembered per path and only recomputed when the file's size
+    or modification time changes.  Files watched by eng220.reload keep their
+    published digest until the reloader swaps in the new one; inside
+    ``staging`` the thread sees the new contents first.
+    """
+    path = os.path.abspath(path)
+    staged = getattr(_local, "staged", None)
+    with _lock:
+        known = _fingerprints.get(path)
+        if staged is not None:
+            known = staged.get(path, known)
+        elif known and path in _watched:
+            return known[2]
+    stat = os.stat(path)
+    if known and known[:2] == (stat.st_mtime_ns, stat.st_size):
+        return known[2]
+
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            sha.update(block)
+    version = (stat.st_mtime_ns, stat.st_size, sha.hexdigest())
+    with _lock:
+        if staged is not None and path in _watched:
+            staged[path] = version
+        else:
+            _fingerprints[path] = version
+    return version[2]
+
+
+def watch(paths):
+    """Pin the digests of ``paths``; they change only through ``publish``."""
+    with _lock:
+        _watched.update(os.path.abspath(p) for p in paths)
+
+
+@contextlib.contextmanager
+def staging():
+    """Let this thread read the current contents of watched files before they are published.
+
+    Yields ``{path: (mtime_ns, size, digest)}`` of the watched files seen
+    with new contents, for ``publish``.
+    """
+    previous = getattr(_local, "staged", None)
+    _local.staged = staged = {}
+    try:
+        yield staged
+    finally:
+        _local.staged = previous
+
+
+def publish(staged):
+    """Swap staged digests in for every reader at once; drop datasets no file has any more."""
+    with _lock:
+        old = {_fingerprints[path][2] for path in staged if path in _fingerprints}
+        _fingerprints.update(staged)
+        # Another file may still have the old contents
+        gone = old - {version[2] for version in _fingerprints.values()}
+        for key in [k for k, entry in _datasets.items() if entry.sources & gone]:
+            del _datasets[key]
+    return gone
+
+
+def load_csv(path, **read_kwargs):
+    """Return the DataFrame for a CSV, shared with every other reader of it.
+
+    Files with identical contents and identical ``read_kwargs`` share one
+    parsed DataFrame.  The result is a shallow copy: adding, dropping or
+    renaming columns is safe, but values must not be modified in place.
+    """
+    path = os.path.abspath(path)
+    _track("load_csv", [_relpath(path)], read_kwargs)
+    key = (fingerprint(path), _options_key(read_kwargs))
+
+    def build():
+        # Not worth parsing for a run that has been superseded
+        cancel.checkpoint("load")
+        with metrics.timer("eng220_load_seconds", loader="load_csv"):
+            return pd.read_csv(path, **read_kwargs)
+
+    return _shared(key, path, build, {key[0]})
+
+
+def is_loaded(path, **read_kwargs):
+    """Whether the current version of a CSV is in the registry with ``read_kwargs``."""
+    path = os.path.abspath(path)
+    with _lock:
+        known = _fingerprints.get(path)
+        return known is not None and (known[2], _options_key(read_kwargs)) in _datasets
+
+
+def concat_csvs(paths, keys=None, key_name=None, **read_kwargs):
+    """Return several CSVs stacked into one DataFrame, shared like ``load_csv``.
+
+    With ``keys`` every row gets a ``key_name`` column holding the key of the
+    file it came from (e.g. the year of a yearly report).
+    """
+    paths = [os.path.abspath(p) for p in paths]
+    _track("concat_csvs", [[_relpath(p) for p in paths]],
+           dict(read_kwargs, keys=keys, key_name=key_name))
+    sha = hashlib.sha256(repr((keys, key_name)).encode())
+    sources = [fingerprint(path) for path in paths]
+    for digest in sources:
+        sha.update(digest.encode())
+    key = (sha.hexdigest(), _options_key(read_kwargs))
+
+    def build():
+        frames = []
+        with metrics.timer("eng220_load_seconds", loader="concat_csvs"):
+            for i, path in enumerate(paths):
+                cancel.checkpoint("load", remaining=len(paths) - i)
+                # Not through load_csv: only the stacked frame is kept, not each part as well
+                frames.append(pd.read_csv(path, **read_kwargs))
+            if keys is not None:
+                frames = [frame.assign(**{key_name: k}) for frame, k in zip(frames, keys)]
+            return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    label = f"{os.path.commonpath(paths)} ({len(paths)} files)" if paths else "(no files)"
+    return _shared(key, label, build, set(sources))
+
+
+def _shared(key, label, build, sources):
+    """Return a shallow copy of the registry entry for ``key``, building it once.
+
+    Parsing happens outside the registry lock, so different datasets load in
+    parallel while concurrent requests for the same one wait for a single parse.
+    """
+    built = False
+    with _lock:
+        entry = _datasets.get(key)
+        if entry is None:
+            key_lock = _loading.setdefault(key, threading.Lock())
+    if entry is None:
+        with key_lock:
+            with _lock:
+                entry = _datasets.get(key)
+            if entry is None:
+                entry = _Dataset(key[0], build())
+                entry.sources = sources
+                built = True
+                with _lock:
+                    _datasets[key] = entry
+                    _loading.pop(key, None)
+    metrics.cache("datasets", "misses" if built else "hits")
+    with _lock:
+        entry.paths.add(label)
+        entry.requests += 1
+        return entry.frame.copy(deep=False)
+
+
+@contextlib.contextmanager
+def track_loads():
+    """Collect ``(loader, args, kwargs)`` for every load made by this thread.
+
+    The recorded specs are JSON-serialisable and can be replayed with
+    ``replay`` (used to warm pages up before their first visitor).
+    """
+    specs = []
+    previous = getattr(_local, "specs", None)
+    _local.specs = specs
+    try:
+        yield specs
+    finally:
+        _local.specs = previous
+
+
+def replay(spec):
+    """Run a load recorded by ``track_loads``."""
+    loader, args, kwargs = spec
+    if loader == "load_csv":
+        return load_csv(os.path.join(REPO_ROOT, args[0]), **kwargs)
+    if loader == "concat_csvs":
+        return concat_csvs([os.path.join(REPO_ROOT, p) for p in args[0]], **kwargs)
+    raise ValueError(f"Unknown loader '{loader}'")
+
+
+def _track(loader, args, kwargs):
+    specs = getattr(_local, "specs", None)
+    if specs is not None:
+        spec = [loader, args, kwargs]
+        if spec not in specs:
+            specs.append(spec)
+
+
+def _relpath(path):
+    return os.path.relpath(path, REPO_ROOT)
+
+
+def preload(paths, arrow_strings=True):
+    """Load ``paths`` into the shared registry ahead of the first request.
+
+    With ``arrow_strings`` text columns are stored as Arrow-backed strings,
+    which keep their data in a few large buffers instead of one Python object
+    per value.  Returns ``{path: error message}`` for files that failed.
+    """
+    failed = {}
+    for path in paths:
+        try:
+            load_csv(path)
+        except Exception as e:
+            failed[path] = str(e)
+            continue
+        if arrow_strings:
+            key = (fingerprint(path), _options_key({}))
+            with _lock:
+                entry = _datasets[key]
+                text = entry.frame.select_dtypes(include="object").columns
+                if len(text):
+                    entry.frame = entry.frame.astype({col: "string[pyarrow]" for col in text})
+                    entry.nbytes = int(entry.frame.memory_usage(deep=True).sum())
+    return failed
+
+
+def bundled_csvs():
+    """Return every CSV shipped with the group projects."""
+    paths = []
+    for group_dir in sorted(glob.glob(os.path.join(REPO_ROOT, "ENG220-Group-*"))):
+        for root, _, files in os.walk(group_dir):
+            paths.extend(os.path.join(root, f) for f in files if f.lower().endswith(".csv"))
+    return sorted(paths)
+
+
+def memory_report():
+    """Return one row per unique dataset with the memory deduplication saved."""
+    with _lock:
+        entries = list(_datasets.values())
+    rows = []
+    for entry in entries:
+        paths = sorted(os.path.relpath(p, REPO_ROOT) for p in entry.paths)
+        rows.append({
+            "Dataset": paths[0],
+            "Also Used As": ", ".join(paths[1:]),
+            "Hash": entry.digest[:12],
+            "Size (MB)": entry.nbytes / 1e6,
+            "Requests": entry.requests,
+            "Saved (MB)": entry.nbytes * (len(paths) - 1) / 1e6,
+        })
+    columns = ["Dataset", "Also Used As", "Hash", "Size (MB)", "Requests", "Saved (MB)"]
+    return pd.DataFrame(rows, columns=columns).sort_values("Dataset", ignore_index=True)
+
+
+def memory_saved():
+    """Return the bytes not allocated thanks to content deduplication."""
+    with _lock:
+        return sum(e.nbytes * (len(e.paths) - 1) for e in _datasets.values())
+
+
+def _options_key(read_kwargs):
+    return repr(sorted(read_kwargs.items()))
@@ -0,0 +1,171 @@
+# Coalescing of rapid range-widget changes.
+#
+# Dragging a year-range slider or stepping a row number_input reruns the page
+# for every value it passes through, and each rerun filtered, aggregated and
+# re-plotted everything below the widget only to be thrown away by the next
+# one.  Pages now ask ``settled(key, value)`` before the expensive part: the
+# first time a value is seen it returns False and the page draws a cheap
+# preview instead (a line chart of a small series computed once per dataset
+# version with ``overview``).  A hidden fragment then checks every
+# POLL_INTERVAL seconds and reruns the page once the value has stayed put for
+# SETTLE_SECONDS, and only that run does the full work.  Intermediate values
+# replaced before they settle are never computed at all.  This only pays
+# where the settled run is expensive (Group 021's yearly views take seconds);
+# on a page whose full run is cheaper than a preview it just adds the delay.
+#
+#   if debounce.settled("year_range", year_range):
+#       ...full filtering and charts...
+#   else:
+#       debounce.preview(debounce.overview(path, "Arrests", by="Year", how="sum").loc[lo:hi])
+#
+# Widgets further down the page must still be drawn on preview runs, or
+# Streamlit forgets their values; only outputs should be skipped.
+#
+#   python -m eng220.debounce    drag each range widget; compare preview and settled run times
+
+import argparse
+import hashlib
+import os
+import statistics
+import threading
+import time
+
+import numpy as np
+
+from eng220 import data
+
+SETTLE_SECONDS = 0.6
+POLL_INTERVAL = 0.2
+# Most points an overview keeps; row-indexed overviews are averaged down to this
+PREVIEW_POINTS = 200
+
+_lock = threading.Lock()
+_overviews = {}  # (digest, column, by, how, points) -> Series
+
+
+def settled(key, value, delay=SETTLE_SECONDS):
+    """Return True once ``value`` has not changed for ``delay`` seconds.
+
+    The first value a session sees is settled right away, so pages open
+    with their full content.  While the value is unsettled the page is rerun
+    as soon as it settles.
+    """
+    import streamlit as st
+
+    state_key = f"debounce:{key}"
+    now = time.monotonic()
+    state = st.session_state.get(state_key)
+    if state is None:
+        st.session_state[state_key] = (value, now - delay)
+        return True
+    if state[0] != value:
+        st.session_state[state_key] = state = (value, now)
+    changed_at = state[1]
+    if now - changed_at >= delay:
+        return True
+
+    @st.fragment(run_every=POLL_INTERVAL, key=f"debounce-{hashlib.sha256(key.encode()).hexdigest()[:16]}")
+    def wait():
+        latest = st.session_state.get(state_key)
+        # Only the run for the latest value reruns the page
+        if latest is not None and latest[1] == changed_at and time.monotonic() - changed_at >= delay:
+            st.rerun()
+
+    wait()
+    return False
+
+
+def overview(path, column, by=None, how="mean", points=PREVIEW_POINTS, **read_kwargs):
+    """Return a small Series of ``column`` to preview a range of ``path`` with.
+
+    With ``by`` (a column or list of columns) it is ``column`` aggregated by
+    ``how`` per group; without, it is ``column`` averaged over runs of rows,
+    indexed by each run's first row, at most ``points`` long.  Computed once
+    per dataset version and read options.
+    """
+    key = (data.fingerprint(path), column, repr(by), how, points, data._options_key(read_kwargs))
+    with _lock:
+        series = _overviews.get(key)
+    if series is None:
+        frame = data.load_csv(path, **read_kwargs)
+        values = frame[column]
+        if by is not None:
+            series = values.groupby([frame[c] for c in ([by] if isinstance(by, str) else by)]).agg(how)
+        else:
+            step = max(1, -(-len(values) // points))
+            starts = np.arange(len(values)) // step * step
+            series = values.groupby(starts).agg(how)
+        with _lock:
+            series = _overviews.setdefault(key, series)
+    return series
+
+
+def preview(series, message="Updating once the selection settles..."):
+    """Draw ``series`` as a quick line chart in place of the full view."""
+    import streamlit as st
+
+    st.caption(f":hourglass_flowing_sand: {message}")
+    if series.empty:
+        return
+    st.line_chart(series)
+
+
+# ========== Check ==========
+
+# page -> (widget, label, values a drag passes through given the widget)
+DRAGS = {
+    "ENG220-Group-021/pages/page21.1.py": ("slider", "Select Year Range",
+                                           lambda w: [(w.min, w.max - i) for i in range(1, 11)]),
+    "ENG220-Group-021/pages/page21.2.py": ("slider", "Select Year Range",
+                                           lambda w: [(w.min, w.max - i) for i in range(1, 11)]),
+}
+
+
+def _widget(app, kind, label):
+    for widget in list(getattr(app, kind)) + list(getattr(app.sidebar, kind)):
+        if widget.label == label:
+            return widget
+    raise LookupError(f"No {kind} labelled '{label}'")
+
+
+def measure(page):
+    """Drag the page's range widget; return ms per preview run and of the settled run."""
+    from streamlit.testing.v1 import AppTest
+
+    kind, label, drag = DRAGS[page]
+    app = AppTest.from_file(os.path.join(data.REPO_ROOT, page), default_timeout=120).run()
+    if app.exception:
+        raise RuntimeError(f"{page} failed: {app.exception[0].message}")
+
+    previews = []
+    for value in drag(_widget(app, kind, label)):
+        _widget(app, kind, label).set_value(value)
+        start = time.perf_counter()
+        app.run()
+        previews.append((time.perf_counter() - start) * 1000)
+        if app.exception:
+            raise RuntimeError(f"{page} failed: {app.exception[0].message}")
+        assert any("settles" in c.value for c in app.caption), f"{page} computed an unsettled value"
+
+    # What the waiting fragment triggers once the last value has settled
+    time.sleep(SETTLE_SECONDS)
+    start = time.perf_counter()
+    app.run()
+    full = (time.perf_counter() - start) * 1000
+    assert not any("settles" in c.value for c in app.caption), f"{page} did not settle"
+    return previews, full
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m eng220.debounce")
+    parser.add_argument("pages", nargs="*", help=f"pages to drag (default: {', '.join(DRAGS)})")
+    args = parser.parse_args(argv)
+
+    print(f"{'page':38} {'values':>6} {'preview run':>12} {'settled run':>12}")
+    for page in args.pages or DRAGS:
+        previews, full = measure(page)
+        print(f"{page:38} {len(previews):6} {statistics.median(previews):9.0f} ms {full:9.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
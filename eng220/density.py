@@ -0,0 +1,112 @@
+# Scatter plots that cost the same however many rows they show.
+#
+# A matplotlib scatter draws one marker per row, so a plot of every row of a
+# large dataset takes seconds to rasterize and ends up a solid blob.  Above
+# DENSITY_THRESHOLD rows ``scatter`` instead counts the points falling into
+# each pixel of the axes with np.histogram2d and draws the counts as one
+# image on a log colour scale, so the cost depends on the canvas size rather
+# than the row count and dense regions stay readable.  Columns that are not
+# numbers or dates (e.g. category labels) are always drawn as markers.
+#
+#   density.scatter(ax, data[x_column], data[y_column])
+#
+#   python -m eng220.density    time markers against binning for growing row counts
+
+import argparse
+import time
+
+import matplotlib
+import numpy as np
+import pandas as pd
+from matplotlib import dates as mdates
+from matplotlib.cm import ScalarMappable
+from matplotlib.colors import LogNorm
+
+from eng220 import figures
+
+# Around where markers blur into one blob on a default-size chart
+DENSITY_THRESHOLD = 10_000
+# Upper bound on bins per axis, whatever the canvas size
+MAX_BINS = 1_000
+# Empty bins are left transparent
+CMAP = matplotlib.colormaps["viridis"].with_extremes(bad=(0, 0, 0, 0))
+
+
+def _coordinates(values):
+    """Return values as float64 (dates as matplotlib date numbers), or None."""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return mdates.date2num(pd.DatetimeIndex(values).tz_localize(None))
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        return np.asarray(values, dtype="float64")
+    return None
+
+
+def _bins(ax):
+    # One bin per pixel of the axes at the figure's resolution
+    extent = ax.get_window_extent()
+    return (int(np.clip(extent.width, 1, MAX_BINS)), int(np.clip(extent.height, 1, MAX_BINS)))
+
+
+def _span(values):
+    low, high = float(values.min()), float(values.max())
+    return (low - 0.5, high + 0.5) if low == high else (low, high)
+
+
+def bin_points(x, y, bins):
+    """Return ``(counts, (x0, x1, y0, y1))`` of the finite points in a ``bins`` grid."""
+    finite = np.isfinite(x) & np.isfinite(y)
+    x, y = x[finite], y[finite]
+    if not len(x):
+        return np.zeros(bins[::-1]), (0.0, 1.0, 0.0, 1.0)
+    x_range, y_range = _span(x), _span(y)
+    counts, _, _ = np.histogram2d(x, y, bins=bins, range=[x_range, y_range])
+    # histogram2d is indexed [x, y]; images are [row (y), column (x)]
+    return counts.T, (*x_range, *y_range)
+
+
+def scatter(ax, x, y, threshold=DENSITY_THRESHOLD, **kwargs):
+    """Scatter ``y`` against ``x``; past ``threshold`` rows, as a binned density image."""
+    x_values, y_values = _coordinates(x), _coordinates(y)
+    if len(x) <= threshold or x_values is None or y_values is None:
+        return ax.scatter(x, y, **kwargs)
+
+    counts, extent = bin_points(x_values, y_values, _bins(ax))
+    norm = LogNorm(vmin=1, vmax=max(counts.max(), 1))
+    # Coloured here once, so saving the figure only has to resample bytes
+    pixels = CMAP(norm(np.ma.masked_equal(counts, 0)), bytes=True)
+    image = ax.imshow(pixels, origin="lower", extent=extent, aspect="auto", interpolation="nearest")
+    if pd.api.types.is_datetime64_any_dtype(x):
+        ax.xaxis_date()
+    if pd.api.types.is_datetime64_any_dtype(y):
+        ax.yaxis_date()
+    ax.figure.colorbar(ScalarMappable(norm, CMAP), ax=ax, label="Rows per pixel")
+    return image
+
+
+# ========== Benchmark ==========
+
+def _time_render(rows, threshold, seed=0):
+    rng = np.random.default_rng(seed)
+    x = pd.Series(rng.normal(size=rows))
+    y = pd.Series(x * 0.5 + rng.normal(size=rows))
+    start = time.perf_counter()
+    fig, ax = figures.subplots()
+    scatter(ax, x, y, threshold=threshold)
+    figures.to_png(fig)
+    return (time.perf_counter() - start) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m eng220.density")
+    parser.add_argument("--rows", type=int, nargs="*", default=[1_000, 10_000, 100_000, 1_000_000])
+    args = parser.parse_args(argv)
+
+    print(f"{'rows':>10} {'markers':>10} {'density':>10}")
+    for rows in args.rows:
+        markers = _time_render(rows, threshold=rows)
+        binned = _time_render(rows, threshold=0)
+        print(f"{rows:>10,} {markers:7.0f} ms {binned:7.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
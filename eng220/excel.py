@@ -0,0 +1,169 @@
+# Excel workbook ingestion with a Parquet cache.
+#
+# Reading the bundled workbooks through openpyxl takes seconds per file
+# (~12 s for one California workbook), so each workbook is parsed once with
+# the fastest available engine and every sheet is stored as Parquet under
+# CACHE_DIR/excel/<workbook hash>/.  Later reads of an unchanged workbook only
+# touch the Parquet files.
+#
+#   python -m eng220.excel          convert every bundled workbook
+#   python -m eng220.excel --check  also verify the Group 002 cleaning step
+
+import csv
+import glob
+import json
+import os
+import re
+import sys
+import time
+
+import pandas as pd
+
+from eng220 import metrics
+from eng220.data import CACHE_DIR, REPO_ROOT, fingerprint
+
+try:
+    import python_calamine  # noqa: F401
+    ENGINE = "calamine"
+except ImportError:
+    ENGINE = "openpyxl"
+
+EXCEL_CACHE_DIR = os.path.join(CACHE_DIR, "excel")
+
+
+def read_workbook(path, engine=None):
+    """Return ``{sheet name: DataFrame}`` for a workbook, using the cache."""
+    cache_dir = os.path.join(EXCEL_CACHE_DIR, fingerprint(path))
+    index_path = os.path.join(cache_dir, "sheets.json")
+    if os.path.exists(index_path):
+        metrics.cache("workbooks", "hits")
+        with open(index_path) as f:
+            index = json.load(f)
+        return {sheet: pd.read_parquet(os.path.join(cache_dir, name)) for sheet, name in index}
+
+    metrics.cache("workbooks", "misses")
+    with metrics.timer("eng220_load_seconds", loader="read_workbook"):
+        sheets = pd.read_excel(path, sheet_name=None, engine=engine or ENGINE)
+    os.makedirs(cache_dir, exist_ok=True)
+    index = []
+    for position, (sheet, frame) in enumerate(sheets.items()):
+        name = f"{position:02d}-{re.sub(r'[^A-Za-z0-9.]+', '_', str(sheet))}.parquet"
+        sheets[sheet] = frame = _arrow_safe(frame)
+        frame.to_parquet(os.path.join(cache_dir, name), index=False)
+        index.append([sheet, name])
+
+    # Written last, so a half-converted workbook is never treated as cached
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(index, f)
+    os.replace(tmp_path, index_path)
+    return sheets
+
+
+def read_sheet(path, sheet_name=0):
+    """Return one sheet of a workbook by name or position."""
+    sheets = read_workbook(path)
+    if isinstance(sheet_name, int):
+        return list(sheets.values())[sheet_name]
+    return sheets[sheet_name]
+
+
+# ========== Group 002: water quality report ==========
+# "Water Data Raw.xlsx" holds the utility's yearly report tables as one column
+# of comma-separated text.  Each year is a block that starts with a header
+# line and ends with a blank row.  Water_Data_Clean1.csv keeps the numeric
+# results for four contaminants, with the unit moved into the name.
+
+WATER_SUBSTANCES = ["Arsenic", "Barium", "Fluoride", "Nitrate"]
+WATER_FIELDS = [
+    "Substance", "Source", "Sample Year(s)", "Detection Limit", "Min. Detected",
+    "Avg. Detected System-wide", "Avg. Detected at San Juan-Chama Drinking Water Plant",
+    "Max Detected", "Max Contaminant Level", "Max Contaminant Level Goal",
+]
+
+
+def clean_water_quality(raw):
+    """Turn the single-column raw report sheet into the Water_Data_Clean1 table.
+
+    Substance names are normalised to "<name> (<unit>)"; the published CSV
+    has one stray double space ("Arsenic  (PPB)") that is not reproduced.
+    """
+    rows = []
+    for line in raw.iloc[:, 0].dropna().astype(str):
+        if line.startswith("SUBSTANCE OR CONDITION"):
+            continue
+        fields = next(csv.reader([line]))
+        # Some sources contain unquoted commas; they belong to the Source field
+        if len(fields) > len(WATER_FIELDS):
+            extra = len(fields) - len(WATER_FIELDS)
+            fields = [fields[0], ",".join(fields[1:extra + 2])] + fields[extra + 2:]
+
+        substance = next((s for s in WATER_SUBSTANCES if s in fields[0]), None)
+        if substance is None:
+            continue
+        unit = fields[3].split()[-1]
+        row = dict(zip(WATER_FIELDS, fields))
+        row["Substance"] = f"{substance} ({unit})"
+        for field in WATER_FIELDS[3:]:
+            row[field] = _measurement(row[field])
+        rows.append(row)
+
+    clean = pd.DataFrame(rows, columns=WATER_FIELDS).drop(columns="Source")
+    clean["Sample Year(s)"] = pd.to_numeric(clean["Sample Year(s)"])
+    for field in ["Max Contaminant Level", "Max Contaminant Level Goal"]:
+        clean[field] = clean[field].round().astype("int64")
+    return clean
+
+
+def load_water_quality(path=None):
+    """Return the Group 002 clean table rebuilt from the raw workbook."""
+    path = path or os.path.join(REPO_ROOT, "ENG220-Group-002", "Water Data Raw.xlsx")
+    # The sheet's first header line becomes the column name, which is fine:
+    # header lines carry no data and are skipped anyway
+    return clean_water_quality(read_sheet(path))
+
+
+def _measurement(text):
+    """Parse report values such as '2.4 PPB', 'Zero PPB' or '10 PPB'."""
+    value = text.split()[0]
+    return 0.0 if value == "Zero" else float(value)
+
+
+def _is_cached(path):
+    return os.path.exists(os.path.join(EXCEL_CACHE_DIR, fingerprint(path), "sheets.json"))
+
+
+def _arrow_safe(frame):
+    """Store mixed-type object columns as text so Parquet can hold them."""
+    for col in frame.columns[frame.dtypes == object]:
+        if pd.api.types.infer_dtype(frame[col], skipna=True) not in ("string", "empty"):
+            frame[col] = frame[col].astype("string")
+    frame.columns = [str(col) for col in frame.columns]
+    return frame
+
+
+def bundled_workbooks():
+    return sorted(glob.glob(os.path.join(REPO_ROOT, "ENG220-Group-*", "*.xlsx")))
+
+
+def main(argv):
+    for path in bundled_workbooks():
+        cold = not _is_cached(path)
+        start = time.perf_counter()
+        sheets = read_workbook(path)
+        elapsed = time.perf_counter() - start
+        rows = sum(len(frame) for frame in sheets.values())
+        state = f"converted with {ENGINE}" if cold else "cached"
+        print(f"{os.path.relpath(path, REPO_ROOT)}: {len(sheets)} sheet(s), {rows} rows, "
+              f"{elapsed:.2f}s ({state})")
+
+    if "--check" in argv:
+        expected = pd.read_csv(os.path.join(REPO_ROOT, "ENG220-Group-002", "Water_Data_Clean1.csv"))
+        expected["Substance"] = expected["Substance"].str.replace(r"\s+", " ", regex=True)
+        rebuilt = load_water_quality()
+        pd.testing.assert_frame_equal(rebuilt, expected)
+        print(f"Group 002 clean table reproduced ({len(rebuilt)} rows)")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,269 @@
+# Matplotlib figures for the group pages.
+#
+# pyplot keeps every figure it creates in a global registry until plt.close,
+# which no page called, so every rerun of every chart left a figure and its
+# pixel buffer behind.  Pages get their figures from here instead: plain
+# Figure objects with their own Agg canvas that pyplot never sees.  ``show``
+# hands a figure to st.pyplot and then releases it into a small pool, where
+# the next chart reuses the figure and the canvas's pixel buffer.
+#
+#   fig, ax = figures.subplots(figsize=(10, 6))
+#   ax.plot(...)
+#   figures.show(fig)
+#
+# Each figure has its own canvas and matplotlib keeps fonts per thread, so
+# figures can be drawn on several threads at once.  Independent charts of a
+# page are drawn on a shared worker pool with ``render_parallel``, which
+# takes functions that build and return a figure (they must not call st.*).
+# Charts of a run that has been superseded are not drawn (eng220.cancel):
+#
+#   heatmap_png, scatter_png = figures.render_parallel(draw_heatmap, draw_scatter)
+#   figures.show_png(heatmap_png)
+#
+#   python -m eng220.figures    leak check: 2000 renders, then 2000 reruns of every matplotlib page;
+#                               fails if a page errors, leaves a pyplot figure open or RSS keeps growing
+
+import argparse
+import gc
+import glob
+import io
+import os
+import statistics
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from matplotlib import rcParams
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from eng220 import cancel, metrics
+
+POOL_SIZE = 8
+RENDER_WORKERS = 4
+# What st.pyplot uses, so pre-rendered charts look the same
+SAVEFIG_OPTIONS = {"format": "png", "dpi": 200, "bbox_inches": "tight"}
+_SUBPLOT_PARAMS = ["left", "bottom", "right", "top", "wspace", "hspace"]
+
+_lock = threading.Lock()
+_pool = []
+_executor = None
+
+
+def figure(figsize=None, dpi=None):
+    """Return a cleared figure of the given size, reusing a released one."""
+    with _lock:
+        fig = _pool.pop() if _pool else None
+    if fig is None:
+        fig = Figure()
+        FigureCanvasAgg(fig)
+    fig.set_size_inches(figsize or rcParams["figure.figsize"])
+    fig.set_dpi(dpi or rcParams["figure.dpi"])
+    return fig
+
+
+def subplots(nrows=1, ncols=1, figsize=None, dpi=None, **kwargs):
+    """Like ``plt.subplots``, without registering the figure with pyplot."""
+    fig = figure(figsize, dpi)
+    return fig, fig.subplots(nrows, ncols, **kwargs)
+
+
+def release(fig):
+    """Give a figure back once it has been rendered.
+
+    Figures from pyplot (e.g. seaborn's figure-level plots) are closed
+    instead, which drops them from pyplot's registry.
+    """
+    if fig.canvas.manager is not None:
+        import matplotlib.pyplot as plt
+        plt.close(fig)
+        return
+    fig.clear()
+    if fig.get_layout_engine() is not None:
+        # Resetting a layout engine is not always allowed; let it be collected
+        return
+    # tight_layout and subplots_adjust change these; start the next chart fresh
+    fig.subplots_adjust(**{p: rcParams[f"figure.subplot.{p}"] for p in _SUBPLOT_PARAMS})
+    fig.patch.set_facecolor(rcParams["figure.facecolor"])
+    with _lock:
+        if len(_pool) < POOL_SIZE and all(f is not fig for f in _pool):
+            _pool.append(fig)
+
+
+def show(fig, **kwargs):
+    """Render ``fig`` with st.pyplot, then release it."""
+    import streamlit as st
+
+    try:
+        # Rasterizing is most of the cost; skip it for a superseded run
+        cancel.checkpoint("render")
+        with metrics.timer("eng220_render_seconds", kind="pyplot"):
+            st.pyplot(fig, **kwargs)
+    finally:
+        release(fig)
+
+
+def to_png(fig):
+    """Return ``fig`` as PNG bytes and release it."""
+    buffer = io.BytesIO()
+    try:
+        with metrics.timer("eng220_render_seconds", kind="png"):
+            fig.savefig(buffer, **SAVEFIG_OPTIONS)
+    finally:
+        release(fig)
+    return buffer.getvalue()
+
+
+def render_parallel(*draws):
+    """Call each ``draw()`` on the render pool; return their figures as PNGs, in order."""
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=RENDER_WORKERS, thread_name_prefix="render")
+    run = cancel.token()
+
+    def render(draw):
+        if run is not None:
+            run.check("render")
+        fig = draw()
+        if run is not None:
+            try:
+                run.check("render")
+            except cancel.Cancelled:
+                release(fig)
+                raise
+        return to_png(fig)
+
+    futures = [_executor.submit(render, draw) for draw in draws]
+    try:
+        return [future.result() for future in futures]
+    except cancel.Cancelled:
+        for future in futures:
+            future.cancel()
+        # Ends the run; the pending rerun draws the charts for the new state
+        cancel.checkpoint("render", remaining=0)
+        return [to_png(draw()) for draw in draws]
+
+
+def show_png(png):
+    """Display a chart from ``render_parallel`` the way st.pyplot would."""
+    import streamlit as st
+
+    st.image(png, width="stretch")
+
+
+# ========== Leak check ==========
+
+def rss_mb():
+    """Resident memory of this process in MB (Linux)."""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def check_renders(renders, limit_mb):
+    """Draw and save ``renders`` charts like a page would; fail if RSS keeps growing."""
+    import io
+
+    import numpy as np
+
+    def render(i):
+        # Small and coarse so thousands of them finish in a minute or two
+        fig, ax = subplots(figsize=(4, 3), dpi=50)
+        x = np.arange(50)
+        ax.plot(x, np.sin(x / (i % 50 + 1)), marker="o")
+        ax.set_title(f"Render {i}")
+        fig.savefig(io.BytesIO(), format="png")
+        release(fig)
+
+    # Let the pool, font cache and renderer buffers reach their steady size
+    for i in range(50):
+        render(i)
+    gc.collect()
+    start = rss_mb()
+    for i in range(renders):
+        render(i)
+    gc.collect()
+    growth = rss_mb() - start
+    print(f"{renders} renders: RSS grew {growth:.1f} MB (limit {limit_mb} MB)")
+    assert growth < limit_mb, f"RSS grew {growth:.1f} MB over {renders} renders"
+
+
+def check_pages(pages, reruns, limit_mb):
+    """Render each page, then rerun it; fail on errors, kept pyplot figures or growing RSS.
+
+    Every button is clicked on every run, so charts behind "Plot Graph" are
+    drawn too.  RSS is sampled after each round of reruns and its trend has
+    to stay flat over the second half: growth up to then is caches filling,
+    and single samples swing by tens of MB as the allocator keeps or returns
+    freed pages.
+    """
+    import matplotlib.pyplot as plt
+    from streamlit.testing.v1 import AppTest
+
+    from eng220.data import REPO_ROOT
+
+    def run(page, app):
+        for button in app.button:
+            button.click()
+        app.run()
+        assert not app.exception, f"{page} failed: {app.exception[0].message}"
+        assert not plt.get_fignums(), f"{page} left {len(plt.get_fignums())} pyplot figure(s) open"
+
+    apps, failed = {}, {}
+    for page in pages:
+        app = AppTest.from_file(os.path.join(REPO_ROOT, page), default_timeout=120).run()
+        if app.exception and app.exception[0].message.startswith("<urlopen error"):
+            # Its data is downloaded, and there is no network
+            print(f"Not rendered, data unreachable: {page}")
+            continue
+        try:
+            assert not app.exception, f"{page} failed: {app.exception[0].message}"
+            run(page, app)
+        except AssertionError as e:
+            failed[page] = str(e)
+            continue
+        apps[page] = app
+    assert not failed, "\n".join(failed.values())
+    print(f"Rendered {len(apps)} pages")
+
+    gc.collect()
+    samples = [rss_mb()]
+    for i in range(reruns):
+        for page, app in apps.items():
+            run(page, app)
+        gc.collect()
+        samples.append(rss_mb())
+    growth = samples[-1] - samples[0]
+    late = samples[len(samples) // 2:]
+    late_growth = statistics.linear_regression(range(len(late)), late).slope * (len(late) - 1)
+    print(f"{reruns} reruns of {len(apps)} pages: no pyplot figures left open, RSS grew {growth:.1f} MB, "
+          f"trend {late_growth:+.1f} MB over the second half (limit {limit_mb} MB)")
+    assert late_growth < limit_mb, f"RSS trend +{late_growth:.1f} MB over the last {reruns - reruns // 2} reruns"
+
+
+def matplotlib_pages():
+    """Pages that draw with matplotlib, relative to the repository root."""
+    from eng220.data import REPO_ROOT
+
+    pages = []
+    for path in sorted(glob.glob(os.path.join(REPO_ROOT, "ENG220-Group-*", "**", "*.py"), recursive=True)):
+        with open(path, encoding="utf-8") as f:
+            if "figures." in f.read():
+                pages.append(os.path.relpath(path, REPO_ROOT))
+    return pages
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m eng220.figures")
+    parser.add_argument("pages", nargs="*", help="pages to rerun (default: every matplotlib page)")
+    parser.add_argument("--renders", type=int, default=2000)
+    parser.add_argument("--reruns", type=int, default=2000, help="reruns of each page")
+    parser.add_argument("--limit-mb", type=float, default=30.0,
+                        help="allowed RSS growth over the renders, and over the second half of the reruns")
+    args = parser.parse_args(argv)
+
+    check_renders(args.renders, args.limit_mb)
+    check_pages(args.pages or matplotlib_pages(), args.reruns, args.limit_mb)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# What one widget interaction costs: bytes sent to the browser and run time.
+#
+# A page is run with Streamlit's AppTest, then one widget is changed and the
+# page rerun the way the server would handle it: as a full rerun of the
+# script, and, when the widget sits inside a fragment, as a rerun of that
+# fragment only (what the browser asks for since the chart sections of the
+# plotter pages became fragments).  Every message the run sends is counted;
+# identical messages the browser has cached are not subtracted.
+#
+#   python -m eng220.interactions                         every page with a chart section
+#   python -m eng220.interactions ENG220-Group-001/app1.py --runs 10
+
+import argparse
+import contextlib
+import dataclasses
+import glob
+import os
+import statistics
+import time
+
+from eng220 import data
+
+# The plotter pages' chart type selector, present on every one of them
+WIDGET_LABEL = "Select Graph Type"
+WIDGET_VALUE = "Scatter"
+
+
+@contextlib.contextmanager
+def _recording(fragment_id=None):
+    """Count the bytes of messages sent by AppTest runs; optionally run only a fragment."""
+    from streamlit.runtime.scriptrunner import ScriptRunnerEvent
+    from streamlit.runtime.scriptrunner_utils.script_requests import ScriptRequests
+    from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+
+    sent = []
+    original = LocalScriptRunner.run
+
+    def on_event(sender, event, **kwargs):
+        if event == ScriptRunnerEvent.ENQUEUE_FORWARD_MSG:
+            sent.append(kwargs["forward_msg"].ByteSize())
+
+    def run(runner, *args, **kwargs):
+        runner.on_event.connect(on_event, weak=False)
+        if fragment_id is not None:
+            # What the server does when a widget inside a fragment changes.
+            # A new runner starts with a full rerun pending, which would absorb
+            # the fragment request; start from an empty queue instead.
+            runner._requests = ScriptRequests()
+            request_rerun = runner.request_rerun
+            runner.request_rerun = lambda rerun_data: request_rerun(
+                dataclasses.replace(rerun_data, fragment_id=fragment_id))
+        return original(runner, *args, **kwargs)
+
+    LocalScriptRunner.run = run
+    try:
+        yield sent
+    finally:
+        LocalScriptRunner.run = original
+
+
+def _widget(app, label):
+    for widget in app.selectbox:
+        if widget.label == label:
+            return widget
+    raise LookupError(f"No selectbox labelled '{label}'")
+
+
+def measure(page, label=WIDGET_LABEL, value=WIDGET_VALUE, runs=5):
+    """Return ``{"full": ..., "fragment": ...}`` with median bytes and ms per interaction.
+
+    "fragment" is missing when the page has no fragment to rerun.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(os.path.join(data.REPO_ROOT, page), default_timeout=120).run()
+    if app.exception:
+        raise RuntimeError(f"{page} failed: {app.exception[0].message}")
+    options = _widget(app, label).options
+    fragment_ids = list(app._fragment_storage._fragments)
+
+    results = {}
+    for mode, fragment_id in [("full", None), ("fragment", fragment_ids[0] if fragment_ids else None)]:
+        if mode == "fragment" and fragment_id is None:
+            continue
+        sizes, times = [], []
+        for i in range(runs):
+            # Alternate so every run is a real change
+            choice = value if i % 2 == 0 else options[0] if options[0] != value else options[-1]
+            _widget(app, label).set_value(choice)
+            with _recording(fragment_id) as sent:
+                start = time.perf_counter()
+                app.run()
+                times.append((time.perf_counter() - start) * 1000)
+            if app.exception:
+                raise RuntimeError(f"{page} failed: {app.exception[0].message}")
+            sizes.append(sum(sent))
+        results[mode] = {"bytes": statistics.median(sizes), "ms": statistics.median(times)}
+    return results
+
+
+def chart_section_pages():
+    """Pages whose chart controls are a fragment, relative to the repository root."""
+    pages = []
+    for path in sorted(glob.glob(os.path.join(data.REPO_ROOT, "ENG220-Group-*", "**", "*.py"), recursive=True)):
+        with open(path, encoding="utf-8") as f:
+            if "def chart_section(" in f.read():
+                pages.append(os.path.relpath(path, data.REPO_ROOT))
+    return pages
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m eng220.interactions")
+    parser.add_argument("pages", nargs="*", help="pages to measure (default: every chart-section page)")
+    parser.add_argument("--runs", type=int, default=5, help="interactions per mode")
+    args = parser.parse_args(argv)
+
+    print(f"{'page':38} {'full rerun':>20} {'fragment rerun':>20}")
+    for page in args.pages or chart_section_pages():
+        try:
+            results = measure(page, runs=args.runs)
+        except (RuntimeError, LookupError) as e:
+            print(f"{page:38} skipped: {e}")
+            continue
+        cells = [f"{r['bytes'] / 1024:9.1f} KB {r['ms']:6.0f} ms" if r else f"{'-':>20}"
+                 for r in (results.get("full"), results.get("fragment"))]
+        print(f"{page:38} {cells[0]:>20} {cells[1]:>20}")
+
+
+if __name__ == "__main__":
+    main()
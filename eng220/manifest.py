@@ -0,0 +1,233 @@
+# Manifest of the bundled datasets.
+#
+# Pages found their files by scanning: Group 004 probed seven district
+# folders and listed each, Group 017 listed its datasets folder and Group 018
+# checked 24 yearly report names, on every rerun.  MANIFEST_PATH lists every
+# CSV and workbook under the group folders with its size, content hash, row
+# count, columns and dtypes, date range and, for files that are one year of a
+# series (conreport2010.csv), the series and the year.  Pages ask the
+# manifest instead of the filesystem:
+#
+#   manifest.listdir(folder, ".csv")                    file names in a folder
+#   manifest.partitions(folder, "conreport{year}.csv")  {year: path} of a yearly series
+#
+# The manifest is generated and committed.  Adding, removing or editing a
+# dataset means regenerating it, and ``--check`` (run before deploying)
+# reports any file that no longer matches it, and any column a page relies on
+# (REQUIRED_COLUMNS) that a dataset no longer has, once instead of on every run.
+#
+#   python -m eng220.manifest            regenerate the manifest
+#   python -m eng220.manifest --check    report drift from the committed manifest; exit 1 if any
+
+import argparse
+import fnmatch
+import json
+import os
+import re
+import sys
+import threading
+import warnings
+
+import pandas as pd
+
+from eng220 import data, excel
+
+MANIFEST_PATH = os.path.join(data.REPO_ROOT, "eng220", "manifest.json")
+# Files whose first row is not the header
+READ_OPTIONS = {
+    "ENG220-Group-004/*/*.csv": {"header": 1},
+}
+# Columns pages use by name, per dataset (glob patterns relative to the repo)
+REQUIRED_COLUMNS = {
+    "ENG220-Group-017/datasets/annual_aqi_by_county_*.csv": ["State", "County", "Year", "Median AQI"],
+    "ENG220-Group-018/datasets/county_datasets/conreport*.csv": ["County", "County Code"],
+    "ENG220-Group-018/datasets/airqualitybycity2000-2023.csv": ["CBSA", "Core Based Statistical Area", "Pollutant", "Trend Statistic"],
+    "ENG220-Group-021/data/aqi_combined_1980_2024.csv": [
+        "CBSA", "Year", "AQI_Median", "AQI_Maximum", "AQI_90th_Percentile",
+        "Good", "Moderate", "Unhealthy_for_Sensitive_Groups", "Unhealthy", "Very_Unhealthy", "Hazardous",
+        "#_Days_CO", "#_Days_NO2", "#_Days_O3", "#_Days_PM2.5", "#_Days_PM10",
+    ],
+    "ENG220-Group-021/data/reshaped_snow_depth.csv": ["Site", "Water Year", "Snow Depth (in)"],
+    "ENG220-Group-021/data/fixed_ground_water_cleaned.csv": ["Water Year", "Static Water Level (ft)"],
+}
+# One year in a file name, not part of a longer number
+YEAR = re.compile(r"(?<!\d)((?:19|20)\d\d)(?!\d)")
+
+_lock = threading.Lock()
+_manifest = None
+
+
+# ========== Lookups ==========
+
+def get():
+    """Return the manifest, read once per process (generated if it is missing)."""
+    global _manifest
+    with _lock:
+        if _manifest is None:
+            try:
+                with open(MANIFEST_PATH) as f:
+                    _manifest = json.load(f)
+            except FileNotFoundError:
+                _manifest = build()
+                write(_manifest)
+        return _manifest
+
+
+def _relpath(path):
+    return os.path.relpath(os.path.abspath(path), data.REPO_ROOT).replace(os.sep, "/")
+
+
+def entry(path):
+    """Return the manifest entry of a dataset file, or None."""
+    return get()["datasets"].get(_relpath(path))
+
+
+def paths():
+    """Return the absolute paths of every dataset in the manifest."""
+    return [os.path.join(data.REPO_ROOT, p) for p in get()["datasets"]]
+
+
+def listdir(folder, suffix=""):
+    """Return the names of the datasets directly in ``folder`` ending with ``suffix``."""
+    prefix = _relpath(folder) + "/"
+    return sorted(p[len(prefix):] for p in get()["datasets"]
+                  if p.startswith(prefix) and "/" not in p[len(prefix):] and p.endswith(suffix))
+
+
+def partitions(folder, pattern):
+    """Return ``{year: path}`` of the files in ``folder`` named like ``pattern`` ("x{year}.csv")."""
+    series = f"{_relpath(folder)}/{pattern}"
+    found = {}
+    for path, info in get()["datasets"].items():
+        partition = info.get("partition")
+        if partition and partition["series"] == series:
+            found[partition["year"]] = os.path.join(data.REPO_ROOT, path)
+    return dict(sorted(found.items()))
+
+
+# ========== Build ==========
+
+def _options(relpath):
+    for pattern, options in READ_OPTIONS.items():
+        if fnmatch.fnmatch(relpath, pattern):
+            return options
+    return {}
+
+
+def _date_range(frame):
+    """Return the span of the first year or date column, or None."""
+    for column in frame.columns:
+        name = str(column).lower()
+        values = frame[column].dropna()
+        if not len(values):
+            continue
+        if name.endswith("year") and pd.api.types.is_integer_dtype(values):
+            return {"column": str(column), "min": int(values.min()), "max": int(values.max())}
+        if "date" in name or "time" in name:
+            with warnings.catch_warnings():
+                # Formats vary by file; unparseable values just become NaT
+                warnings.simplefilter("ignore")
+                dates = pd.to_datetime(values, errors="coerce").dropna()
+            if len(dates) >= 0.9 * len(values):
+                return {"column": str(column), "min": dates.min().isoformat(), "max": dates.max().isoformat()}
+    return None
+
+
+def _schema(frame):
+    return {str(column): str(dtype) for column, dtype in frame.dtypes.items()}
+
+
+def describe(path):
+    """Return the manifest entry of one file, read from disk."""
+    relpath = _relpath(path)
+    info = {"bytes": os.path.getsize(path), "sha256": data.fingerprint(path)}
+    if path.lower().endswith(".xlsx"):
+        info["sheets"] = {name: {"rows": len(sheet), "columns": _schema(sheet)}
+                          for name, sheet in excel.read_workbook(path).items()}
+        return info
+    options = _options(relpath)
+    if options:
+        info["read_options"] = options
+    try:
+        frame = pd.read_csv(path, **options)
+    except Exception as e:
+        info["error"] = f"{type(e).__name__}: {e}"
+        return info
+    info.update(rows=len(frame), columns=_schema(frame), date_range=_date_range(frame))
+    return info
+
+
+def build():
+    """Describe every bundled CSV and workbook."""
+    files = sorted(_relpath(p) for p in data.bundled_csvs() + excel.bundled_workbooks())
+    datasets = {relpath: describe(os.path.join(data.REPO_ROOT, relpath)) for relpath in files}
+
+    # A year in the name of two or more otherwise identical names marks a series
+    series = {}
+    for relpath in files:
+        folder, name = relpath.rsplit("/", 1)
+        years = YEAR.findall(name)
+        if len(years) == 1:
+            series.setdefault(f"{folder}/{YEAR.sub('{year}', name)}", []).append((relpath, int(years[0])))
+    for name, members in series.items():
+        if len(members) > 1:
+            for relpath, year in members:
+                datasets[relpath]["partition"] = {"series": name, "year": year}
+    return {"datasets": datasets}
+
+
+def write(manifest, path=MANIFEST_PATH):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp_path, path)
+
+
+# ========== Check ==========
+
+def drift(saved, current):
+    """Return one line per difference between two manifests and per missing required column."""
+    problems = []
+    old, new = saved["datasets"], current["datasets"]
+    for relpath in sorted(old.keys() - new.keys()):
+        problems.append(f"{relpath}: in the manifest but not on disk")
+    for relpath in sorted(new.keys() - old.keys()):
+        problems.append(f"{relpath}: on disk but not in the manifest")
+    for relpath in sorted(old.keys() & new.keys()):
+        changed = [key for key in sorted(old[relpath].keys() | new[relpath].keys())
+                   if old[relpath].get(key) != new[relpath].get(key)]
+        if changed:
+            problems.append(f"{relpath}: {', '.join(changed)} changed")
+    for pattern, columns in REQUIRED_COLUMNS.items():
+        matches = [p for p in new if fnmatch.fnmatch(p, pattern)]
+        if not matches:
+            problems.append(f"{pattern}: no dataset matches")
+        for relpath in matches:
+            missing = [c for c in columns if c not in new[relpath].get("columns", {})]
+            if missing:
+                problems.append(f"{relpath}: missing columns {missing}")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m eng220.manifest")
+    parser.add_argument("--check", action="store_true", help="compare the datasets with the committed manifest")
+    args = parser.parse_args(argv)
+
+    current = build()
+    if not args.check:
+        write(current)
+        print(f"{len(current['datasets'])} datasets written to {_relpath(MANIFEST_PATH)}")
+        return
+    with open(MANIFEST_PATH) as f:
+        problems = drift(json.load(f), current)
+    for problem in problems:
+        print(problem)
+    if problems:
+        sys.exit(1)
+    print(f"{len(current['datasets'])} datasets match the manifest")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+# Prometheus-format metrics of the running dashboard.
+#
+# Counters and histograms are kept in process memory by the code they
+# describe: page reruns (per page of .streamlit/pages_sections.toml), dataset
+# loads, chart renders, and the hits, misses and evictions of every cache
+# (shared datasets, offloaded jobs, dataframe payloads, Plotly figures,
+# stored results, static charts).  Live sessions and process memory are read
+# when the metrics are rendered.  The service writes them in the Prometheus
+# text format to CACHE_DIR/metrics.<pid>.prom every WRITE_INTERVAL seconds and,
+# when ENG220_METRICS_PORT is set, also serves them at
+# http://127.0.0.1:<port>/metrics.  Every server process keeps its own
+# metrics: each writes its own file, and each serves on the first free port
+# from ENG220_METRICS_PORT up (at most MAX_PORTS of them; a process finding
+# none only writes the file).  Files of processes that have exited are removed
+# when the next service starts.  Nothing needs a network or a Prometheus
+# server to be read.
+#
+#   metrics.cache("tables", "hits")
+#   with metrics.timer("eng220_load_seconds", loader="load_csv"):
+#       ...
+#
+#   python -m eng220.metrics    run a few pages, then read the file and scrape the endpoint
+
+import argparse
+import collections
+import contextlib
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WRITE_INTERVAL = 15.0
+MAX_PORTS = 16  # server processes that can each serve from ENG220_METRICS_PORT up
+# Seconds; reruns, loads and renders all fall in this span
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DESCRIPTIONS = {
+    "eng220_rerun_seconds": ("histogram", "Duration of a page script run."),
+    "eng220_load_seconds": ("histogram", "Time spent parsing datasets into the shared registry."),
+    "eng220_render_seconds": ("histogram", "Time spent rasterizing or rendering a chart."),
+    "eng220_cache_hits_total": ("counter", "Lookups served from a cache."),
+    "eng220_cache_misses_total": ("counter", "Lookups that had to compute their value."),
+    "eng220_cache_evictions_total": ("counter", "Entries dropped from a cache to respect its limits."),
+}
+
+_lock = threading.RLock()
+_counters = collections.defaultdict(float)  # (name, labels) -> value
+_histograms = {}                            # (name, labels) -> [count per bucket..., +Inf, sum]
+_gauges = {}                                # name -> (help, function returning {labels: value})
+_service = None
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+def inc(name, value=1, **labels):
+    """Add ``value`` to a counter."""
+    with _lock:
+        _counters[name, _labels(labels)] += value
+
+
+def observe(name, seconds, **labels):
+    """Record one duration in a histogram."""
+    key = (name, _labels(labels))
+    with _lock:
+        buckets = _histograms.setdefault(key, [0] * (len(BUCKETS) + 2))
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                buckets[i] += 1
+        buckets[-2] += 1
+        buckets[-1] += seconds
+
+
+@contextlib.contextmanager
+def timer(name, **labels):
+    """Observe how long the block takes, also when it raises (st.stop, reruns)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+def cache(name, event, count=1):
+    """Count ``"hits"``, ``"misses"`` or ``"evictions"`` of the cache ``name``."""
+    inc(f"eng220_cache_{event}_total", count, cache=name)
+
+
+def gauge(name, description, read):
+    """Register a gauge; ``read()`` returns ``{labels dict as tuple: value}`` when rendered."""
+    _gauges[name] = (description, read)
+
+
+def rerun(page):
+    """Time one run of a page script, labelled by its path in the navigation TOML."""
+    from eng220 import data
+
+    page = os.path.relpath(os.path.abspath(page), data.REPO_ROOT).replace(os.sep, "/")
+    return timer("eng220_rerun_seconds", page=page)
+
+
+def _format_value(value):
+    # Full precision; counters past a million and nanosecond sums keep every digit
+    return repr(float(value))
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in labels)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + "}"
+
+
+def render():
+    """Return every metric in the Prometheus text exposition format."""
+    with _lock:
+        counters = dict(_counters)
+        histograms = {key: list(buckets) for key, buckets in _histograms.items()}
+    by_name = collections.defaultdict(list)
+    for (name, labels), value in counters.items():
+        by_name[name].append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    for (name, labels), buckets in sorted(histograms.items()):
+        for bound, count in zip(BUCKETS + ("+Inf",), buckets[:-1]):
+            by_name[name].append(f"{name}_bucket{_format_labels(labels + (('le', str(bound)),))} {count}")
+        by_name[name].append(f"{name}_sum{_format_labels(labels)} {_format_value(buckets[-1])}")
+        by_name[name].append(f"{name}_count{_format_labels(labels)} {buckets[-2]}")
+
+    lines = []
+    for name in sorted(by_name):
+        kind, description = DESCRIPTIONS.get(name, ("untyped", ""))
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} {kind}", *sorted(by_name[name])]
+    for name, (description, read) in sorted(_gauges.items()):
+        try:
+            values = read()
+        except Exception:
+            # A gauge that cannot be read right now is left out of this scrape
+            continue
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} gauge"]
+        lines += [f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in sorted(values.items())]
+    return "\n".join(lines) + "\n"
+
+
+# ========== Gauges ==========
+
+def _live_sessions():
+    from streamlit.runtime import Runtime
+
+    if not Runtime.exists():
+        return {(): 0}
+    return {(): Runtime.instance()._session_mgr.num_active_sessions()}
+
+
+def _resident_memory():
+    from eng220 import figures
+
+    return {(): figures.rss_mb() * 2**20}
+
+
+def _shared_datasets():
+    from eng220 import data
+
+    with data._lock:
+        entries = list(data._datasets.values())
+    return {(): sum(entry.nbytes for entry in entries)}
+
+
+gauge("eng220_sessions", "Browser sessions connected to the server.", _live_sessions)
+gauge("process_resident_memory_bytes", "Resident memory of the server process.", _resident_memory)
+gauge("eng220_shared_dataset_bytes", "Memory held by the shared dataset registry.", _shared_datasets)
+
+
+# ========== Service ==========
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would flood the server log
+        pass
+
+
+class MetricsService:
+    def __init__(self, path, port=None, interval=WRITE_INTERVAL, ports=1):
+        self.path = path
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="metrics", daemon=True)
+        self.server = _bind(port, ports) if port is not None else None
+
+    def start(self, pages=()):
+        # Every page has a series from the start, also the ones nobody opened yet
+        for page in pages:
+            with _lock:
+                _histograms.setdefault(("eng220_rerun_seconds", (("page", page),)), [0] * (len(BUCKETS) + 2))
+        self.thread.start()
+        if self.server is not None:
+            threading.Thread(target=self.server.serve_forever, name="metrics-http", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+        self.write()
+
+    def write(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(render())
+        # Collectors reading the file never see half of it
+        os.replace(tmp_path, self.path)
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            self.write()
+
+
+def _bind(port, ports):
+    """Serve on the first free port of ``port`` .. ``port + ports - 1``; None if all are taken."""
+    for offset in range(ports):
+        try:
+            return ThreadingHTTPServer(("127.0.0.1", port + offset if port else 0), _Handler)
+        except OSError:
+            # Taken by another server process (or anything else); try the next one
+            continue
+    return None
+
+
+def _remove_stale(directory):
+    # metrics.<pid>.prom of processes that have exited
+    with contextlib.suppress(FileNotFoundError):
+        for entry in os.scandir(directory):
+            match = re.fullmatch(r"metrics\.(\d+)\.prom", entry.name)
+            if match is None or int(match.group(1)) == os.getpid():
+                continue
+            try:
+                os.kill(int(match.group(1)), 0)
+            except ProcessLookupError:
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(entry.path)
+            except PermissionError:
+                pass
+
+
+def get_service():
+    """Return the process-wide metrics writer (and endpoint), starting it on first use."""
+    global _service
+    from eng220 import data, warmup
+
+    with _lock:
+        if _service is None:
+            port = os.environ.get("ENG220_METRICS_PORT")
+            _remove_stale(data.CACHE_DIR)
+            _service = MetricsService(os.path.join(data.CACHE_DIR, f"metrics.{os.getpid()}.prom"),
+                                      int(port) if port else None, ports=MAX_PORTS)
+            _service.start(warmup.page_order())
+        return _service
+
+
+# ========== Check ==========
+
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{([a-zA-Z_][a-zA-Z0-9_]*="(\\.|[^"\\])*",?)*\})? [^ ]+$')
+
+
+def parse(text):
+    """Return ``{sample name with labels: value}``; raise ValueError on a malformed line."""
+    samples = {}
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        if not SAMPLE.match(line):
+            raise ValueError(f"Malformed sample: {line}")
+        name, value = line.rsplit(" ", 1)
+        try:
+            samples[name] = float(value)
+        except ValueError:
+            raise ValueError(f"Malformed sample: {line}") from None
+    return samples
+
+
+def main(argv=None):
+    import tempfile
+    import urllib.request
+
+    from streamlit.testing.v1 import AppTest
+
+    # The pages record into eng220.metrics, not into this module run as __main__
+    from eng220 import data, metrics
+
+    parser = argparse.ArgumentParser(prog="python -m eng220.metrics")
+    parser.add_argument("pages", nargs="*", default=["ENG220-Group-012/app12.py", "ENG220-Group-021/pages/page21.1.py"])
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "metrics.prom")
+        service = metrics.MetricsService(path, port=0, interval=0.5).start(args.pages)
+        for page in args.pages:
+            app = AppTest.from_file(os.path.join(data.REPO_ROOT, page), default_timeout=120)
+            for _ in range(2):
+                with metrics.rerun(page):
+                    app.run()
+        time.sleep(1)
+        with open(path) as f:
+            written = metrics.parse(f.read())
+        port = service.server.server_address[1]
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+            scraped = metrics.parse(response.read().decode())
+        service.stop()
+
+        # A second server process on the same ENG220_METRICS_PORT serves on the next port
+        first = metrics.MetricsService(os.path.join(tmp_dir, "a.prom"), port=port, ports=2)
+        second = metrics.MetricsService(os.path.join(tmp_dir, "b.prom"), port=port, ports=2)
+        assert first.server.server_address[1] == port and second.server.server_address[1] == port + 1
+        third = metrics.MetricsService(os.path.join(tmp_dir, "c.prom"), port=port, ports=2)
+        assert third.server is None
+        for other in (first, second):
+            other.server.server_close()
+
+    # Counts and sums keep every digit
+    metrics.inc("eng220_check_total", 123456789)
+    metrics.observe("eng220_check_seconds", 1e-05)
+    rendered = metrics.parse(metrics.render())
+    assert rendered["eng220_check_total"] == 123456789 and rendered["eng220_check_seconds_sum"] == 1e-05
+
+    for page in args.pages:
+        label = f'{{page="{page}"}}'
+        runs = scraped[f"eng220_rerun_seconds_count{label}"]
+        total = scraped[f"eng220_rerun_seconds_sum{label}"]
+        print(f"{page:40} {runs:.0f} runs, {total / runs * 1000:6.0f} ms mean")
+    for name in sorted(scraped):
+        if name.startswith(("eng220_cache", "eng220_load_seconds_count", "eng220_render_seconds_count",
+                            "eng220_sessions", "process_resident", "eng220_shared")):
+            print(f"  {name} {scraped[name]:g}")
+    print(f"{len(written)} samples in the file, {len(scraped)} from the endpoint; both parse")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,486 @@
+# CPU-heavy pandas transforms run in worker processes.
+#
+# Parsing dates, resampling and stacking dozens of files hold the GIL for
+# seconds, and while a page does that on its script thread every other session
+# in the server waits.  Such transforms are registered here by name and run in
+# a small process pool instead.  A worker writes its result as an Arrow IPC
+# stream into a shared-memory block and only the block's name travels back
+# through the pool's pipe; the server maps the block and rebuilds the frame.
+# The server owns the blocks from then on: a block is unlinked once it is read,
+# when its job is evicted unread or loses a race with an identical job, and at
+# exit.  Blocks are named after the server's pid, so the ones left by a server
+# that was killed are removed when the next one starts its pool.
+#
+# Jobs are keyed like eng220.data's datasets: the code of the transform's
+# module and of the eng220 modules it imports, the content hash of every input
+# file and the parameters.  Identical requests from
+# any session share one job, and finished results are kept (up to MAX_RESULTS).
+# Workers also store results on disk (eng220.persist), so after a restart the
+# first request for an unchanged input reads the result instead of computing it.
+#
+# A page submits a job and asks for its result.  Until the job is done,
+# ``result`` draws a placeholder with a fragment that polls the job, returns
+# None, and the page renders everything else; once it finishes the page reruns.
+#
+#   job = offload.submit("group004_daily", file_path)
+#   daily_data = offload.result(job, "Aggregating readings by day...")
+#   if daily_data is not None:
+#       ...
+#
+#   python -m eng220.offload    how long each transform stalls the server thread, inline vs offloaded
+
+import argparse
+import atexit
+import collections
+import contextlib
+import functools
+import hashlib
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import resource_tracker, shared_memory
+
+import pandas as pd
+import pyarrow as pa
+
+from eng220 import categories, data, metrics, persist, tail
+
+WORKERS = 2
+MAX_RESULTS = 32
+POLL_INTERVAL = 0.5  # seconds between placeholder checks
+SHM_PREFIX = "eng220-"
+SHM_DIR = "/dev/shm"  # where POSIX shared memory is visible, on Linux
+
+TRANSFORMS = {}  # name -> function
+
+_lock = threading.Lock()
+_jobs = collections.OrderedDict()  # job key -> Job, least recently used first
+_blocks = set()  # shared-memory blocks returned to this server and not unlinked yet
+_executor = None
+
+
+def transform(name):
+    """Register ``fn(*inputs, **params)`` as an offloadable transform.
+
+    ``fn`` returns a DataFrame or Series, or a dict of them.  Inputs that are
+    files are keyed by content, anything else (a URL, a list of years) by value.
+    """
+    def register(fn):
+        TRANSFORMS[name] = fn
+        return fn
+    return register
+
+
+class Job:
+    def __init__(self, key, name, future, inputs=(), params=None):
+        self.key = key
+        self.name = name
+        self.future = future
+        self.inputs = inputs  # kept to run it again on changed files (eng220.reload)
+        self.params = params or {}
+        self._lock = threading.Lock()
+        self._value = None
+        self.freed = False  # evicted before it was read; its blocks are gone
+        self.reported = False  # a failure has been raised to a page
+
+    def done(self):
+        return self.future.done()
+
+    def resubmit(self):
+        """Return the job now kept for the same transform and inputs."""
+        return submit(self.name, *self.inputs, **self.params)
+
+    def retry(self):
+        """Whether a new request should run the transform again."""
+        return self.reported and self.future.exception() is not None
+
+    def result(self):
+        """Wait for the job and return its result (shallow copies, like ``load_csv``)."""
+        if self.future.exception() is not None:
+            self.reported = True
+        with self._lock:
+            freed = self.freed
+            if not freed and self._value is None:
+                self._value = {part: _read_shared(*block) for part, block in self.future.result().items()}
+        if freed:
+            # Evicted before it was read: a new job reads the stored result.  Pages go
+            # through ``result``, which shows the placeholder instead of waiting here
+            return self.resubmit().result()
+        if None in self._value:
+            return _copy(self._value[None])
+        return {part: _copy(value) for part, value in self._value.items()}
+
+
+@functools.cache
+def _source_digest(name):
+    # The transform's module and the eng220 modules it uses (tail, categories, ...)
+    return persist.key(persist.source_key(TRANSFORMS[name]))
+
+
+def result_key(name, inputs, params):
+    """Return the key of a transform's result in eng220.persist."""
+    return persist.key(name, _source_digest(name), persist.input_key(list(inputs)), data._options_key(params))
+
+
+def _get_executor(broken=None):
+    """Return the worker pool, replacing ``broken`` if it is still the current one."""
+    global _executor
+    with _lock:
+        if _executor is not None and _executor is broken:
+            # A worker died (e.g. out of memory); its pool accepts no more jobs
+            _executor = None
+        if _executor is None:
+            # Forking a server that runs threads can copy held locks into the
+            # child; workers start from a fresh interpreter instead
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            _executor = ProcessPoolExecutor(max_workers=WORKERS, mp_context=context)
+            _remove_orphans()
+        return _executor
+
+
+def submit(name, *inputs, **params):
+    """Start ``name`` on the pool, or return the job already running or done for it."""
+    if name not in TRANSFORMS:
+        raise ValueError(f"Unknown transform '{name}'")
+    # Recorded for the page, so eng220.warmup can run it before the page's next visitor
+    data._track("offload", [name, _portable(list(inputs))], params)
+    key = (name, _source_digest(name), repr(persist.input_key(list(inputs))), data._options_key(params))
+    with _lock:
+        job = _jobs.get(key)
+        if job is not None and not job.retry():
+            _jobs.move_to_end(key)
+            metrics.cache("jobs", "hits")
+            return job
+    metrics.cache("jobs", "misses")
+    executor = _get_executor()
+    try:
+        future = executor.submit(_run, name, inputs, params, os.getpid())
+    except BrokenProcessPool:
+        future = _get_executor(broken=executor).submit(_run, name, inputs, params, os.getpid())
+    future.add_done_callback(_adopt)
+    evicted = []
+    with _lock:
+        job = _jobs.get(key)
+        if job is None or job.retry():
+            # A failure is shown once, then the next request tries again
+            job = _jobs[key] = Job(key, name, future, inputs, params)
+        else:
+            # Another session submitted the same job meanwhile
+            if not future.cancel():
+                future.add_done_callback(_free_future)
+        _jobs.move_to_end(key)
+        while len(_jobs) > MAX_RESULTS:
+            evicted.append(_jobs.popitem(last=False)[1])
+            metrics.cache("jobs", "evictions")
+    for old in evicted:
+        # Outside the lock: releasing waits for a page still reading the job
+        old.future.add_done_callback(lambda future, old=old: _release(old))
+    return job
+
+
+def replay(spec):
+    """Submit a job recorded by ``data.track_loads``; return it."""
+    _, (name, inputs), params = spec
+    return submit(name, *_portable(inputs, back=True), **params)
+
+
+def _portable(value, back=False):
+    # Files in the repository are recorded relative to it, so the specs outlive a checkout's location
+    if isinstance(value, (list, tuple)):
+        return [_portable(v, back) for v in value]
+    if back and isinstance(value, str) and os.path.isfile(os.path.join(data.REPO_ROOT, value)):
+        return os.path.join(data.REPO_ROOT, value)
+    if not back and isinstance(value, str) and os.path.isfile(value):
+        return data._relpath(os.path.abspath(value))
+    return value
+
+
+# ========== Shared-memory blocks ==========
+
+def _blocks_of(future):
+    if future.cancelled() or future.exception() is not None:
+        return []
+    return [block[0] for block in future.result().values()]
+
+
+def _adopt(future):
+    with _lock:
+        _blocks.update(_blocks_of(future))
+
+
+def _unlink(name):
+    with _lock:
+        _blocks.discard(name)
+    with contextlib.suppress(FileNotFoundError):
+        shm = shared_memory.SharedMemory(name=name)
+        shm.close()
+        shm.unlink()
+
+
+def _free_future(future):
+    for name in _blocks_of(future):
+        _unlink(name)
+
+
+def _release(job):
+    """Unlink the blocks of an evicted job that nobody read."""
+    with job._lock:
+        if job._value is None and not job.freed:
+            job.freed = True
+            _free_future(job.future)
+
+
+@atexit.register
+def _unlink_all():
+    with _lock:
+        names = list(_blocks)
+    for name in names:
+        _unlink(name)
+
+
+def _remove_orphans():
+    """Unlink blocks left by servers that are no longer running (killed before their exit sweep)."""
+    if not os.path.isdir(SHM_DIR):
+        return
+    for entry in os.listdir(SHM_DIR):
+        if not entry.startswith(SHM_PREFIX):
+            continue
+        try:
+            owner = int(entry[len(SHM_PREFIX):].split("-", 1)[0])
+            os.kill(owner, 0)
+        except ValueError:
+            continue
+        except ProcessLookupError:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(os.path.join(SHM_DIR, entry))
+        except PermissionError:
+            # Alive, owned by another user
+            pass
+
+
+def result(job, message="Crunching the numbers..."):
+    """Return the job's result, or show ``message`` until it is ready and return None.
+
+    The placeholder is a fragment that checks the job every POLL_INTERVAL
+    seconds and reruns the page once it is done.  Errors of the job are raised.
+    """
+    import streamlit as st
+
+    if job.freed:
+        # Evicted before this page read it; not recomputed on the script thread
+        job = job.resubmit()
+    if job.done():
+        return job.result()
+
+    @st.fragment(run_every=POLL_INTERVAL, key=f"offload-{hashlib.sha256(repr(job.key).encode()).hexdigest()[:16]}")
+    def placeholder():
+        if job.done():
+            st.rerun()
+        st.info(f":hourglass_flowing_sand: {message}")
+
+    placeholder()
+    return None
+
+
+def jobs_reading(paths):
+    """Return the jobs kept whose inputs include any of ``paths``."""
+    paths = {os.path.abspath(p) for p in paths}
+
+    def files(value):
+        if isinstance(value, (list, tuple)):
+            return {f for v in value for f in files(v)}
+        return {os.path.abspath(value)} if isinstance(value, str) and os.path.isfile(value) else set()
+
+    with _lock:
+        jobs = list(_jobs.values())
+    return [job for job in jobs if files(job.inputs) & paths]
+
+
+def _copy(value):
+    return value.copy(deep=False)
+
+
+# ========== Worker side ==========
+
+def _run(name, inputs, params, owner):
+    """Run a transform in a worker; return ``{part: (shm name, size, series name)}``."""
+    key = result_key(name, inputs, params)
+    # Downloads are fetched again once a day
+    value = persist.load(key, persist.REMOTE_MAX_AGE if persist.is_remote(list(inputs)) else None)
+    if value is None:
+        value = TRANSFORMS[name](*inputs, **params)
+        persist.save(key, value)
+    parts = value if isinstance(value, dict) else {None: value}
+    return {part: _write_shared(frame, owner) for part, frame in parts.items()}
+
+
+def _write_shared(value, owner):
+    # A Series travels as a one-column frame; ``series`` is its name, if any
+    series = (value.name,) if isinstance(value, pd.Series) else None
+    frame = value.to_frame() if series else value
+    try:
+        table = pa.Table.from_pandas(frame)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Columns mixing numbers and text become text, as in the Parquet caches
+        from eng220.excel import _arrow_safe
+        table = pa.Table.from_pandas(_arrow_safe(frame.copy()))
+
+    # Measure the stream first, then write it straight into the block
+    size = _write_stream(pa.MockOutputStream(), table)
+    name = f"{SHM_PREFIX}{owner}-{uuid.uuid4().hex[:16]}"
+    shm = shared_memory.SharedMemory(name=name, create=True, size=max(size, 1))
+    try:
+        _write_stream(pa.FixedSizeBufferWriter(pa.py_buffer(shm.buf)), table)
+    except BaseException:
+        shm.close()
+        shm.unlink()
+        raise
+    shm.close()
+    # The server owns the block from here on and unlinks it
+    resource_tracker.unregister(shm._name, "shared_memory")
+    return shm.name, size, series
+
+
+def _write_stream(sink, table):
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.tell()
+
+
+def _read_shared(name, size, series):
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        view = shm.buf[:size]
+        frame = pa.ipc.open_stream(view).read_all().to_pandas()
+        view.release()
+    finally:
+        shm.close()
+        shm.unlink()
+        with _lock:
+            _blocks.discard(name)
+    return frame.iloc[:, 0].rename(series[0]) if series else frame
+
+
+# ========== Transforms ==========
+
+@transform("group004_daily")
+def group004_daily(path):
+    # Only the rows appended since the last version are parsed (eng220/tail.py)
+    return tail.daily(path)
+
+
+@transform("group010_incidents")
+def group010_incidents(url):
+    chunks = pd.read_csv(url, encoding="ISO-8859-1", sep=",", on_bad_lines="skip", chunksize=1000)
+    df = pd.concat([chunk for chunk in chunks], ignore_index=True).dropna()
+    df['Incident Date'] = pd.to_datetime(df['Incident Date'], errors='coerce')
+    df.dropna(subset=['Incident Date'], inplace=True)
+    df['day_of_week'] = df['Incident Date'].dt.day_name()
+
+    month_year = df['Incident Date'].dt.to_period('M')
+    return {
+        "incidents": df,
+        "monthly": month_year.value_counts().sort_index(),
+        # One bar per place or gender combination would be unreadable
+        "gender": categories.aggregate(df['Participant Gender'], how="count"),
+        "city_or_county": categories.aggregate(df['City Or County'], how="count"),
+        "date": df['Incident Date'].dt.date.value_counts().sort_index(),
+    }
+
+
+@transform("group017_aqi")
+def group017_aqi(paths):
+    aqi_df = pd.concat([data.load_csv(p) for p in paths], ignore_index=True)
+    aqi_df["Year"] = pd.to_numeric(aqi_df["Year"], errors="coerce")
+    return aqi_df.dropna(subset=["Year", "State", "County"])
+
+
+@transform("group017_weather")
+def group017_weather(path):
+    weather_df = data.load_csv(path)
+    weather_df["Date_Time"] = pd.to_datetime(weather_df["Date_Time"], errors="coerce")
+    weather_df["Year"] = weather_df["Date_Time"].dt.year
+    for col in ["Temperature_C", "Humidity_pct", "Precipitation_mm", "Wind_Speed_kmh"]:
+        if col in weather_df.columns:
+            weather_df[col] = pd.to_numeric(weather_df[col], errors="coerce")
+    return weather_df
+
+
+@transform("group017_correlation")
+def group017_correlation(aqi_paths, weather_path):
+    aqi_avg = group017_aqi(aqi_paths).groupby("Year").mean(numeric_only=True).reset_index()
+    weather_avg = group017_weather(weather_path).groupby("Year").mean(numeric_only=True).reset_index()
+    combined = pd.merge(aqi_avg, weather_avg, on="Year", suffixes=("_aqi", "_weather"))
+    return combined.corr()
+
+
+@transform("group018_county_reports")
+def group018_county_reports(paths, years):
+    # '.' marks a missing value in the county reports
+    return data.concat_csvs(paths, keys=years, key_name='Year', na_values='.')
+
+
+# ========== Responsiveness check ==========
+
+def _stall(work):
+    """Run ``work()`` while a heartbeat thread ticks; return (seconds, longest gap)."""
+    gaps, stop = [0.0], threading.Event()
+
+    def heartbeat():
+        last = time.perf_counter()
+        while not stop.wait(0.005):
+            now = time.perf_counter()
+            gaps[0] = max(gaps[0], now - last)
+            last = now
+
+    ticker = threading.Thread(target=heartbeat)
+    ticker.start()
+    start = time.perf_counter()
+    try:
+        work()
+    finally:
+        elapsed = time.perf_counter() - start
+        stop.set()
+        ticker.join()
+    return elapsed, gaps[0]
+
+
+def example_jobs():
+    """``(name, inputs)`` of the bundled page transforms that work offline."""
+    root = data.REPO_ROOT
+    g004 = os.path.join(root, "ENG220-Group-004", "District 1", "Tijeras Arroyo Discharge and Gage Height Data.csv")
+    g017 = os.path.join(root, "ENG220-Group-017", "datasets")
+    aqi = sorted(os.path.join(g017, f) for f in os.listdir(g017) if f.startswith("annual_aqi_by_county_"))
+    weather = os.path.join(g017, "weather_data.csv")
+    county_dir = os.path.join(root, "ENG220-Group-018", "datasets", "county_datasets")
+    years = [y for y in range(2000, 2024) if os.path.exists(os.path.join(county_dir, f"conreport{y}.csv"))]
+    counties = [os.path.join(county_dir, f"conreport{y}.csv") for y in years]
+    jobs = [("group004_daily", [g004], {}), ("group017_aqi", [aqi], {})]
+    if os.path.exists(weather):
+        # Not bundled; the page asks for an upload-sized file
+        jobs += [("group017_weather", [weather], {}), ("group017_correlation", [aqi, weather], {})]
+    return jobs + [("group018_county_reports", [counties, years], {})]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m eng220.offload")
+    parser.add_argument("names", nargs="*", help="transforms to time (default: all that work offline)")
+    args = parser.parse_args(argv)
+
+    jobs = [job for job in example_jobs() if not args.names or job[0] in args.names]
+    # Start the workers first so their start-up is not counted
+    _get_executor().submit(int).result()
+    print(f"{'transform':26} {'inline':>9} {'stall':>9} {'offload':>9} {'stall':>9}")
+    for name, inputs, params in jobs:
+        inline, inline_gap = _stall(lambda: TRANSFORMS[name](*inputs, **params))
+        offload, offload_gap = _stall(lambda: submit(name, *inputs, **params).result())
+        print(f"{name:26} {inline:8.2f}s {inline_gap:8.3f}s {offload:8.2f}s {offload_gap:8.3f}s")
+
+
+if __name__ == "__main__":
+    main()
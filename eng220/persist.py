@@ -0,0 +1,280 @@
+# Derived results kept on disk across restarts.
+#
+# The offloaded transforms and the cached loaders kept their results in
+# process memory only, so every deploy or restart recomputed every one of
+# them for the first visitors.  Results are now also written under
+# CACHE_DIR/results/, one file per result: zstd-compressed Arrow streams of
+# the frame, or of each frame of a dict of them.  A result's key is the
+# function's identity, the content hash of the file defining it and of every
+# eng220 module that file imports (the readers and helpers it calls), and the
+# content hash of every input file (other inputs by value), so editing the
+# code or the data never serves an old result.  Results of inputs that are not files (URLs) expire
+# after REMOTE_MAX_AGE.
+#
+# Files are written to a temporary name and renamed into place, so the
+# server and its worker processes can read and write the same directory at
+# once: a reader sees a complete file or none.  A hit touches the file and
+# the directory is trimmed to MAX_BYTES, least recently used first.  The last
+# MEMORY_ENTRIES results are also kept decoded in memory.
+#
+#   @persist.cached()
+#   def load_data(url): ...
+#
+#   python -m eng220.persist    time the offloaded transforms cold, from disk and from memory
+
+import argparse
+import collections
+import functools
+import hashlib
+import inspect
+import io
+import json
+import os
+import struct
+import sys
+import threading
+import time
+
+import pandas as pd
+import pyarrow as pa
+
+from eng220 import data, metrics
+
+RESULTS_DIR = os.path.join(data.CACHE_DIR, "results")
+MAX_BYTES = int(os.environ.get("ENG220_RESULTS_MB", 1024)) * 2**20
+MEMORY_ENTRIES = 32
+REMOTE_MAX_AGE = 24 * 3600  # seconds
+COMPRESSION = "zstd" if pa.Codec.is_available("zstd") else None
+FORMAT = 1  # part of every key; bump when the file layout changes
+
+_lock = threading.Lock()
+_memory = collections.OrderedDict()  # key -> (created, value), least recently used first
+_counts = collections.Counter()      # hits (memory, disk), misses, evictions
+
+
+def input_key(value):
+    """Key an input: files by content hash, lists element-wise, anything else by value."""
+    if isinstance(value, (list, tuple)):
+        return [input_key(v) for v in value]
+    if isinstance(value, str) and os.path.isfile(value):
+        return data.fingerprint(value)
+    return repr(value)
+
+
+def is_remote(value):
+    """Whether any input is neither a file nor a plain value (a URL)."""
+    if isinstance(value, (list, tuple)):
+        return any(is_remote(v) for v in value)
+    return isinstance(value, str) and value.startswith(("http://", "https://"))
+
+
+def source_key(fn):
+    """Key a function's code: its file and the eng220 modules its file imports, by content."""
+    files = {inspect.getsourcefile(fn)}
+    for value in list(fn.__globals__.values()):
+        # Modules (``from eng220 import tail``) and names imported from them
+        name = value.__name__ if inspect.ismodule(value) else getattr(value, "__module__", None)
+        module = sys.modules.get(name) if isinstance(name, str) else None
+        if name and name.split(".")[0] == "eng220" and getattr(module, "__file__", None):
+            files.add(module.__file__)
+    return [(os.path.relpath(path, data.REPO_ROOT), data.fingerprint(path)) for path in sorted(files)]
+
+
+def key(*parts):
+    return hashlib.sha256(repr((FORMAT,) + parts).encode()).hexdigest()
+
+
+def load(key, max_age=None):
+    """Return the result stored under ``key`` (shallow copies), or None."""
+    now = time.time()
+    with _lock:
+        entry = _memory.get(key)
+        if entry is not None and (max_age is None or now - entry[0] <= max_age):
+            _memory.move_to_end(key)
+            _counts["memory hits"] += 1
+            metrics.cache("results", "hits")
+            return _copy(entry[1])
+    path = _path(key)
+    try:
+        with open(path, "rb") as f:
+            created, value = _decode(f.read())
+        # Least recently used is judged by modification time
+        os.utime(path)
+    except (OSError, ValueError, pa.ArrowInvalid):
+        # Missing, evicted meanwhile, or unreadable; computed again
+        created, value = None, None
+    if value is None or (max_age is not None and now - created > max_age):
+        with _lock:
+            _counts["misses"] += 1
+        metrics.cache("results", "misses")
+        return None
+    with _lock:
+        _counts["disk hits"] += 1
+        _remember(key, created, value)
+    metrics.cache("results", "hits")
+    return _copy(value)
+
+
+def save(key, value):
+    """Store a DataFrame, Series or dict of them under ``key``."""
+    created = time.time()
+    with _lock:
+        _remember(key, created, value)
+    path = _path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_encode(created, value))
+    os.replace(tmp_path, path)
+    _evict()
+
+
+def cached(max_age=None):
+    """Decorate a function returning frames so its results persist on disk.
+
+    Keyed by the function's name, its code (``source_key``), and its
+    arguments (files by content).  Results of URL arguments expire after
+    REMOTE_MAX_AGE unless ``max_age`` (seconds) says otherwise.
+    """
+    def wrap(fn):
+        identity = (fn.__qualname__, source_key(fn))
+
+        @functools.wraps(fn)
+        def call(*args, **kwargs):
+            inputs = list(args) + [kwargs[k] for k in sorted(kwargs)]
+            result_key = key(identity, input_key(inputs), sorted(kwargs))
+            age = max_age if max_age is not None or not is_remote(inputs) else REMOTE_MAX_AGE
+            value = load(result_key, age)
+            if value is None:
+                value = fn(*args, **kwargs)
+                save(result_key, value)
+            return value
+        return call
+    return wrap
+
+
+def stats():
+    """Return ``{counter: count}`` for this process (hits, misses, evictions)."""
+    with _lock:
+        return dict(_counts)
+
+
+def _remember(key, created, value):
+    _memory[key] = (created, value)
+    _memory.move_to_end(key)
+    while len(_memory) > MEMORY_ENTRIES:
+        _memory.popitem(last=False)
+
+
+def _copy(value):
+    if isinstance(value, dict):
+        return {part: frame.copy(deep=False) for part, frame in value.items()}
+    return value.copy(deep=False)
+
+
+def _path(key):
+    return os.path.join(RESULTS_DIR, key[:2], f"{key}.arrows")
+
+
+# File layout: 4-byte header length, JSON header, then one Arrow stream per part
+
+def _encode(created, value):
+    parts = value if isinstance(value, dict) else {None: value}
+    header = {"created": created, "parts": []}
+    blobs = []
+    for part, frame in parts.items():
+        # A Series travels as a one-column frame, as in eng220.offload
+        series = [frame.name] if isinstance(frame, pd.Series) else None
+        table = _to_arrow(frame.to_frame() if series else frame)
+        sink = pa.BufferOutputStream()
+        options = pa.ipc.IpcWriteOptions(compression=COMPRESSION)
+        with pa.ipc.new_stream(sink, table.schema, options=options) as writer:
+            writer.write_table(table)
+        blobs.append(sink.getvalue().to_pybytes())
+        header["parts"].append([part, series, len(blobs[-1])])
+    raw = json.dumps(header).encode()
+    return struct.pack("<I", len(raw)) + raw + b"".join(blobs)
+
+
+def _decode(raw):
+    (size,) = struct.unpack_from("<I", raw)
+    header = json.loads(raw[4:4 + size])
+    offset, parts = 4 + size, {}
+    for part, series, length in header["parts"]:
+        frame = pa.ipc.open_stream(io.BytesIO(raw[offset:offset + length])).read_all().to_pandas()
+        parts[part] = frame.iloc[:, 0].rename(series[0]) if series else frame
+        offset += length
+    return header["created"], parts[None] if list(parts) == [None] else parts
+
+
+def _to_arrow(frame):
+    try:
+        return pa.Table.from_pandas(frame)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Columns mixing numbers and text become text, as in the Parquet caches
+        from eng220.excel import _arrow_safe
+        return pa.Table.from_pandas(_arrow_safe(frame.copy()))
+
+
+def _evict():
+    """Delete least recently used results until the directory fits in MAX_BYTES."""
+    entries = []
+    for folder in os.scandir(RESULTS_DIR):
+        if not folder.is_dir():
+            continue
+        for entry in os.scandir(folder.path):
+            if entry.name.endswith(".tmp"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= MAX_BYTES:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            # Another process evicted it first
+            pass
+        total -= size
+        with _lock:
+            _counts["evictions"] += 1
+        metrics.cache("results", "evictions")
+
+
+# ========== Check ==========
+
+def main(argv=None):
+    from eng220 import offload
+
+    parser = argparse.ArgumentParser(prog="python -m eng220.persist")
+    parser.add_argument("names", nargs="*", help="transforms to time (default: all that work offline)")
+    args = parser.parse_args(argv)
+
+    print(f"{'transform':26} {'computed':>9} {'disk':>9} {'memory':>9} {'stored':>10}")
+    for name, inputs, params in offload.example_jobs():
+        if args.names and name not in args.names:
+            continue
+        result_key = offload.result_key(name, inputs, params)
+        start = time.perf_counter()
+        value = offload.TRANSFORMS[name](*inputs, **params)
+        computed = time.perf_counter() - start
+        save(result_key, value)
+        with _lock:
+            # As after a restart
+            _memory.clear()
+        start = time.perf_counter()
+        assert load(result_key) is not None
+        disk = time.perf_counter() - start
+        start = time.perf_counter()
+        load(result_key)
+        memory = time.perf_counter() - start
+        stored = os.path.getsize(_path(result_key))
+        print(f"{name:26} {computed:8.2f}s {disk:8.3f}s {memory:8.4f}s {stored / 1e6:7.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+# Compact Plotly figures, built once per input version.
+#
+# st.plotly_chart serializes the whole figure on every rerun.  Numeric arrays
+# already travel as base64 typed arrays (Plotly packs integers into the
+# smallest type that fits), but float columns go as 8-byte doubles, dates as
+# ISO strings, and every trace repeats the same settings: a px.line with
+# color="County" sends one trace per county, each with its own copy of the
+# mode, dash, marker, axis names and hover template.  ``compact`` rewrites a
+# figure so that:
+#
+#   - float arrays are single precision (7 significant digits is far more
+#     than a chart can show) and date arrays are epoch milliseconds on a
+#     date axis,
+#   - settings shared by every trace of a type move into the figure's
+#     template (layout.template.data), sent once; hover templates that only
+#     differ by the trace name use %{fullData.name},
+#   - colours that just follow the colorway and legend groups that are the
+#     trace's own name are dropped, since Plotly would assign the same.
+#
+# ``cached`` keeps compacted figures by key (include the fingerprints of the
+# input files and every filter value), so reruns skip building the figure
+# and only pay for serializing the compact one.
+#
+#   st.plotly_chart(plotly_spec.cached(("aqi", digest, county), lambda: px.line(...)))
+#
+#   python -m eng220.plotly_spec    bytes and serialization time of the Group 017 chart
+
+import argparse
+import base64
+import collections
+import threading
+import time
+
+import numpy as np
+
+from eng220 import metrics
+
+MAX_FIGURES = 64
+# Trace properties that hold the plotted values
+ARRAY_KEYS = ("x", "y", "z")
+# Identify a trace or place it on a subplot; never moved into the template
+OWN_KEYS = ("name", "legendgroup", "uid", "xaxis", "yaxis", "type")
+
+_lock = threading.Lock()
+_figures = collections.OrderedDict()  # key -> compact Figure, least recently used first
+
+
+def cached(key, build):
+    """Return ``compact(build())``, building it once per ``key``."""
+    with _lock:
+        fig = _figures.get(key)
+        if fig is not None:
+            _figures.move_to_end(key)
+            metrics.cache("plotly", "hits")
+            return fig
+    metrics.cache("plotly", "misses")
+    # Two sessions may both build it the first time; either result is fine
+    with metrics.timer("eng220_render_seconds", kind="plotly"):
+        fig = compact(build())
+    with _lock:
+        _figures[key] = fig
+        while len(_figures) > MAX_FIGURES:
+            _figures.popitem(last=False)
+            metrics.cache("plotly", "evictions")
+    return fig
+
+
+def compact(fig):
+    """Return a copy of a plotly Figure that serializes to a smaller spec."""
+    import plotly.graph_objects as go
+
+    spec = fig.to_dict()
+    traces, layout = spec["data"], spec["layout"]
+    for trace in traces:
+        for key in ARRAY_KEYS:
+            if key in trace:
+                trace[key] = _pack(trace[key], layout, trace.get(f"{key}axis", key), key)
+    _drop_defaults(traces, layout)
+    _share_settings(traces, layout)
+    return go.Figure(spec)
+
+
+def _pack(values, layout, axis, key):
+    if isinstance(values, dict) and values.get("dtype") == "f8" and "shape" not in values:
+        # plotly.express has already packed it, as doubles
+        values = np.frombuffer(base64.b64decode(values["bdata"]), dtype="<f8")
+    if not isinstance(values, np.ndarray) or values.ndim != 1:
+        return values
+    if np.issubdtype(values.dtype, np.datetime64):
+        if key not in ("x", "y"):
+            return values
+        # Plotly reads numbers on a date axis as milliseconds since the epoch
+        layout.setdefault(_axis_name(axis), {}).setdefault("type", "date")
+        millis = values.astype("datetime64[ms]").astype("float64")
+        millis[np.isnat(values)] = np.nan
+        return _typed_array(millis, "f8")
+    if values.dtype == np.float64:
+        return _typed_array(values, "f4")
+    return values
+
+
+def _typed_array(values, dtype):
+    # Written out here: the Figure would turn a float32 array back into float64
+    return {"dtype": dtype, "bdata": base64.b64encode(values.astype(f"<{dtype}").tobytes()).decode()}
+
+
+def _axis_name(axis):
+    # "x" -> "xaxis", "y2" -> "yaxis2"
+    return f"{axis[0]}axis{axis[1:]}"
+
+
+def _drop_defaults(traces, layout):
+    colorway = layout.get("colorway") or layout.get("template", {}).get("layout", {}).get("colorway")
+    names = [trace.get("name") for trace in traces]
+    if colorway and all(trace.get("line", {}).get("color") == colorway[i % len(colorway)]
+                        for i, trace in enumerate(traces)):
+        for trace in traces:
+            trace["line"].pop("color")
+    if len(set(names)) == len(names):
+        # A legend group of one trace behaves like no group
+        for trace in traces:
+            if trace.get("legendgroup") == trace.get("name"):
+                trace.pop("legendgroup")
+    for trace in traces:
+        # The first subplot is where traces go by default
+        for axis in ("xaxis", "yaxis"):
+            if trace.get(axis) == axis[0]:
+                trace.pop(axis)
+        name = trace.get("name")
+        if name and isinstance(trace.get("hovertemplate"), str):
+            trace["hovertemplate"] = trace["hovertemplate"].replace(f"={name}<br>", "=%{fullData.name}<br>", 1)
+
+
+def _leaves(node, path=()):
+    for key, value in node.items():
+        if isinstance(value, dict) and value:
+            yield from _leaves(value, path + (key,))
+        elif not isinstance(value, (dict, list, np.ndarray)):
+            yield path + (key,), value
+
+
+def _share_settings(traces, layout):
+    """Move settings every trace of a type has in common into the template."""
+    by_type = collections.defaultdict(list)
+    for trace in traces:
+        by_type[trace.get("type", "scatter")].append(trace)
+    template = layout.setdefault("template", {}).setdefault("data", {})
+    for trace_type, group in by_type.items():
+        if len(group) < 2:
+            continue
+        common = dict(_leaves({k: v for k, v in group[0].items() if k not in ARRAY_KEYS + OWN_KEYS}))
+        for trace in group[1:]:
+            leaves = dict(_leaves(trace))
+            common = {path: value for path, value in common.items() if path in leaves and leaves[path] == value}
+        if not common:
+            continue
+        for trace in group:
+            for path in common:
+                _pop_path(trace, path)
+        # Template entries are applied in turn; every one of them gets the settings
+        entries = template.get(trace_type) or [{"type": trace_type}]
+        for entry in entries:
+            for path, value in common.items():
+                node = entry
+                for part in path[:-1]:
+                    node = node.setdefault(part, {})
+                node[path[-1]] = value
+        template[trace_type] = entries
+
+
+def _pop_path(node, path):
+    parents = [node]
+    for part in path[:-1]:
+        parents.append(parents[-1][part])
+    parents[-1].pop(path[-1])
+    # Drop the nested dicts this emptied
+    for parent, part in zip(reversed(parents[:-1]), reversed(path[:-1])):
+        if parent[part]:
+            break
+        parent.pop(part)
+
+
+# ========== Check ==========
+
+def _wire(fig):
+    """Serialize ``fig`` the way st.plotly_chart does; return (bytes, seconds)."""
+    import plotly.io as pio
+    import plotly.tools
+
+    start = time.perf_counter()
+    spec = pio.to_json(plotly.tools.return_figure_from_figure_or_data(fig, validate_figure=True), validate=False)
+    return len(spec.encode()), time.perf_counter() - start
+
+
+def check():
+    """Compare the Group 017 AQI chart (every county and year) before and after compacting."""
+    import os
+
+    import plotly.express as px
+    # Registers the "streamlit" template, as on a page
+    import streamlit.elements.plotly_chart  # noqa: F401
+
+    from eng220 import data, offload
+
+    dataset_dir = os.path.join(data.REPO_ROOT, "ENG220-Group-017", "datasets")
+    paths = sorted(os.path.join(dataset_dir, f) for f in os.listdir(dataset_dir) if f.startswith("annual_aqi_by_county_"))
+    aqi = offload.group017_aqi(paths).dropna(subset=["Median AQI"])
+    fig = px.line(aqi, x="Year", y="Median AQI", color="County", title="Median AQI Over Years")
+
+    start = time.perf_counter()
+    small = compact(fig)
+    built = time.perf_counter() - start
+    before, after = _wire(fig), _wire(small)
+    print(f"{len(fig.data)} traces, compacted once in {built:.2f}s")
+    print(f"{'':10} {'bytes':>10} {'serialize':>10}")
+    for label, (size, seconds) in [("plotly", before), ("compact", after)]:
+        print(f"{label:10} {size:10,} {seconds * 1000:7.0f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m eng220.plotly_spec")
+    parser.parse_args(argv)
+    check()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+# Prefork deployment mode (Linux).
+#
+# Every bundled dataset is parsed once in a parent process, text columns are
+# moved into Arrow buffers and the garbage collector is told to leave those
+# objects alone.  The Streamlit workers are then forked from that parent, so
+# they all read the same physical pages copy-on-write instead of each holding
+# a private copy of every DataFrame.  Put the workers behind a load balancer.
+#
+#   python -m eng220.prefork --workers 4 --port 8501
+#   python -m eng220.prefork --measure --workers 4
+
+import argparse
+import gc
+import os
+import signal
+import sys
+import time
+import traceback
+
+from eng220 import data
+
+MAIN_SCRIPT = os.path.join(data.REPO_ROOT, "streamlit_app.py")
+
+
+def preload(arrow_strings=True):
+    """Load all bundled datasets into this process and freeze them for fork."""
+    start = time.perf_counter()
+    failed = data.preload(data.bundled_csvs(), arrow_strings=arrow_strings)
+    for path, error in failed.items():
+        print(f"Skipped {os.path.relpath(path, data.REPO_ROOT)}: {error}", file=sys.stderr)
+
+    # A collection pass writes to every tracked object's header, which would
+    # copy the shared pages into each worker; move them out of its reach
+    gc.collect()
+    gc.freeze()
+    elapsed = time.perf_counter() - start
+    report = data.memory_report()
+    print(f"Preloaded {len(report)} datasets ({report['Size (MB)'].sum():.1f} MB) in {elapsed:.1f}s")
+
+
+def fork_worker(target, *args):
+    """Run ``target(*args)`` in a forked child and return its pid."""
+    pid = os.fork()
+    if pid:
+        return pid
+    code = 0
+    try:
+        target(*args)
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else 0
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    finally:
+        os._exit(code)
+
+
+def run_server(port):
+    from streamlit.web import cli
+
+    # The navigation TOML paths are relative to the repository root
+    os.chdir(data.REPO_ROOT)
+    cli.main(["run", MAIN_SCRIPT, "--server.port", str(port), "--server.headless", "true"])
+
+
+def serve(workers, port):
+    """Fork ``workers`` Streamlit servers on consecutive ports and wait."""
+    children = {}
+    for i in range(workers):
+        pid = fork_worker(run_server, port + i)
+        children[pid] = port + i
+        print(f"Worker {pid} listening on port {port + i}")
+
+    def stop(signum, frame):
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        port = children.pop(pid, None)
+        print(f"Worker {pid} on port {port} exited with status {os.waitstatus_to_exitcode(status)}")
+
+
+# ========== Measurement ==========
+
+def memory_stats(pid):
+    """Return RSS, PSS and USS (private memory) of a process in MB."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {
+        "RSS": fields.get("Rss", 0.0),
+        "PSS": fields.get("Pss", 0.0),
+        "USS": fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0),
+    }
+
+
+def _touch_datasets(ready_fd):
+    """Worker body for measuring: read every dataset like a page would."""
+    for path in data.bundled_csvs():
+        try:
+            frame = data.load_csv(path)
+        except Exception:
+            continue
+        frame.select_dtypes("number").sum()
+        for col in frame.select_dtypes(exclude="number").columns:
+            frame[col].nunique()
+    os.write(ready_fd, b"1")
+    signal.pause()
+
+
+def _measure_workers(workers):
+    read_fd, write_fd = os.pipe()
+    pids = [fork_worker(_touch_datasets, write_fd) for _ in range(workers)]
+    for _ in pids:
+        os.read(read_fd, 1)
+    stats = [memory_stats(pid) for pid in pids]
+    for pid in pids:
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+    os.close(read_fd)
+    os.close(write_fd)
+    return stats
+
+
+def measure(workers, arrow_strings=True):
+    """Print per-worker memory with private loading vs. preloaded prefork."""
+    # Before: every worker parses the datasets itself, as separate servers do
+    before = _measure_workers(workers)
+    # After: the parent parses them once and the workers inherit them
+    preload(arrow_strings)
+    after = _measure_workers(workers)
+
+    print(f"{'Worker':>6} | {'RSS before':>10} {'RSS after':>10} | "
+          f"{'PSS before':>10} {'PSS after':>10} | {'USS before':>10} {'USS after':>10}  (MB)")
+    for i, (b, a) in enumerate(zip(before, after)):
+        print(f"{i:>6} | {b['RSS']:>10.1f} {a['RSS']:>10.1f} | {b['PSS']:>10.1f} {a['PSS']:>10.1f} | "
+              f"{b['USS']:>10.1f} {a['USS']:>10.1f}")
+    total_before = sum(s["PSS"] for s in before)
+    total_after = sum(s["PSS"] for s in after)
+    print(f"Total PSS across workers: {total_before:.1f} MB -> {total_after:.1f} MB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m eng220.prefork")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--port", type=int, default=8501, help="port of the first worker")
+    parser.add_argument("--measure", action="store_true",
+                        help="compare per-worker memory with and without preloading, then exit")
+    parser.add_argument("--no-arrow-strings", dest="arrow_strings", action="store_false",
+                        help="keep text columns as Python objects")
+    args = parser.parse_args(argv)
+
+    if args.measure:
+        measure(args.workers, args.arrow_strings)
+        return
+    preload(args.arrow_strings)
+    serve(args.workers, args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# Column profiles: summary statistics computed once per dataset version.
+#
+# A profile holds, for every column, its dtype, null count and (for numeric
+# columns) min, max, mean, variance, a 101-point quantile sketch and a
+# histogram.  It also keeps running totals of the values and their squares,
+# so count, mean and variance of any row range come from two lookups instead
+# of a pass over the slice.  Profiles are keyed like eng220.data's shared
+# datasets (file hash + read options) and kept for the life of the process.
+#
+#   python -m eng220.profile    check range statistics against NumPy
+
+import math
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+from eng220 import cancel, data
+
+QUANTILES = np.linspace(0, 1, 101)
+HIST_BINS = 20
+
+_lock = threading.Lock()
+_profiles = {}  # (digest, read options) -> DatasetProfile
+
+
+class ColumnProfile:
+    def __init__(self, name, series):
+        self.name = name
+        self.dtype = str(series.dtype)
+        self.rows = len(series)
+        self.nulls = int(series.isna().sum())
+        values = _numeric_values(series)
+        self.numeric = values is not None
+        self.count = self.rows - self.nulls
+        self.min = self.max = self.mean = self.var = math.nan
+        self.quantiles = self.histogram = None
+        if not self.numeric:
+            return
+
+        valid = ~np.isnan(values)
+        present = values[valid]
+        if len(present):
+            self.min, self.max = float(present.min()), float(present.max())
+            self.mean = float(present.mean())
+            self.quantiles = np.quantile(present, QUANTILES)
+            self.histogram = np.histogram(present, bins=HIST_BINS)
+        if len(present) > 1:
+            self.var = float(present.var(ddof=1))
+
+        # Running totals start with 0 so a range [a, b) is totals[b] - totals[a].
+        # Values are centred on the column mean first, which keeps the
+        # sum-of-squares difference from losing precision on large values.
+        self._shift = self.mean if len(present) else 0.0
+        centred = np.where(valid, values - self._shift, 0.0)
+        self._counts = np.concatenate([[0], np.cumsum(valid)])
+        self._sums = np.concatenate([[0.0], np.cumsum(centred)])
+        self._squares = np.concatenate([[0.0], np.cumsum(centred * centred)])
+
+    def range_stats(self, start, stop):
+        """Return count, mean, variance and std of rows ``start:stop``.
+
+        Nulls are skipped; variance uses ddof=1 like the pandas default.
+        """
+        if not self.numeric:
+            raise TypeError(f"Column '{self.name}' is not numeric")
+        start, stop, _ = slice(start, stop).indices(self.rows)
+        stop = max(start, stop)
+        n = int(self._counts[stop] - self._counts[start])
+        total = self._sums[stop] - self._sums[start]
+        squares = self._squares[stop] - self._squares[start]
+        mean = self._shift + total / n if n else math.nan
+        var = max(squares - total * total / n, 0.0) / (n - 1) if n > 1 else math.nan
+        return {"count": n, "mean": mean, "var": var, "std": math.sqrt(var)}
+
+
+class DatasetProfile:
+    def __init__(self, frame):
+        self.rows = len(frame)
+        self.columns = {}
+        for i, col in enumerate(frame.columns):
+            cancel.checkpoint("aggregate", remaining=len(frame.columns) - i)
+            self.columns[col] = ColumnProfile(col, frame[col])
+
+    def __getitem__(self, column):
+        return self.columns[column]
+
+
+def profile_csv(path, **read_kwargs):
+    """Return the profile of a CSV as read by ``eng220.data.load_csv``."""
+    frame = data.load_csv(path, **read_kwargs)
+    key = (data.fingerprint(path), data._options_key(read_kwargs))
+    with _lock:
+        profile = _profiles.get(key)
+    if profile is None:
+        # Two sessions may both build it the first time; either result is fine
+        profile = DatasetProfile(frame)
+        with _lock:
+            profile = _profiles.setdefault(key, profile)
+    return profile
+
+
+def _numeric_values(series):
+    """Return the column as float64 with NaN for nulls, or None if not numeric.
+
+    Text columns count as numeric when every non-null value parses as a
+    number, as ``astype(float)`` would accept.
+    """
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+        return series.to_numpy(dtype="float64", na_value=np.nan)
+    if pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+        parsed = pd.to_numeric(series, errors="coerce")
+        if parsed.isna().sum() == series.isna().sum():
+            return parsed.to_numpy(dtype="float64", na_value=np.nan)
+    return None
+
+
+def check(paths, ranges=200, seed=0):
+    """Compare range statistics with NumPy on random row ranges."""
+    rng = np.random.default_rng(seed)
+    checked = 0
+    for path in paths:
+        try:
+            profile = profile_csv(path)
+        except (ValueError, pd.errors.ParserError):
+            continue
+        frame = data.load_csv(path)
+        for column in profile.columns.values():
+            if not column.numeric or column.count == 0:
+                continue
+            values = _numeric_values(frame[column.name])
+            # Differences of running totals are exact up to rounding of the totals
+            scale = max(abs(column.min), abs(column.max), 1.0)
+            for _ in range(ranges):
+                start, stop = sorted(rng.integers(0, column.rows + 1, size=2))
+                stats = column.range_stats(start, stop)
+                present = values[start:stop][~np.isnan(values[start:stop])]
+                assert stats["count"] == len(present)
+                if len(present):
+                    assert math.isclose(stats["mean"], present.mean(), rel_tol=1e-9, abs_tol=1e-12 * scale * column.rows)
+                if len(present) > 1:
+                    assert math.isclose(stats["var"], present.var(ddof=1), rel_tol=1e-6,
+                                        abs_tol=1e-12 * scale * scale * column.rows)
+                checked += 1
+    return checked
+
+
+def main(argv):
+    paths = argv or data.bundled_csvs()
+    checked = check(paths)
+    print(f"{checked} row ranges match NumPy across {len(paths)} files")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,217 @@
+# On-demand profiling of one page run.
+#
+# A slow page (Group 018's county tab, Group 005's multi-year view) could only
+# be looked into by attaching an external profiler to the server.  A run is
+# now profiled when its URL has ``?profile=1``, or, with ENG220_ADMIN set,
+# when the sidebar's "Profile this page" toggle is on.  A sampling thread then
+# records the script thread's call stack every INTERVAL seconds until the run
+# ends, and the stacks are saved as a speedscope file (open it at
+# https://www.speedscope.app or with ``npx speedscope``; it shows a flame
+# graph) under CACHE_DIR/profiles/, keeping the last KEEP.  Stacks start at
+# the page script; time spent before it is reached is shown as "<streamlit>".
+# Work on other threads or in the offload workers is not sampled; waiting for
+# it shows up as time in the call that waits.
+#
+# Runs that are not profiled only read the query parameter.
+#
+#   with profiling.run(page, profiling.requested()) as profiler:
+#       pg.run()
+#
+#   python -m eng220.profiling [page]    profile one run of a page; print where the time went
+
+import argparse
+import collections
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+
+from eng220 import data
+
+INTERVAL = 0.005  # seconds between samples
+KEEP = 50
+PROFILES_DIR = os.path.join(data.CACHE_DIR, "profiles")
+OUTSIDE = ("<streamlit>", "", 0)
+
+
+class Profiler:
+    """Sample the calling thread's stack while the ``with`` block runs, then save it."""
+
+    def __init__(self, page, interval=INTERVAL):
+        self.page = os.path.abspath(page)
+        self.interval = interval
+        self.stacks = collections.Counter()  # (frame, ...) from the page script down -> seconds
+        self.samples = 0
+        self.elapsed = 0.0
+        self.path = None
+        self.stopped = threading.Event()
+
+    def __enter__(self):
+        self.ident = threading.get_ident()
+        self.started = time.perf_counter()
+        self.thread = threading.Thread(target=self._sample, name="profiler", daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        # Also saved when the run is stopped or superseded by a rerun
+        self.stopped.set()
+        self.thread.join()
+        self.elapsed = time.perf_counter() - self.started
+        self.path = self.save()
+        return False
+
+    def _sample(self):
+        last = time.perf_counter()
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.ident)
+            now = time.perf_counter()
+            if frame is not None:
+                # Weighted by the time since the previous sample, so a late wake-up is not lost
+                self.stacks[self._stack(frame)] += now - last
+                self.samples += 1
+            del frame
+            last = now
+
+    def _stack(self, frame):
+        stack, page_depth = [], None
+        while frame is not None:
+            code = frame.f_code
+            stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+            if code.co_filename == self.page:
+                page_depth = len(stack)
+            frame = frame.f_back
+        if page_depth is None:
+            return (OUTSIDE,)
+        return tuple(reversed(stack[:page_depth]))
+
+    def speedscope(self):
+        """Return the samples in speedscope's file format."""
+        frames, index = [], {}
+        for stack in self.stacks:
+            for frame in stack:
+                if frame not in index:
+                    index[frame] = len(frames)
+                    name, filename, line = frame
+                    frames.append({"name": name, "file": _relpath(filename), "line": line})
+        stacks = list(self.stacks.items())
+        name = f"{_relpath(self.page)} ({time.strftime('%Y-%m-%d %H:%M:%S')})"
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "eng220.profiling",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(w for _, w in stacks),
+                "samples": [[index[frame] for frame in stack] for stack, _ in stacks],
+                "weights": [w for _, w in stacks],
+            }],
+        }
+
+    def save(self):
+        os.makedirs(PROFILES_DIR, exist_ok=True)
+        slug = _relpath(self.page).replace("/", "_").rsplit(".", 1)[0]
+        now = time.time()
+        # Milliseconds, so two sessions profiling in the same second keep both files
+        stamp = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}.{int(now * 1000) % 1000:03d}"
+        path = os.path.join(PROFILES_DIR, f"{stamp}-{slug}.speedscope.json")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.speedscope(), f)
+        os.replace(tmp_path, path)
+
+        # Oldest first; the directory would otherwise grow with every profiled run
+        saved = sorted(e.path for e in os.scandir(PROFILES_DIR) if e.name.endswith(".speedscope.json"))
+        for old in saved[:-KEEP]:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(old)
+        return path
+
+    def top(self, limit=15):
+        """Return ``[(function, total seconds, self seconds)]``, slowest first."""
+        total, own = collections.Counter(), collections.Counter()
+        for stack, seconds in self.stacks.items():
+            for frame in set(stack):
+                total[frame] += seconds
+            own[stack[-1]] += seconds
+        return [(_label(frame), seconds, own[frame]) for frame, seconds in total.most_common(limit)]
+
+
+def _relpath(path):
+    # Library files keep their full path; "<frozen ...>" names stay as they are
+    if not os.path.isabs(path) or not path.startswith(data.REPO_ROOT + os.sep):
+        return path
+    return os.path.relpath(path, data.REPO_ROOT).replace(os.sep, "/")
+
+
+def _label(frame):
+    name, filename, line = frame
+    return f"{name} ({_relpath(filename)}:{line})" if filename else name
+
+
+def requested():
+    """Whether this run is to be profiled: ``?profile=1``, or the admin toggle."""
+    import streamlit as st
+
+    if os.environ.get("ENG220_ADMIN") and st.sidebar.toggle("Profile this page", key="profile_page_toggle"):
+        return True
+    return st.query_params.get("profile") in ("1", "true")
+
+
+def run(page, enabled):
+    """Return a context that profiles the run of ``page`` if ``enabled`` (and yields the Profiler)."""
+    return Profiler(page) if enabled else contextlib.nullcontext()
+
+
+def offer(profiler):
+    """Offer the saved profile of this run for download in the sidebar."""
+    import streamlit as st
+
+    with open(profiler.path, "rb") as f:
+        st.sidebar.download_button("Download profile", f.read(), file_name=os.path.basename(profiler.path),
+                                   mime="application/json")
+    st.sidebar.caption(f"{profiler.elapsed:.2f} s, {profiler.samples} samples. "
+                       "Open the file at speedscope.app for a flame graph.")
+
+
+# ========== Check ==========
+
+def main(argv=None):
+    from streamlit.testing.v1 import AppTest
+
+    default = os.path.join(data.REPO_ROOT, "ENG220-Group-005", "app5.py")
+    parser = argparse.ArgumentParser(prog="python -m eng220.profiling")
+    parser.add_argument("page", nargs="?", default=default)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args(argv)
+    page = os.path.abspath(args.page)
+
+    # The page runs on AppTest's script thread, so the profiler starts there
+    script = f"""
+import runpy
+from eng220 import profiling
+with profiling.Profiler({page!r}) as profiler:
+    profiling.last = profiler
+    runpy.run_path({page!r}, run_name="__main__")
+"""
+    app = AppTest.from_string(script, default_timeout=300)
+    # As under streamlit run, from the repository root
+    os.chdir(data.REPO_ROOT)
+    app.run()
+    from eng220 import profiling
+
+    profiler = profiling.last
+    print(f"{_relpath(page)}: {profiler.elapsed:.2f} s, {profiler.samples} samples -> {_relpath(profiler.path)}")
+    print(f"{'total':>8} {'self':>8}  function")
+    for label, seconds, own in profiler.top(args.top):
+        print(f"{seconds:7.2f}s {own:7.2f}s  {label}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+# Streaming CSV reduction for large uploads (Group 017 "Data Reduction" tab).
+#
+# The input is parsed in fixed-size chunks and dropped columns are excluded at
+# parse time, so memory stays bounded by the chunk size plus whatever the
+# chosen sampler has to keep.  Bernoulli samples are written out as soon as
+# each chunk is processed; reservoir samples are written once the stream ends.
+
+import numpy as np
+import pandas as pd
+
+CHUNK_ROWS = 100_000
+SEED = 42
+
+BERNOULLI = "Bernoulli"
+RESERVOIR = "Reservoir"
+STRATIFIED = "Stratified"
+METHODS = [BERNOULLI, RESERVOIR, STRATIFIED]
+
+# Columns a "Year" stratum can be derived from when the file has no Year column
+DATE_COLUMNS = ["Date_Time", "Date", "Timestamp"]
+
+
+def read_header(source):
+    """Return the column names of a CSV without reading its rows."""
+    columns = pd.read_csv(source, nrows=0).columns.tolist()
+    _rewind(source)
+    return columns
+
+
+def strata_options(columns):
+    """Return the Location/Year strata that can be built from ``columns``."""
+    options = []
+    if "Location" in columns:
+        options.append("Location")
+    if "Year" in columns or any(col in columns for col in DATE_COLUMNS):
+        options.append("Year")
+    return options
+
+
+def iter_chunks(source, drop_columns=(), keep_columns=(), chunksize=CHUNK_ROWS):
+    """Yield DataFrame chunks of ``source`` without the dropped columns.
+
+    Columns listed in ``keep_columns`` are parsed even if they are dropped, so
+    samplers can still use them as strata keys.
+    """
+    skip = set(drop_columns) - set(keep_columns)
+    _rewind(source)
+    reader = pd.read_csv(source, usecols=lambda col: col not in skip, chunksize=chunksize)
+    with reader:
+        for chunk in reader:
+            yield chunk
+
+
+class Reservoir:
+    """Uniform fixed-size sample of a stream of DataFrame chunks (Algorithm R)."""
+
+    def __init__(self, size, rng):
+        self.size = int(size)
+        self.rng = rng
+        self.seen = 0
+        self.frame = None
+        # Stream position of the row held in each slot, to restore input order
+        self.order = np.empty(0, dtype=np.int64)
+
+    def add(self, chunk):
+        if self.size <= 0 or chunk.empty:
+            self.seen += len(chunk)
+            return
+        chunk = chunk.reset_index(drop=True)
+
+        # Fill phase: the first ``size`` rows go straight into the reservoir
+        filled = len(self.order)
+        if filled < self.size:
+            head = chunk.iloc[:self.size - filled].copy()
+            head.index = pd.RangeIndex(filled, filled + len(head))
+            self.frame = head if self.frame is None else pd.concat([self.frame, head])
+            self.order = np.concatenate([self.order, np.arange(self.seen, self.seen + len(head))])
+            self.seen += len(head)
+            chunk = chunk.iloc[len(head):]
+            if chunk.empty:
+                return
+
+        # Replacement phase: row i of the stream lands in slot j ~ U[0, i]
+        positions = np.arange(self.seen, self.seen + len(chunk))
+        slots = np.floor(self.rng.random(len(chunk)) * (positions + 1)).astype(np.int64)
+        self.seen += len(chunk)
+        hits = np.flatnonzero(slots < self.size)
+        if hits.size == 0:
+            return
+
+        # Within one chunk a later row overwrites an earlier one in the same slot
+        unique_slots, last = np.unique(slots[hits][::-1], return_index=True)
+        rows = hits[::-1][last]
+
+        incoming = chunk.iloc[rows]
+        incoming.index = unique_slots
+        self.frame.loc[unique_slots] = incoming.reindex(columns=self.frame.columns)
+        self.order[unique_slots] = positions[rows]
+
+    def result(self):
+        """Return the sampled rows in stream order."""
+        if self.frame is None:
+            return pd.DataFrame()
+        return self.frame.iloc[np.argsort(self.order, kind="stable")].reset_index(drop=True)
+
+
+def bernoulli_sample(chunks, frac, seed=SEED):
+    """Keep each row independently with probability ``frac``."""
+    rng = np.random.default_rng(seed)
+    for chunk in chunks:
+        yield chunk[rng.random(len(chunk)) < frac]
+
+
+def reservoir_sample(chunks, size, seed=SEED):
+    """Return exactly ``min(size, rows)`` uniformly sampled rows."""
+    reservoir = Reservoir(size, np.random.default_rng(seed))
+    for chunk in chunks:
+        reservoir.add(chunk)
+    return reservoir.result()
+
+
+def stratified_sample(chunks, by, size, seed=SEED):
+    """Return up to ``size`` uniformly sampled rows for every ``by`` stratum."""
+    rng = np.random.default_rng(seed)
+    reservoirs = {}
+    for chunk in chunks:
+        keys = strata_keys(chunk, by)
+        for key, rows in chunk.groupby(keys, sort=False, dropna=False):
+            if key not in reservoirs:
+                reservoirs[key] = Reservoir(size, rng)
+            reservoirs[key].add(rows)
+
+    parts = [reservoirs[key].result() for key in sorted(reservoirs, key=str)]
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+
+
+def strata_keys(chunk, by):
+    """Return the Series used to group ``chunk`` into strata."""
+    keys = []
+    for col in by:
+        if col in chunk.columns:
+            keys.append(chunk[col].rename(col))
+        elif col == "Year":
+            date_col = next(c for c in DATE_COLUMNS if c in chunk.columns)
+            years = pd.to_datetime(chunk[date_col], errors="coerce").dt.year
+            keys.append(years.rename("Year"))
+        else:
+            raise KeyError(f"Cannot stratify by '{col}': column not found")
+    return keys
+
+
+def reduce_csv(source, out, method=BERNOULLI, drop_columns=(), frac=0.3, size=10_000,
+               by=("Location", "Year"), seed=SEED, chunksize=CHUNK_ROWS):
+    """Stream ``source`` into ``out`` as a reduced CSV and return row counts.
+
+    ``out`` is a writable text file.  ``frac`` applies to Bernoulli sampling,
+    ``size`` is the total rows for reservoir sampling and the rows kept per
+    stratum for stratified sampling.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown sampling method '{method}'")
+
+    by = list(by) if method == STRATIFIED else []
+    strata_source = [c for c in DATE_COLUMNS if "Year" in by] + by
+    stats = {"rows_in": 0, "rows_out": 0}
+
+    def counted(chunks):
+        for chunk in chunks:
+            stats["rows_in"] += len(chunk)
+            yield chunk
+
+    chunks = counted(iter_chunks(source, drop_columns, strata_source, chunksize))
+    if method == BERNOULLI:
+        stats["rows_out"] = write_csv(bernoulli_sample(chunks, frac, seed), out, drop_columns)
+    elif method == RESERVOIR:
+        stats["rows_out"] = write_csv([reservoir_sample(chunks, size, seed)], out, drop_columns)
+    else:
+        stats["rows_out"] = write_csv([stratified_sample(chunks, by, size, seed)], out, drop_columns)
+    return stats
+
+
+def write_csv(frames, out, drop_columns=()):
+    """Append ``frames`` to ``out`` with a single header; return rows written."""
+    rows = 0
+    header = True
+    for frame in frames:
+        frame = frame.drop(columns=[c for c in drop_columns if c in frame.columns])
+        if frame.empty and not header:
+            continue
+        frame.to_csv(out, index=False, header=header)
+        header = False
+        rows += len(frame)
+    return rows
+
+
+def _rewind(source):
+    if hasattr(source, "seek"):
+        source.seek(0)
@@ -0,0 +1,237 @@
+# Hot reload of datasets edited while the server runs.
+#
+# Teams replace their CSVs in place (new AQI years, corrected snow depths).
+# The caches are keyed by content hash, so a changed file was picked up, but
+# by whichever page run first noticed the new modification time: that run
+# parsed the file, re-ran the offloaded transforms and re-rendered the charts
+# built on it while its visitor waited, and runs already in progress could see
+# the old file for one load and the new one for the next.
+#
+# The reloader checks the modification time and size of every dataset in the
+# manifest (eng220.manifest) every WATCH_INTERVAL seconds.  Once a changed file has held
+# still for one interval (so it is not read half-written), a background
+# thread rebuilds what was built from it, under its new hash:
+#
+#   - the loads pages recorded for it (eng220.warmup), or a plain load_csv if
+#     it was loaded that way,
+#   - the offloaded jobs that read it and the workbook's sheet cache.
+#
+# Until that is done every page keeps getting the previous version: watched
+# files keep their published hash (eng220.data.watch), and only the
+# reloader's thread sees the new one.  Then all the files changed together
+# are published at once, datasets no file has any more are dropped, the SQL
+# views of those files (eng220.sql) read the new version and their static
+# charts are rendered for it.
+#
+#   reload.get_service()      start watching (streamlit_app.py does)
+#
+#   python -m eng220.reload    edit a copy of a dataset; check the swap and time it
+
+import argparse
+import collections
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import traceback
+
+import pandas as pd
+
+from eng220 import data, debounce, excel, manifest, offload, profile, sql, static_charts, warmup
+
+WATCH_INTERVAL = 2.0
+HISTORY = 20
+
+_lock = threading.Lock()
+_service = None
+
+
+class ReloadService:
+    def __init__(self, paths, interval=WATCH_INTERVAL):
+        self.paths = [os.path.abspath(p) for p in paths]
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.seen = {path: _stat(path) for path in self.paths}
+        self.pending = {}  # path -> stat of a change waiting to hold still
+        self.history = collections.deque(maxlen=HISTORY)
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="reload", daemon=True)
+
+    def start(self):
+        data.watch(self.paths)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def scan(self):
+        """Return the files that changed and have not changed again since the last scan."""
+        ready = []
+        for path in self.paths:
+            stat = _stat(path)
+            if stat is None or stat == self.seen[path]:
+                # A file that is removed keeps serving its last version
+                self.pending.pop(path, None)
+            elif self.pending.get(path) == stat:
+                ready.append(path)
+                self.seen[path] = self.pending.pop(path)
+            else:
+                self.pending[path] = stat
+        return ready
+
+    def reload(self, paths):
+        """Rebuild what depends on ``paths`` from their new contents, then publish them."""
+        start = time.perf_counter()
+        specs = self._loads_reading(paths)
+        jobs = offload.jobs_reading(paths)
+        with data.staging() as staged:
+            for path in paths:
+                data.fingerprint(path)
+            for spec in specs:
+                try:
+                    data.replay(spec)
+                except Exception:
+                    # The page reports its own load errors to the user
+                    pass
+            for job in jobs:
+                try:
+                    offload.submit(job.name, *job.inputs, **job.params).future.result()
+                except Exception:
+                    pass
+            for path in paths:
+                if path.endswith(".xlsx"):
+                    excel.read_workbook(path)
+        gone = data.publish(staged)
+        _forget(gone)
+        try:
+            # The Data Explorer's views read a copy of the new contents
+            sql.refresh(paths)
+        except Exception:
+            traceback.print_exc()
+
+        # Rendered after the swap; renders remove the versions they replace
+        for name, (_, view_paths) in static_charts.VIEWS.items():
+            if set(view_paths) & set(paths):
+                try:
+                    static_charts.render(name)
+                except Exception:
+                    pass
+        seconds = time.perf_counter() - start
+        with self.lock:
+            self.history.appendleft({
+                "Reloaded": time.strftime("%H:%M:%S"),
+                "Files": ", ".join(os.path.relpath(p, data.REPO_ROOT) for p in paths),
+                "Changed": sum(1 for p in paths if p in staged),
+                "Loads Rebuilt": len(specs),
+                "Jobs Rerun": len(jobs),
+                "Seconds": seconds,
+            })
+        return seconds
+
+    def report(self):
+        with self.lock:
+            rows = list(self.history)
+        columns = ["Reloaded", "Files", "Changed", "Loads Rebuilt", "Jobs Rerun", "Seconds"]
+        return pd.DataFrame(rows, columns=columns)
+
+    def _loads_reading(self, paths):
+        specs = warmup.get_service().loads_reading(paths) if warmup._service is not None else []
+        for path in paths:
+            spec = ["load_csv", [os.path.relpath(path, data.REPO_ROOT)], {}]
+            if path.lower().endswith(".csv") and spec not in specs and data.is_loaded(path):
+                specs.append(spec)
+        return specs
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            ready = self.scan()
+            if not ready:
+                continue
+            try:
+                self.reload(ready)
+            except Exception:
+                # Keep watching; pages still have the previous version
+                traceback.print_exc()
+
+
+def _stat(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _forget(digests):
+    """Drop per-version caches of contents no file has any more."""
+    for lock, cache in [(profile._lock, profile._profiles), (debounce._lock, debounce._overviews)]:
+        with lock:
+            for key in [k for k in cache if k[0] in digests]:
+                del cache[key]
+
+
+def get_service():
+    """Return the process-wide reloader, watching the datasets in the manifest from first use."""
+    global _service
+    with _lock:
+        if _service is None:
+            _service = ReloadService(manifest.paths()).start()
+        return _service
+
+
+# ========== Check ==========
+
+def check(dataset, appended=1_000, interval=0.2):
+    """Edit a copy of ``dataset`` under a running reloader and follow the swap."""
+    tmp_dir = tempfile.mkdtemp(prefix="eng220-reload-")
+    try:
+        path = os.path.join(tmp_dir, os.path.basename(dataset))
+        shutil.copyfile(dataset, path)
+        service = ReloadService([path], interval=interval).start()
+        before = data.load_csv(path)
+        old_digest = data.fingerprint(path)
+
+        # Rewrite it in place with extra rows, as a team updating its data would
+        grown = pd.concat([before, before.head(appended)], ignore_index=True)
+        changed_at = time.perf_counter()
+        grown.to_csv(path, index=False)
+
+        reads, swapped_at = [], None
+        while time.perf_counter() - changed_at < 60:
+            rows = len(data.load_csv(path))
+            reads.append(rows)
+            if rows == len(grown):
+                swapped_at = time.perf_counter()
+                break
+            assert rows == len(before), f"read a mix of versions ({rows} rows)"
+            time.sleep(0.01)
+        service.stop()
+        assert swapped_at is not None, "the change was never published"
+        assert data.fingerprint(path) != old_digest
+
+        print(f"{os.path.relpath(dataset, data.REPO_ROOT)}: {len(before)} -> {len(grown)} rows")
+        print(f"  {len(reads) - 1} reads while rebuilding returned the old version, none a partial one")
+        print(f"  new version published {swapped_at - changed_at:.2f}s after the write "
+              f"(watch interval {interval}s, rebuild {service.history[0]['Seconds']:.2f}s)")
+        print(f"  old version dropped: {not any(e.digest == old_digest for e in data._datasets.values())}")
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def main(argv=None):
+    default = os.path.join(data.REPO_ROOT, "ENG220-Group-020", "filtered_data_updated.csv")
+    parser = argparse.ArgumentParser(prog="python -m eng220.reload")
+    parser.add_argument("dataset", nargs="?", default=default)
+    parser.add_argument("--interval", type=float, default=0.2)
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.dataset):
+        sys.exit(f"{args.dataset} not found")
+    check(args.dataset, interval=args.interval)
+
+
+if __name__ == "__main__":
+    main()
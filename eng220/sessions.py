@@ -0,0 +1,368 @@
+# Per-session resource accounting and eviction of idle sessions' state.
+#
+# Datasets are shared (eng220.data), but every session also keeps state of its
+# own between runs: the chart sections (fragments) hold the frames they were
+# drawn from, its st.session_state, and the images of its charts.  Nothing
+# bounded that.  Every page run is now accounted to its session: the CPU time
+# of the script thread, and, once the run is done, the memory the session
+# retains.  Retained memory is estimated from those three; frames that are
+# shallow copies of a shared dataset only count the columns they own.
+#
+# A session's fragments are its heavy state, and the only state evicted:
+# st.session_state and chart images belong to the page and count towards the
+# totals but not towards the ceiling.  The fragments are evicted
+#
+#   - after a run that leaves them above SESSION_MAX_BYTES,
+#   - when it has not run for IDLE_SECONDS,
+#   - oldest first, while all sessions together retain more than TOTAL_MAX_BYTES.
+#
+# An evicted fragment is replaced by one that reruns the whole page, so the
+# next click in a chart section rebuilds it from the shared data instead of
+# doing nothing.  Fragment reruns do not go through the page wrapper, so their
+# CPU time is not counted and a session only using chart sections looks idle.
+# Totals are in the home page's "Sessions" expander and in eng220.metrics.
+#
+# The sizes are read from Streamlit internals (the fragment storage, the
+# session manager, the media file manager), so requirements.txt pins its
+# minor version.  Should they move, a run is not accounted rather than failing.
+#
+#   with sessions.track(page):
+#       pg.run()
+#
+#   python -m eng220.sessions    run a page as several sessions; check the accounting and the evictions
+
+import argparse
+import contextlib
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from eng220 import data, metrics
+
+SESSION_MAX_BYTES = int(os.environ.get("ENG220_SESSION_MB", 256)) * 2**20
+TOTAL_MAX_BYTES = int(os.environ.get("ENG220_SESSIONS_MB", 2048)) * 2**20
+IDLE_SECONDS = float(os.environ.get("ENG220_SESSION_IDLE_MIN", 15)) * 60
+SWEEP_INTERVAL = 30.0
+# Values of object columns whose size is measured; the rest are assumed alike
+SAMPLE_VALUES = 1000
+MAX_DEPTH = 6
+
+_lock = threading.Lock()
+_sessions = {}  # session id -> _Session
+_sweeper = None
+
+
+class _Session:
+    def __init__(self, ctx):
+        # The run context's views of the session, also valid between its runs
+        self.state = ctx.session_state
+        self.fragments = ctx.fragment_storage
+        self.page = None
+        self.runs = 0
+        self.cpu = 0.0
+        self.retained = 0
+        self.evictable = 0  # of which held by fragments
+        self.last_run = time.monotonic()
+        self.running = False
+        self.evictions = 0
+
+
+@contextlib.contextmanager
+def track(page):
+    """Account one run of ``page`` to the current session; evict its state if it is too large."""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    _get_sweeper()
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        yield
+        return
+    with _lock:
+        session = _sessions.get(ctx.session_id)
+        if session is None:
+            session = _sessions[ctx.session_id] = _Session(ctx)
+        session.running = True
+    start = time.thread_time()
+    try:
+        yield
+    finally:
+        cpu = time.thread_time() - start
+        metrics.inc("eng220_session_cpu_seconds_total", cpu)
+        try:
+            retained, evictable = measure(ctx.session_id, session)
+        except Exception:
+            # Streamlit internals not as expected; the page run itself is unaffected
+            retained, evictable = session.retained, 0
+        with _lock:
+            session.page = os.path.relpath(os.path.abspath(page), data.REPO_ROOT).replace(os.sep, "/")
+            session.runs += 1
+            session.cpu += cpu
+            session.retained, session.evictable = retained, evictable
+            session.last_run = time.monotonic()
+            session.running = False
+        if evictable > SESSION_MAX_BYTES:
+            with contextlib.suppress(Exception):
+                evict(ctx.session_id, "ceiling")
+
+
+def measure(session_id, session):
+    """Estimate the bytes ``session`` keeps between runs; return (all, held by fragments)."""
+    shared = _shared_arrays()
+    seen = set()
+    with session.fragments._lock:
+        fragments = list(session.fragments._fragments.values())
+    # Fragments first, so what they share with session_state counts as evictable
+    evictable = sum(_nbytes(fragment, shared, seen) for fragment in fragments)
+    total = evictable + sum(_nbytes(value, shared, seen) for value in session.state.filtered_state.values())
+    return total + _media_bytes(session_id), evictable
+
+
+def evict(session_id, reason):
+    """Replace the session's fragments with ones that rerun the page; return the bytes freed."""
+    with _lock:
+        session = _sessions.get(session_id)
+    if session is None:
+        return 0
+    storage = session.fragments
+    with storage._lock:
+        evicted = [fid for fid, fragment in storage._fragments.items() if fragment is not _rerun_page]
+        for fid in evicted:
+            storage._fragments[fid] = _rerun_page
+    if not evicted:
+        return 0
+    retained, evictable = measure(session_id, session)
+    with _lock:
+        freed = max(0, session.retained - retained)
+        session.retained, session.evictable = retained, evictable
+        session.evictions += 1
+    metrics.inc("eng220_session_evictions_total", reason=reason)
+    metrics.inc("eng220_session_evicted_bytes_total", freed, reason=reason)
+    return freed
+
+
+def _rerun_page():
+    import streamlit as st
+
+    # The chart section's frames were evicted; the page run rebuilds them
+    st.rerun(scope="app")
+
+
+def sweep(now=None):
+    """Forget closed sessions, evict idle ones, then the oldest while over TOTAL_MAX_BYTES."""
+    now = time.monotonic() if now is None else now
+    open_sessions = _open_sessions()
+    with _lock:
+        if open_sessions is not None:
+            for session_id in [s for s in _sessions if s not in open_sessions]:
+                del _sessions[session_id]
+        # Sessions whose fragments are evicted already have nothing more to give
+        candidates = sorted(((s.last_run, session_id) for session_id, s in _sessions.items()
+                             if not s.running and s.evictable), key=lambda c: c[0])
+        total = sum(s.retained for s in _sessions.values())
+    for last_run, session_id in candidates:
+        if now - last_run >= IDLE_SECONDS:
+            total -= evict(session_id, "idle")
+        elif total > TOTAL_MAX_BYTES:
+            total -= evict(session_id, "total")
+
+
+def report():
+    """Return one row per session, most recently active first."""
+    now = time.monotonic()
+    with _lock:
+        rows = [{
+            "Session": session_id[:8],
+            "Page": session.page,
+            "Runs": session.runs,
+            "CPU (s)": session.cpu,
+            "Retained (MB)": session.retained / 1e6,
+            "Idle (s)": 0.0 if session.running else now - session.last_run,
+            "Evictions": session.evictions,
+        } for session_id, session in _sessions.items()]
+    columns = ["Session", "Page", "Runs", "CPU (s)", "Retained (MB)", "Idle (s)", "Evictions"]
+    return pd.DataFrame(rows, columns=columns).sort_values("Idle (s)", ignore_index=True)
+
+
+# ========== Sizes ==========
+
+def _shared_arrays():
+    """Ids of the arrays held by the shared dataset registry."""
+    with data._lock:
+        frames = [entry.frame for entry in data._datasets.values()]
+    return {id(array) for frame in frames for array in frame._mgr.arrays}
+
+
+def _nbytes(value, shared, seen, depth=0):
+    """Deep size of ``value``, not counting arrays in ``shared`` or objects in ``seen``."""
+    if id(value) in seen or depth > MAX_DEPTH:
+        return 0
+    seen.add(id(value))
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        # Shallow copies of a shared dataset share its arrays
+        return sum(_array_bytes(array) for array in value._mgr.arrays if id(array) not in shared)
+    if isinstance(value, np.ndarray):
+        return _array_bytes(value) if id(value) not in shared else 0
+    if isinstance(value, (bytes, bytearray, str)):
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_nbytes(v, shared, seen, depth + 1) for v in value.values())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(_nbytes(v, shared, seen, depth + 1) for v in value)
+    if callable(value):
+        # Fragments keep what they draw in their closures (and Streamlit's wrappers in theirs)
+        parts = [cell.cell_contents for cell in getattr(value, "__closure__", None) or ()
+                 if cell.cell_contents is not None]
+        parts += list(getattr(value, "__defaults__", None) or ())
+        parts += [getattr(value, attr) for attr in ("__wrapped__", "func", "args", "keywords")
+                  if getattr(value, attr, None) is not None]
+        return sum(_nbytes(part, shared, seen, depth + 1) for part in parts if not isinstance(part, type))
+    return sys.getsizeof(value)
+
+
+def _array_bytes(array):
+    size = int(array.nbytes)
+    if getattr(array, "dtype", None) == object and array.size:
+        values = np.asarray(array).ravel()
+        sample = values[:SAMPLE_VALUES]
+        size += int(sum(sys.getsizeof(v) for v in sample) * len(values) / len(sample))
+    return size
+
+
+# ========== Streamlit runtime ==========
+
+def _open_sessions():
+    """Ids of the sessions the server still holds (connected or waiting to reconnect), or None."""
+    from streamlit.runtime import Runtime
+
+    if not Runtime.exists():
+        return None
+    return {info.session.id for info in Runtime.instance()._session_mgr.list_sessions()}
+
+
+def _media_bytes(session_id):
+    from streamlit.runtime import Runtime
+
+    if not Runtime.exists():
+        return 0
+    manager = Runtime.instance().media_file_mgr
+    with manager._lock:
+        file_ids = list(manager._files_by_session_and_coord.get(session_id, {}).values())
+    files = getattr(manager._storage, "_files_by_id", {})
+    return sum(len(files[fid].content) for fid in file_ids if fid in files)
+
+
+class _Sweeper:
+    def __init__(self, interval=SWEEP_INTERVAL):
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="sessions", daemon=True)
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                sweep()
+            except Exception:
+                # Sessions closing mid-sweep; the next sweep sees them gone
+                pass
+
+
+def _get_sweeper():
+    global _sweeper
+    with _lock:
+        if _sweeper is None:
+            _sweeper = _Sweeper()
+            _sweeper.thread.start()
+        return _sweeper
+
+
+def _retained():
+    with _lock:
+        sizes = [s.retained for s in _sessions.values()]
+    return {(("stat", "total"),): sum(sizes), (("stat", "max"),): max(sizes, default=0)}
+
+
+def _tracked():
+    with _lock:
+        return {(): len(_sessions)}
+
+
+metrics.gauge("eng220_session_retained_bytes", "Memory sessions keep between runs (total, largest).", _retained)
+metrics.gauge("eng220_tracked_sessions", "Sessions with at least one accounted run.", _tracked)
+metrics.DESCRIPTIONS.update({
+    "eng220_session_cpu_seconds_total": ("counter", "CPU time of page runs on their script threads."),
+    "eng220_session_evictions_total": ("counter", "Sessions whose fragments were evicted, by reason."),
+    "eng220_session_evicted_bytes_total": ("counter", "Estimated bytes freed by evictions, by reason."),
+})
+
+
+# ========== Check ==========
+
+def main(argv=None):
+    from streamlit.testing.v1 import AppTest
+
+    # The page accounts into eng220.sessions, not into this module run as __main__
+    from eng220 import interactions, sessions
+
+    default = os.path.join(data.REPO_ROOT, "ENG220-Group-012", "app12.py")
+    parser = argparse.ArgumentParser(prog="python -m eng220.sessions")
+    parser.add_argument("page", nargs="?", default=default, help="a page with a chart section")
+    args = parser.parse_args(argv)
+    page = os.path.abspath(args.page)
+    script = f"""
+import runpy
+from eng220 import sessions
+with sessions.track({page!r}):
+    runpy.run_path({page!r}, run_name="__main__")
+"""
+    app = AppTest.from_string(script, default_timeout=120).run().run()
+    assert not app.exception, app.exception[0].message
+    print(f"{os.path.relpath(page, data.REPO_ROOT)}, two runs")
+    print(sessions.report().to_string(index=False))
+
+    # As if nobody had touched it for IDLE_SECONDS
+    sessions.sweep(now=time.monotonic() + sessions.IDLE_SECONDS)
+    fragments = app._fragment_storage._fragments
+    assert fragments and all(f is sessions._rerun_page for f in fragments.values())
+    print("\nidle sweep: chart section evicted")
+    print(sessions.report().to_string(index=False))
+
+    # A click in the evicted chart section reruns the page, which rebuilds it
+    interactions._widget(app, interactions.WIDGET_LABEL).set_value(interactions.WIDGET_VALUE)
+    with interactions._recording(next(iter(fragments))):
+        app.run()
+    assert not app.exception, app.exception[0].message
+    fragments = app._fragment_storage._fragments
+    assert fragments and all(f is not sessions._rerun_page for f in fragments.values())
+    print("\nclick in the chart section: page rerun, chart section rebuilt")
+
+    # Over the ceiling the chart section is evicted as soon as the run ends
+    saved, sessions.SESSION_MAX_BYTES = sessions.SESSION_MAX_BYTES, 0
+    try:
+        app.run()
+    finally:
+        sessions.SESSION_MAX_BYTES = saved
+    assert all(f is sessions._rerun_page for f in app._fragment_storage._fragments.values())
+    print("run above the ceiling: chart section evicted")
+
+    # session_state is not evictable, so it does not count towards the ceiling
+    app.session_state["sessions_check_state"] = np.zeros(2**20)
+    saved, sessions.SESSION_MAX_BYTES = sessions.SESSION_MAX_BYTES, 2**20
+    try:
+        app.run()
+    finally:
+        sessions.SESSION_MAX_BYTES = saved
+    assert sessions.report()["Retained (MB)"].max() > 2**20 / 1e6
+    assert all(f is not sessions._rerun_page for f in app._fragment_storage._fragments.values())
+    print("run above the ceiling with a large session_state: chart section kept")
+    print(sessions.report().to_string(index=False))
+    print()
+    print("".join(line + "\n" for line in metrics.render().splitlines()
+                  if line.startswith(("eng220_session", "eng220_tracked"))), end="")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+# Embedded SQL over every bundled dataset (DuckDB).
+#
+# Each bundled CSV is converted once to Parquet under CACHE_DIR/parquet/,
+# keyed by content hash like the Excel cache, whose sheets are already
+# Parquet.  Every dataset gets a view over its Parquet file, named after the
+# group and file (g021_aqi_combined_1980_2024, g005_california2019_ozone), so
+# DuckDB pushes column selection and WHERE filters into the scan and reads
+# only what a query needs.  Queries take $name parameters, return Arrow
+# tables and stop after MAX_ROWS rows or QUERY_TIMEOUT seconds.
+#
+# When eng220.reload publishes a changed dataset, its views are pointed at a
+# Parquet copy of the new contents, so queries follow the pages without a
+# restart.
+#
+# The views are shared by every session, so a query must be one SELECT: no
+# COPY, ATTACH, DROP or SET.  The connection can only read the Parquet and
+# Excel cache directories, external access is off and the settings are locked.
+#
+#   python -m eng220.sql                                  build and list the tables
+#   python -m eng220.sql "SELECT ... WHERE Year > $y" y=2010
+
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+import duckdb
+import pyarrow as pa
+
+from eng220 import data, excel
+
+PARQUET_DIR = os.path.join(data.CACHE_DIR, "parquet")
+MAX_ROWS = 10_000
+BATCH_ROWS = 2_048
+QUERY_TIMEOUT = 30.0  # seconds
+
+_lock = threading.Lock()
+_engine = None
+
+
+def table_name(path, sheet=None):
+    """Return the view name of a bundled file, e.g. ``g009_weapon_arrests_monthly``."""
+    rel = os.path.relpath(path, data.REPO_ROOT)
+    group = re.match(r"ENG220-Group-(\d+)", rel).group(1)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    if sheet is not None:
+        stem = f"{stem}_{sheet}"
+    return f"g{group}_" + re.sub(r"[^a-z0-9]+", "_", stem.lower()).strip("_")
+
+
+def parse_value(text):
+    """Turn a parameter typed as text into an int, float or string."""
+    for kind in (int, float):
+        try:
+            return kind(text)
+        except ValueError:
+            pass
+    return text
+
+
+def _quote(path):
+    return "'" + path.replace("'", "''") + "'"
+
+
+def csv_to_parquet(con, path):
+    """Return the cached Parquet copy of a CSV, converting it if needed."""
+    out = os.path.join(PARQUET_DIR, f"{data.fingerprint(path)}.parquet")
+    if os.path.exists(out):
+        return out
+    os.makedirs(PARQUET_DIR, exist_ok=True)
+    tmp_path = f"{out}.{os.getpid()}.tmp"
+    try:
+        con.execute(f"COPY (SELECT * FROM read_csv({_quote(path)})) TO {_quote(tmp_path)} (FORMAT parquet)")
+    except duckdb.Error:
+        # DuckDB's sniffer gives up on a few files; pandas reads them as the pages do
+        frame = excel._arrow_safe(data.load_csv(path).copy())
+        frame.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, out)
+    return out
+
+
+def workbook_parquet(path):
+    """Return ``[(sheet, parquet path)]`` for a workbook from the Excel cache."""
+    excel.read_workbook(path)
+    cache_dir = os.path.join(excel.EXCEL_CACHE_DIR, data.fingerprint(path))
+    with open(os.path.join(cache_dir, "sheets.json")) as f:
+        return [(sheet, os.path.join(cache_dir, name)) for sheet, name in json.load(f)]
+
+
+class SQLEngine:
+    def __init__(self):
+        self.con = duckdb.connect()
+        self.tables = {}  # view name -> bundled file it reads
+        self.failed = {}  # bundled file -> error
+
+        for path in data.bundled_csvs() + excel.bundled_workbooks():
+            self._add(path, self.con)
+
+        # From here on, queries can only read the Parquet files
+        readable = ", ".join(_quote(d + os.sep) for d in (PARQUET_DIR, excel.EXCEL_CACHE_DIR))
+        self.con.execute(f"SET allowed_directories = [{readable}]")
+        self.con.execute("SET enable_external_access = false")
+        self.con.execute("SET lock_configuration = true")
+
+    def refresh(self, paths):
+        """Point the views of ``paths`` at their current contents (after eng220.reload publishes them)."""
+        paths = {os.path.abspath(p) for p in paths}
+        # The engine's own connection can no longer read the CSVs
+        con = duckdb.connect()
+        try:
+            for path in sorted(paths & set(self.tables.values()) | paths & set(self.failed)):
+                self._add(path, con)
+        finally:
+            con.close()
+
+    def _add(self, path, con):
+        self.failed.pop(path, None)
+        if path.lower().endswith(".csv"):
+            self._register(table_name(path), path, lambda: csv_to_parquet(con, path))
+            return
+        try:
+            sheets = workbook_parquet(path)
+        except Exception as e:
+            self.failed[path] = e
+            return
+        for sheet, parquet in sheets:
+            name = table_name(path, sheet if len(sheets) > 1 else None)
+            self._register(name, path, lambda p=parquet: p)
+
+    def _register(self, name, path, parquet):
+        try:
+            source = parquet()
+            self.con.execute(f'CREATE OR REPLACE VIEW "{name}" AS SELECT * FROM read_parquet({_quote(source)})')
+        except Exception as e:
+            self.failed[path] = e
+            return
+        self.tables[name] = path
+
+    def columns(self, name):
+        """Return ``[(column, type)]`` of a view."""
+        cur = self.con.cursor()
+        try:
+            return [(row[0], row[1]) for row in cur.execute(f'DESCRIBE "{name}"').fetchall()]
+        finally:
+            cur.close()
+
+    def query(self, sql, params=None, max_rows=MAX_ROWS):
+        """Run ``sql`` and return ``(Arrow table, truncated)``.
+
+        At most ``max_rows`` rows are fetched; the rest of the result is never
+        computed.  ``params`` maps ``$name`` placeholders to values.  Anything
+        but a single SELECT raises duckdb.PermissionException; a query still
+        running after QUERY_TIMEOUT seconds is interrupted.
+        """
+        statements = duckdb.extract_statements(sql)
+        if len(statements) != 1 or statements[0].type != duckdb.StatementType.SELECT:
+            raise duckdb.PermissionException("Only a single SELECT query can be run")
+        # Each call gets its own cursor, so sessions can query concurrently
+        cur = self.con.cursor()
+        # max_rows bounds the rows fetched, not the work; this bounds the work
+        timer = threading.Timer(QUERY_TIMEOUT, cur.interrupt)
+        timer.start()
+        try:
+            reader = cur.execute(sql, params or None).to_arrow_reader(BATCH_ROWS)
+            batches, rows = [], 0
+            for batch in reader:
+                batches.append(batch)
+                rows += batch.num_rows
+                if rows > max_rows:
+                    break
+            table = pa.Table.from_batches(batches, schema=reader.schema)
+        except duckdb.InterruptException as e:
+            raise duckdb.InterruptException(f"The query was stopped after {QUERY_TIMEOUT:g} seconds") from e
+        finally:
+            timer.cancel()
+            cur.close()
+        return table.slice(0, max_rows), rows > max_rows
+
+
+def get_engine():
+    """Return the process-wide engine, building it on first use."""
+    global _engine
+    with _lock:
+        if _engine is None:
+            _engine = SQLEngine()
+        return _engine
+
+
+def refresh(paths):
+    """Update the views of ``paths`` in the process-wide engine, if it has been built."""
+    with _lock:
+        engine = _engine
+    if engine is not None:
+        engine.refresh(paths)
+
+
+def main(argv):
+    start = time.perf_counter()
+    engine = get_engine()
+    print(f"{len(engine.tables)} tables ready in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+    for path, error in engine.failed.items():
+        print(f"Skipped {os.path.relpath(path, data.REPO_ROOT)}: {error}", file=sys.stderr)
+    if not argv:
+        for name, path in sorted(engine.tables.items()):
+            print(f"{name:60} {os.path.relpath(path, data.REPO_ROOT)}")
+        return
+
+    params = dict(arg.split("=", 1) for arg in argv[1:])
+    start = time.perf_counter()
+    table, truncated = engine.query(argv[0], {k: parse_value(v) for k, v in params.items()})
+    elapsed = (time.perf_counter() - start) * 1000
+    print(table.to_pandas().to_string())
+    print(f"{table.num_rows} rows{' (truncated)' if truncated else ''} in {elapsed:.1f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,245 @@
+# Pre-rendered charts for views that do not depend on any widget.
+#
+# Some charts always show the whole dataset (an overall trend, a fixed
+# summary), yet the page recomputed and re-rasterized them on every rerun.
+# Each such view is registered here with the datasets it reads.  The build
+# renders all of them in parallel into CACHE_DIR/static_charts/<view>/, one
+# file per version: the name is a hash of the datasets' contents and of the
+# render function's source, so editing either produces a new artifact.  At
+# runtime ``show`` only reads the file; if it is missing (no build was run,
+# or a dataset changed) the view is rendered once in-process and saved.
+#
+#   python -m eng220.static_charts            render every view that is stale
+#   python -m eng220.static_charts --force    re-render all of them
+
+import argparse
+import contextlib
+import functools
+import hashlib
+import inspect
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from matplotlib.figure import Figure
+
+from eng220 import cancel, data, figures, metrics
+
+STATIC_DIR = os.path.join(data.CACHE_DIR, "static_charts")
+
+VIEWS = {}  # name -> (render function, dataset paths)
+
+
+def static_view(name, *datasets):
+    """Register ``render(*frames)`` as a static view of ``datasets``.
+
+    Dataset paths are relative to the repository root.  ``render`` returns a
+    matplotlib Figure (served as PNG) or a plotly figure (served as JSON).
+    """
+    def register(render):
+        VIEWS[name] = (render, [os.path.join(data.REPO_ROOT, path) for path in datasets])
+        return render
+    return register
+
+
+@functools.cache
+def _source_digest(name):
+    render, _ = VIEWS[name]
+    return hashlib.sha256(inspect.getsource(render).encode()).hexdigest()
+
+
+def version(name):
+    """Return the artifact version of a view for the current datasets and code."""
+    _, paths = VIEWS[name]
+    sha = hashlib.sha256(_source_digest(name).encode())
+    for path in paths:
+        sha.update(data.fingerprint(path).encode())
+    return sha.hexdigest()[:16]
+
+
+def artifact_path(name):
+    # Plotly views are stored as JSON, matplotlib views as PNG
+    render, _ = VIEWS[name]
+    ext = "json" if getattr(render, "plotly", False) else "png"
+    return os.path.join(STATIC_DIR, name, f"{version(name)}.{ext}")
+
+
+def render(name, force=False):
+    """Write the artifact of a view if it is missing; return its path."""
+    path = artifact_path(name)
+    if os.path.exists(path) and not force:
+        metrics.cache("static_charts", "hits")
+        return path
+    metrics.cache("static_charts", "misses")
+    render_view, paths = VIEWS[name]
+    cancel.checkpoint("render")
+    frames = [data.load_csv(p) for p in paths]
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Per thread too: sessions of one server can render the same view at once
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with metrics.timer("eng220_render_seconds", kind="static"):
+        fig = render_view(*frames)
+        if isinstance(fig, Figure):
+            fig.savefig(tmp_path, **figures.SAVEFIG_OPTIONS)
+        else:
+            with open(tmp_path, "w") as f:
+                f.write(fig.to_json())
+    os.replace(tmp_path, path)
+
+    # Older versions of this view are no longer reachable
+    for entry in os.listdir(os.path.dirname(path)):
+        old = os.path.join(os.path.dirname(path), entry)
+        if old != path and not entry.endswith(".tmp"):
+            # Another process may have removed it first
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(old)
+    return path
+
+
+def show(name):
+    """Display a static view in the running page."""
+    import streamlit as st
+
+    path = render(name)
+    if path.endswith(".json"):
+        import plotly.io as pio
+        with open(path) as f:
+            st.plotly_chart(pio.from_json(f.read(), skip_invalid=True), width="stretch")
+    else:
+        st.image(path, width="stretch")
+
+
+def plotly_view(render):
+    render.plotly = True
+    return render
+
+
+# ========== Views ==========
+
+@static_view("group009_seasonal_averages",
+             "ENG220-Group-009/weapon_arrests_monthly_averages.csv")
+@plotly_view
+def seasonal_averages(monthly_averages):
+    import plotly.express as px
+
+    fig = px.bar(monthly_averages, x='Month', y='Average_Arrests', error_y='Std_Dev',
+                 title='Average Monthly Arrests (All Years)',
+                 labels={'Average_Arrests': 'Average Number of Arrests'})
+    fig.update_layout(xaxis_title='Month', yaxis_title='Average Arrests')
+    return fig
+
+
+@static_view("group018_epa_budget", "ENG220-Group-018/datasets/finance/EPAbudget.csv")
+def epa_budget(df):
+    budget = df['Enacted Budget'].replace(r'[\$,]', '', regex=True).astype(float)
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    ax.plot(df["Fiscal Year"], budget, label="Enacted Budget")
+    ax.plot(df["Fiscal Year"], df["Workforce"], label="Workforce")
+    ax.set_xlabel("Fiscal Year")
+    ax.legend()
+    ax.grid(True)
+    return fig
+
+
+@static_view("group021_overall_aqi", "ENG220-Group-021/data/aqi_combined_1980_2024.csv")
+def overall_aqi(aqi):
+    overall = aqi.groupby("Year")["AQI_Median"].mean()
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    ax.plot(overall.index, overall.values, marker='o', color='blue')
+    ax.set_title("Overall AQI Trends")
+    ax.set_xlabel("Year")
+    ax.set_ylabel("Average AQI Median")
+    ax.grid(True)
+    return fig
+
+
+@static_view("group021_snow_decline", "ENG220-Group-021/data/reshaped_snow_depth.csv")
+def snow_decline(snow_depth_data):
+    decline = snow_depth_data.groupby("Site")["Snow Depth (in)"].agg(["first", "last"])
+    decline["Decline"] = decline["first"] - decline["last"]
+    top_decline_sites = decline.nlargest(10, "Decline")["Decline"].reset_index()
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    ax.barh(top_decline_sites["Site"], top_decline_sites["Decline"], color="skyblue")
+    ax.set_title("Top Sites with Greatest Snow Depth Decline")
+    ax.set_xlabel("Decline in Snow Depth (in)")
+    ax.set_ylabel("Site")
+    ax.grid(True, axis="x")
+    return fig
+
+
+@static_view("group021_overall_water_trends",
+             "ENG220-Group-021/data/reshaped_snow_depth.csv",
+             "ENG220-Group-021/data/fixed_ground_water_cleaned.csv")
+def overall_water_trends(snow_depth_data, ground_water_data):
+    overall_snow_depth = snow_depth_data.groupby("Water Year")["Snow Depth (in)"].mean().reset_index()
+    overall_water_level = ground_water_data.groupby("Water Year")["Static Water Level (ft)"].mean().reset_index()
+    combined = overall_snow_depth.merge(overall_water_level, on="Water Year", how="inner")
+    year = combined["Water Year"]
+
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    ax.plot(year, combined["Snow Depth (in)"], marker='o', color='blue', label='Avg Snow Depth')
+    ax.plot(year, combined["Static Water Level (ft)"], marker='o', color='green', label='Avg Static Water Level')
+    if len(combined) > 1:
+        m_snow, b_snow = np.polyfit(year, combined["Snow Depth (in)"], 1)
+        ax.plot(year, m_snow * year + b_snow, color='blue', linestyle='--')
+        m_water, b_water = np.polyfit(year, combined["Static Water Level (ft)"], 1)
+        ax.plot(year, m_water * year + b_water, color='green', linestyle='--')
+    ax.set_title("Overall Trends Across All Sites and Years")
+    ax.set_xlabel("Year")
+    ax.set_ylabel("Values")
+    ax.legend()
+    ax.grid(True)
+    return fig
+
+
+# ========== Build ==========
+
+def _build_one(name, force):
+    start = time.perf_counter()
+    fresh = force or not os.path.exists(artifact_path(name))
+    path = render(name, force)
+    return name, path, fresh, time.perf_counter() - start
+
+
+def build(names=None, force=False, workers=None):
+    """Render the given views (default: all) in parallel worker processes."""
+    names = names or sorted(VIEWS)
+    failed = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_build_one, name, force): name for name in names}
+        for future in as_completed(futures):
+            try:
+                name, path, fresh, elapsed = future.result()
+            except Exception as e:
+                failed[futures[future]] = e
+                print(f"{futures[future]}: failed: {e}", file=sys.stderr)
+                continue
+            state = f"rendered in {elapsed:.2f}s" if fresh else "up to date"
+            print(f"{name}: {os.path.relpath(path, data.REPO_ROOT)} ({state})")
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m eng220.static_charts")
+    parser.add_argument("views", nargs="*", help="views to render (default: all)")
+    parser.add_argument("--force", action="store_true", help="re-render up-to-date views")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    unknown = set(args.views) - set(VIEWS)
+    if unknown:
+        parser.error(f"unknown views: {', '.join(sorted(unknown))}; known: {', '.join(sorted(VIEWS))}")
+    if build(args.views, args.force, args.workers):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# Arrow payloads of st.dataframe tables, converted once per dataset version.
+#
+# st.dataframe converts its DataFrame to Arrow IPC bytes on every rerun, so
+# the same unchanged preview was converted again for every click in every
+# session.  ``show`` keeps the bytes Streamlit would have produced, keyed by
+# the fingerprints of the files the table came from, the row window and the
+# columns shown, plus any filter values the caller adds.  On a hit the bytes
+# are handed back to st.dataframe as an Arrow table read straight from them,
+# which Streamlit writes out again without touching pandas.  Payloads are
+# kept least recently used first up to MAX_BYTES.
+#
+#   tables.show(data, csv_path)                                      whole file
+#   tables.show(data, csv_path, rows=(start, stop), columns=chosen)  a window of it
+#   tables.show(filtered, csv_path, selected_years)                  after filtering
+#
+#   python -m eng220.tables    compare the bytes sent; time conversions with and without the cache
+
+import argparse
+import collections
+import os
+import threading
+import time
+
+from eng220 import data, metrics
+
+MAX_BYTES = 256 * 2**20
+
+_lock = threading.Lock()
+_payloads = collections.OrderedDict()  # key -> Arrow IPC bytes, least recently used first
+_size = 0
+_hits = 0
+_misses = 0
+
+
+def show(frame, source, *filters, rows=None, columns=None, **kwargs):
+    """Display ``frame`` (or rows ``start:stop`` and ``columns`` of it) with st.dataframe.
+
+    ``source`` is the path, or list of paths, ``frame`` was loaded from;
+    ``filters`` are whatever else decided its contents (selected years,
+    categories, ...).  They must determine the table completely.
+    """
+    import streamlit as st
+
+    st.dataframe(arrow_table(frame, source, *filters, rows=rows, columns=columns), **kwargs)
+
+
+def arrow_table(frame, source, *filters, rows=None, columns=None):
+    """Return the window of ``frame`` as a pyarrow Table, from cached bytes when possible."""
+    import pyarrow as pa
+
+    paths = [source] if isinstance(source, (str, os.PathLike)) else list(source)
+    columns = tuple(columns) if columns is not None else None
+    # Shape and column names catch callers that forget a filter or add columns
+    key = (tuple(data.fingerprint(p) for p in paths), filters, rows, columns,
+           frame.shape, tuple(map(str, frame.columns)))
+    payload = _get(key)
+    if payload is None:
+        from streamlit import dataframe_util
+
+        view = frame.iloc[slice(*rows)] if rows is not None else frame
+        view = view[list(columns)] if columns is not None else view
+        # The conversion st.dataframe would do, fallbacks for mixed columns included
+        payload = dataframe_util.convert_pandas_df_to_arrow_bytes(view)
+        _put(key, payload)
+    return pa.ipc.open_stream(pa.py_buffer(payload)).read_all()
+
+
+def _get(key):
+    global _hits, _misses
+    with _lock:
+        payload = _payloads.get(key)
+        if payload is None:
+            _misses += 1
+        else:
+            _hits += 1
+            _payloads.move_to_end(key)
+    metrics.cache("tables", "misses" if payload is None else "hits")
+    return payload
+
+
+def _put(key, payload):
+    global _size
+    with _lock:
+        if key in _payloads:
+            return
+        _payloads[key] = payload
+        _size += len(payload)
+        while _size > MAX_BYTES and len(_payloads) > 1:
+            _, old = _payloads.popitem(last=False)
+            _size -= len(old)
+            metrics.cache("tables", "evictions")
+
+
+def stats():
+    """Return ``(tables cached, bytes cached, hits, misses)``."""
+    with _lock:
+        return len(_payloads), _size, _hits, _misses
+
+
+# ========== Check ==========
+
+def check(repeats=20):
+    """Check cached tables reach the browser unchanged; time the conversion with and without."""
+    import statistics
+
+    from streamlit import dataframe_util
+
+    print(f"{'dataset':60} {'rows':>7} {'convert':>9} {'cached':>9}")
+    for path in data.bundled_csvs():
+        try:
+            frame = data.load_csv(path)
+        except Exception:
+            continue
+        expected = dataframe_util.convert_pandas_df_to_arrow_bytes(frame)
+        assert dataframe_util.convert_arrow_table_to_arrow_bytes(arrow_table(frame, path)) == expected, path
+        direct, cached = [], []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            dataframe_util.convert_pandas_df_to_arrow_bytes(frame)
+            direct.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            dataframe_util.convert_arrow_table_to_arrow_bytes(arrow_table(frame, path))
+            cached.append(time.perf_counter() - start)
+        print(f"{os.path.relpath(path, data.REPO_ROOT)[:60]:60} {len(frame):7} "
+              f"{statistics.median(direct) * 1000:6.1f} ms {statistics.median(cached) * 1000:6.1f} ms")
+    tables, size, hits, misses = stats()
+    print(f"{tables} tables, {size / 2**20:.1f} MB cached; {hits} hits, {misses} misses")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m eng220.tables")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args(argv)
+    check(args.repeats)
+
+
+if __name__ == "__main__":
+    main()
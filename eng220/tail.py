@@ -0,0 +1,254 @@
+# Incremental daily aggregates of the Group 004 gage files.
+#
+# The discharge and gage-height files are USGS provisional feeds: rows are
+# appended every 15 minutes and the most recent ones are revised now and
+# then.  Each new version used to be parsed and resampled from the first
+# byte (10 years of readings per station).  ``daily`` instead keeps, per
+# file, the per-day row counts, sums and value counts of everything before a
+# byte offset (the checkpoint), saved under CACHE_DIR/tail/.  A call parses
+# only the bytes after the checkpoint: the last REVISION_BYTES of rows seen
+# before, which are re-read every time so revisions to them are picked up,
+# and whatever was appended.  Rows that have fallen out of that window are
+# then folded into the saved totals and the checkpoint moves past them.
+#
+# A file that got shorter, or whose bytes just before the checkpoint or whose
+# header changed, was rewritten rather than appended to and is read again
+# from the start.  A trailing line without its newline waits for the rest.
+#
+#   daily_data = tail.daily(path)    what resample('D').mean() of the whole file gives
+#
+#   python -m eng220.tail    append to a copy of a station file; compare with full re-reads
+
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from eng220 import data
+
+TAIL_DIR = os.path.join(data.CACHE_DIR, "tail")
+# Rows re-read on every update; ~75 days of 15-minute readings
+REVISION_BYTES = 256 * 1024
+# Bytes before the checkpoint compared to tell an append from a rewrite
+GUARD_BYTES = 4096
+HEADER_LINES = 2  # the provisional-data banner and the column names
+STATE_KEY = b"eng220.tail"
+
+
+def daily(path):
+    """Return one row per day with the mean of each reading, like the page's resample."""
+    path = os.path.abspath(path)
+    state = _read_state(path)
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if state is None or not _appended(f, size, state):
+            state = _start(f)
+        f.seek(state["checkpoint"])
+        chunk = f.read(size - state["checkpoint"])
+    chunk = chunk[:chunk.rfind(b"\n") + 1]
+
+    # Split off the rows that can no longer be revised; they are counted once
+    lines = np.flatnonzero(np.frombuffer(chunk, dtype=np.uint8) == ord("\n")) + 1
+    settled_lines = np.searchsorted(lines, len(chunk) - REVISION_BYTES, side="right")
+    split = int(lines[settled_lines - 1]) if settled_lines else 0
+    columns = state["columns"]
+    if split:
+        state["settled"] = _add(state["settled"], _totals(_parse(chunk[:split], columns), columns))
+        state["checkpoint"] += split
+        with open(path, "rb") as f:
+            state["guard"] = _guard(f, state["checkpoint"])
+        _write_state(path, state)
+    return _means(_add(state["settled"], _totals(_parse(chunk[split:], columns), columns)), columns)
+
+
+def _start(f):
+    f.seek(0)
+    header = b"".join(f.readline() for _ in range(HEADER_LINES))
+    names = next(csv.reader([header.decode("utf-8", "replace").splitlines()[-1]]))
+    columns = ["Timestamp"] + names[1:]
+    return {"columns": columns, "header": _digest(header), "checkpoint": len(header),
+            "guard": _digest(header), "settled": _totals(_parse(b"", columns), columns)}
+
+
+def _appended(f, size, state):
+    """Whether the file is the saved one with rows added (or revised) after the checkpoint."""
+    if size < state["checkpoint"]:
+        return False
+    f.seek(0)
+    header = b"".join(f.readline() for _ in range(HEADER_LINES))
+    return _digest(header) == state["header"] and _guard(f, state["checkpoint"]) == state["guard"]
+
+
+def _guard(f, offset):
+    start = max(0, offset - GUARD_BYTES)
+    f.seek(start)
+    return _digest(f.read(offset - start))
+
+
+def _digest(raw):
+    return hashlib.sha256(raw).hexdigest()
+
+
+def _parse(raw, columns):
+    """Parse data lines the way the page cleaned the whole file."""
+    frame = pd.read_csv(io.BytesIO(raw), header=None, names=columns) if raw.strip() else \
+        pd.DataFrame(columns=columns)
+    frame["Timestamp"] = pd.to_datetime(frame["Timestamp"], errors="coerce")
+    frame = frame.dropna(subset=["Timestamp"])
+    for col in columns[1:]:
+        # "NR" (not recorded) and other text become missing values
+        frame[col] = pd.to_numeric(frame[col], errors="coerce")
+    return frame
+
+
+def _totals(frame, columns):
+    """Return per-day ``rows``, ``sum:<col>`` and ``count:<col>``, indexed by day."""
+    days = frame["Timestamp"].dt.floor("D")
+    grouped = frame[columns[1:]].astype("float64").groupby(days)
+    totals = pd.concat([grouped.size().rename("rows").astype("float64"),
+                        grouped.sum().add_prefix("sum:"),
+                        grouped.count().astype("float64").add_prefix("count:")], axis=1)
+    totals.index = pd.DatetimeIndex(totals.index, name="day").as_unit("ns")
+    return totals
+
+
+def _add(a, b):
+    return a.add(b, fill_value=0) if len(a) and len(b) else (a if len(a) else b)
+
+
+def _means(totals, columns):
+    """Daily means from totals, with every day between the first and last reading."""
+    if not len(totals):
+        return pd.DataFrame({col: pd.Series(dtype="datetime64[ns]" if col == "Timestamp" else "float64")
+                             for col in columns})
+    days = pd.date_range(totals.index.min(), totals.index.max(), freq="D", name="Timestamp")
+    totals = totals.reindex(days)
+    means = {col: (totals[f"sum:{col}"] / totals[f"count:{col}"].replace(0, np.nan)).to_numpy()
+             for col in columns[1:]}
+    return pd.DataFrame({"Timestamp": days, **means})
+
+
+def _state_path(path):
+    return os.path.join(TAIL_DIR, f"{_digest(path.encode())[:16]}.parquet")
+
+
+def _read_state(path):
+    import pyarrow.parquet as pq
+
+    try:
+        table = pq.read_table(_state_path(path))
+    except (OSError, ValueError):
+        return None
+    state = json.loads(table.schema.metadata[STATE_KEY])
+    state["settled"] = table.to_pandas().set_index("day")
+    return state
+
+
+def _write_state(path, state):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    meta = {k: v for k, v in state.items() if k != "settled"}
+    table = pa.Table.from_pandas(state["settled"].reset_index(), preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), STATE_KEY: json.dumps(meta)})
+    os.makedirs(TAIL_DIR, exist_ok=True)
+    out = _state_path(path)
+    tmp_path = f"{out}.{os.getpid()}.tmp"
+    pq.write_table(table, tmp_path)
+    # Workers may update the same file's state; either complete state is valid
+    os.replace(tmp_path, out)
+
+
+# ========== Check ==========
+
+def full_daily(path):
+    """The page's original aggregation: read and resample the whole file."""
+    raw_data = pd.read_csv(path, header=1)
+    raw_data.rename(columns={raw_data.columns[0]: "Timestamp"}, inplace=True)
+    raw_data['Timestamp'] = pd.to_datetime(raw_data['Timestamp'], errors='coerce')
+    raw_data.dropna(subset=['Timestamp'], inplace=True)
+    for col in raw_data.columns[1:]:
+        raw_data[col] = pd.to_numeric(raw_data[col], errors='coerce')
+    return raw_data.set_index('Timestamp').resample('D').mean().reset_index()
+
+
+def append(path, lines, revise=0):
+    """Stand-in for the live feed: add ``lines``, first rewriting the last ``revise`` rows."""
+    if revise:
+        with open(path, "rb") as f:
+            kept = f.read().splitlines(keepends=True)
+        with open(path, "wb") as f:
+            f.writelines(kept[:-revise])
+            # A revision restates recent values, here 10% higher
+            for line in kept[-revise:]:
+                stamp, *values = line.decode().rstrip("\r\n").split(",")
+                revised = [f"{float(v) * 1.1:.6f}" if v.replace(".", "", 1).isdigit() else v for v in values]
+                f.write((",".join([stamp, *revised]) + "\n").encode())
+    with open(path, "ab") as f:
+        f.writelines(lines)
+
+
+def check(station, start_fraction=0.9, batches=20, batch_rows=96, revise=48):
+    """Replay the end of ``station`` as a feed; compare ``daily`` with full re-reads."""
+    global TAIL_DIR
+    tmp_dir = tempfile.mkdtemp(prefix="eng220-tail-")
+    saved_dir, TAIL_DIR = TAIL_DIR, os.path.join(tmp_dir, "state")
+    try:
+        with open(station, "rb") as f:
+            lines = f.read().splitlines(keepends=True)
+        header, rows = lines[:HEADER_LINES], lines[HEADER_LINES:]
+        first = int(len(rows) * start_fraction)
+        path = os.path.join(tmp_dir, os.path.basename(station))
+        with open(path, "wb") as f:
+            f.writelines(header + rows[:first])
+
+        start = time.perf_counter()
+        daily(path)
+        cold = time.perf_counter() - start
+        incremental, full = [], []
+        position = first
+        for batch in range(batches):
+            new = rows[position:position + batch_rows]
+            position += len(new)
+            # Every fifth update also revises the most recent rows
+            append(path, new, revise=revise if batch % 5 == 4 else 0)
+            start = time.perf_counter()
+            ours = daily(path)
+            incremental.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            theirs = full_daily(path)
+            full.append(time.perf_counter() - start)
+            pd.testing.assert_frame_equal(ours, theirs, check_freq=False, rtol=1e-9)
+
+        print(f"{os.path.relpath(station, data.REPO_ROOT)}: {first} rows, then {batches} batches of "
+              f"{batch_rows} rows (every fifth revising the last {revise})")
+        print(f"  first read        {cold * 1000:7.0f} ms")
+        print(f"  update, tail      {statistics.median(incremental) * 1000:7.1f} ms (median)")
+        print(f"  update, full read {statistics.median(full) * 1000:7.1f} ms (median)")
+        print("  daily means identical after every update")
+    finally:
+        TAIL_DIR = saved_dir
+        shutil.rmtree(tmp_dir)
+
+
+def main(argv=None):
+    default = os.path.join(data.REPO_ROOT, "ENG220-Group-004", "District 1",
+                           "Tijeras Arroyo Discharge and Gage Height Data.csv")
+    parser = argparse.ArgumentParser(prog="python -m eng220.tail")
+    parser.add_argument("station", nargs="?", default=default)
+    parser.add_argument("--batches", type=int, default=20)
+    args = parser.parse_args(argv)
+    check(args.station, batches=args.batches)
+
+
+if __name__ == "__main__":
+    main()
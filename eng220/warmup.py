@@ -0,0 +1,205 @@
+# Background warm-up of page datasets.
+#
+# Every page run is wrapped in ``visit``, which counts the visit and records
+# the loads the page made through eng220.data and the transforms it submitted
+# to eng220.offload.  When the server starts, a small thread pool replays
+# them for every page, most visited first: the CSVs are parsed into the
+# shared registry with the page's own options, and the aggregations (daily
+# resamples, stacked county reports) are computed in the offload workers and
+# stored.  The first visitor of a page no longer pays for either.  While
+# someone is on a page, the next pages in .streamlit/pages_sections.toml are
+# prefetched the same way.  Pages with nothing recorded yet are skipped.
+#
+# Visit counts and recorded loads are kept in CACHE_DIR so they survive
+# restarts.  Each server process merges what it recorded into the file every
+# STATE_INTERVAL seconds, under a lock shared with the other processes.
+#
+#   warmup.get_service()    at startup
+
+import atexit
+import collections
+import contextlib
+import fcntl
+import json
+import os
+import threading
+import tomllib
+from concurrent.futures import ThreadPoolExecutor
+
+from eng220 import data, offload
+
+PAGES_TOML = os.path.join(data.REPO_ROOT, ".streamlit", "pages_sections.toml")
+STATE_PATH = os.path.join(data.CACHE_DIR, "warmup.json")
+WORKERS = 2
+PREFETCH_PAGES = 2
+STATE_INTERVAL = 30.0  # seconds between merges of the recorded visits into STATE_PATH
+
+_lock = threading.Lock()
+_service = None
+
+
+def page_order(toml_path=PAGES_TOML):
+    """Return the page script paths in navigation order, relative to the repo."""
+    with open(toml_path, "rb") as f:
+        pages = tomllib.load(f).get("pages", [])
+    return [p["path"] for p in pages if "path" in p]
+
+
+class WarmupService:
+    def __init__(self, pages, state_path=STATE_PATH, workers=WORKERS):
+        self.pages = pages
+        self.state_path = state_path
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="warmup")
+        self.lock = threading.Lock()
+        self.in_flight = set()
+        self.warmed = set()
+        self.visits, self.loads = self._read_state()
+        # Recorded since the last merge into the state file
+        self.new_visits = collections.Counter()
+        self.new_loads = {}
+        self.stopped = threading.Event()
+        self.writer = threading.Thread(target=self._write_loop, name="warmup-state", daemon=True)
+
+    def start(self):
+        """Queue every page for warm-up, most visited pages first."""
+        self.writer.start()
+        position = {page: i for i, page in enumerate(self.pages)}
+        ranked = sorted(self.pages, key=lambda p: (-self.visits.get(p, 0), position[p]))
+        for page in ranked:
+            self.submit(page)
+
+    def submit(self, page):
+        with self.lock:
+            if page in self.in_flight or page in self.warmed:
+                return
+            self.in_flight.add(page)
+        self.executor.submit(self._warm, page)
+
+    def prefetch(self, page):
+        """Warm the pages that follow ``page`` in navigation order."""
+        if page not in self.pages:
+            return
+        i = self.pages.index(page)
+        for nxt in self.pages[i + 1:i + 1 + PREFETCH_PAGES]:
+            self.submit(nxt)
+
+    def record(self, page, specs):
+        """Count a visit to ``page`` and remember the loads it made."""
+        with self.lock:
+            self.visits[page] = self.visits.get(page, 0) + 1
+            self.new_visits[page] += 1
+            if specs:
+                self.loads[page] = self.new_loads[page] = list(specs)
+
+    def specs_for(self, page):
+        # Guessing a page's loads would parse files with the wrong options and keep them
+        with self.lock:
+            return self.loads.get(page, [])
+
+    def loads_reading(self, paths):
+        """Return the recorded loads, of any page, that read one of ``paths``."""
+        relpaths = {os.path.relpath(os.path.abspath(p), data.REPO_ROOT) for p in paths}
+        found = []
+        with self.lock:
+            recorded = [spec for specs in self.loads.values() for spec in specs]
+        for spec in recorded:
+            if spec[0] == "offload":
+                # Rebuilt by eng220.reload through offload.jobs_reading
+                continue
+            files = spec[1][0] if spec[0] == "concat_csvs" else spec[1][:1]
+            if relpaths & set(files) and spec not in found:
+                found.append(spec)
+        return found
+
+    def _warm(self, page):
+        try:
+            for spec in self.specs_for(page):
+                try:
+                    if spec[0] == "offload":
+                        # Not waited for; the job runs on in the offload pool
+                        offload.replay(spec)
+                    else:
+                        data.replay(spec)
+                except Exception:
+                    # The page reports its own load errors to the user
+                    pass
+        finally:
+            with self.lock:
+                self.in_flight.discard(page)
+                self.warmed.add(page)
+
+    def _read_state(self):
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+            return state.get("visits", {}), state.get("loads", {})
+        except (OSError, ValueError):
+            return {}, {}
+
+    def flush(self):
+        """Merge the visits and loads recorded since the last flush into the state file."""
+        with self.lock:
+            visits, loads = self.new_visits, self.new_loads
+            self.new_visits, self.new_loads = collections.Counter(), {}
+        if not visits and not loads:
+            return
+        try:
+            self._merge(visits, loads)
+        except BaseException:
+            # Kept for the next flush
+            with self.lock:
+                self.new_visits.update(visits)
+                for page, specs in loads.items():
+                    self.new_loads.setdefault(page, specs)
+            raise
+
+    def _merge(self, visits, loads):
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        with open(f"{self.state_path}.lock", "a") as lock_file:
+            # Other server processes (eng220.prefork) merge into the same file
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            saved_visits, saved_loads = self._read_state()
+            for page, count in visits.items():
+                saved_visits[page] = saved_visits.get(page, 0) + count
+            saved_loads.update(loads)
+            tmp_path = f"{self.state_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"visits": saved_visits, "loads": saved_loads}, f)
+            os.replace(tmp_path, self.state_path)
+
+    def stop(self):
+        self.stopped.set()
+        self.flush()
+
+    def _write_loop(self):
+        while not self.stopped.wait(STATE_INTERVAL):
+            try:
+                self.flush()
+            except OSError:
+                # Tried again at the next interval
+                pass
+
+
+def get_service():
+    """Return the process-wide warm-up service, starting it on first use."""
+    global _service
+    with _lock:
+        if _service is None:
+            _service = WarmupService(page_order())
+            _service.start()
+            atexit.register(_service.stop)
+        return _service
+
+
+@contextlib.contextmanager
+def visit(page):
+    """Wrap one run of ``page``: record it and prefetch the pages after it."""
+    service = get_service()
+    page = os.path.relpath(os.path.abspath(page), data.REPO_ROOT).replace(os.sep, "/")
+    service.prefetch(page)
+    with data.track_loads() as specs:
+        try:
+            yield
+        finally:
+            # Also recorded when the run is stopped or superseded by a rerun
+            service.record(page, specs)
@@ -2,6 +2,15 @@
 import streamlit as st
 from st_pages import add_page_title, get_nav_from_toml
 
+from eng220 import cancel, data, metrics, profiling, reload, sessions, warmup
+
+# Datasets edited on disk are rebuilt in the background and swapped in (eng220/reload.py)
+reload.get_service()
+# Rerun, load and cache telemetry in CACHE_DIR/metrics.<pid>.prom, or at ENG220_METRICS_PORT (eng220/metrics.py)
+metrics.get_service()
+# Recorded loads and offloaded aggregations of the most visited pages, warmed in the background (eng220/warmup.py)
+warmup.get_service()
+
 # Set wide layout and page title
 
 # Sidebar toggle to show grouped or flat navigation
@@ -51,6 +60,28 @@ if pg.title == "ENG220 Dashboard":
     ---
     Select a project from the sidebar to get started!
     """)
+
+    # Datasets shared by content hash across pages and sessions (eng220/data.py)
+    with st.expander("Shared Dataset Memory"):
+        st.write(f"Deduplication saved {data.memory_saved() / 1e6:.2f} MB")
+        st.dataframe(data.memory_report())
+
+    # Work dropped because a widget changed mid-run (eng220/cancel.py)
+    with st.expander("Cancelled Work"):
+        st.dataframe(cancel.report(), hide_index=True)
+
+    # Datasets changed on disk and swapped in without a restart (eng220/reload.py)
+    with st.expander("Dataset Reloads"):
+        st.dataframe(reload.get_service().report(), hide_index=True)
+
+    # CPU time and retained memory per session; idle sessions' state is evicted (eng220/sessions.py)
+    with st.expander("Sessions"):
+        st.dataframe(sessions.report(), hide_index=True)
 else:
-    # Run the selected project/subpage
-    pg.run()
+    # Run the selected project/subpage; st.Page keeps its script path private
+    # ?profile=1 (or the admin toggle) saves a flame graph of this run (eng220/profiling.py)
+    with profiling.run(str(pg._page), profiling.requested()) as profiler, \
+            warmup.visit(str(pg._page)), metrics.rerun(str(pg._page)), sessions.track(str(pg._page)):
+        pg.run()
+    if profiler is not None:
+        profiling.offer(profiler)